@@ -3,67 +3,279 @@
 from __future__ import annotations
 
 import logging
-
-from bleak_retry_connector import get_device
-from homeassistant.components import bluetooth
-from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import CONF_ACCESS_TOKEN
-from homeassistant.const import CONF_ADDRESS
-from homeassistant.const import Platform
-from homeassistant.core import HomeAssistant
-from homeassistant.exceptions import ConfigEntryNotReady
-from pychlorinator.chlorinator import ChlorinatorAPI
-from pychlorinator.halochlorinator import HaloChlorinatorAPI
+from typing import Any
+from typing import TYPE_CHECKING
 
 from .const import DOMAIN
-from .coordinator import ChlorinatorDataUpdateCoordinator
-from .gpo_helper import add_gpo_support
-from .models import ChlorinatorData
 
-PLATFORMS: list[Platform] = [Platform.SENSOR, Platform.BINARY_SENSOR, Platform.SELECT]
+if TYPE_CHECKING:
+    from homeassistant.config_entries import ConfigEntry
+    from homeassistant.core import HomeAssistant
+
+# The BLE stack, pychlorinator and the platforms are only imported once an
+# entry is set up, so loading the integration stays cheap. Platforms are
+# referred to by their string value for the same reason.
+PLATFORMS: list[str] = ["sensor", "binary_sensor", "select"]
+
+# Keys in the gathered data that give a platform something to show, "*Enabled"
+# capability flags count only when set. The sensor platform is always set up.
+PLATFORM_CAPABILITY_KEYS: dict[str, tuple[str, ...]] = {
+    "binary_sensor": (
+        "pump_is_operating",
+        "cell_is_operating",
+        "HeaterEnabled",
+        "SolarEnabled",
+    ),
+    "select": (
+        "mode",
+        "HeaterEnabled",
+        "SolarEnabled",
+        "LightingEnabled",
+        "GPO1_Mode",
+        "GPO2_Mode",
+        "GPO3_Mode",
+        "GPO4_Mode",
+    ),
+}
+
+# Version 1 entries keyed every entity by this prefix and the device by a
+# fixed id, whichever chlorinator they were for
+LEGACY_UNIQUE_ID_PREFIX = "hchlor_"
+LEGACY_DEVICE_ID = "HCHLOR"
+
 _LOGGER = logging.getLogger(__name__)
 
 
+def _has_capability(data: dict[str, Any], key: str) -> bool:
+    """Return True if the gathered data reports the capability key."""
+    if key.endswith("Enabled"):
+        return data.get(key) == 1
+    return key in data
+
+
+def _is_halo(name: str | None) -> bool:
+    """Return True if a chlorinator of this name is a Halo."""
+    return name == "HCHLOR"
+
+
+def required_platforms(data: dict[str, Any]) -> list[str]:
+    """Return the platforms that have entities for the gathered data."""
+    return [
+        platform
+        for platform in PLATFORMS
+        if platform not in PLATFORM_CAPABILITY_KEYS
+        or any(_has_capability(data, key) for key in PLATFORM_CAPABILITY_KEYS[platform])
+    ]
+
+
+async def async_migrate_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
+    """Migrate an entry of an older version.
+
+    The entities and device of a version 1 entry are moved to ids keyed by
+    the address, keeping their entity ids and settings. Only one chlorinator
+    could have them before, other entries on the shared device are detached.
+    """
+    from homeassistant.const import CONF_ADDRESS
+    from homeassistant.core import callback
+    from homeassistant.helpers import device_registry as dr
+    from homeassistant.helpers import entity_registry as er
+
+    from .coordinator import entity_unique_id
+
+    if entry.version > 2:
+        # Downgraded from a later version
+        return False
+    if entry.version == 1:
+        address = (entry.unique_id or entry.data[CONF_ADDRESS]).upper()
+
+        @callback
+        def _async_migrate_unique_id(
+            entity_entry: er.RegistryEntry,
+        ) -> dict[str, Any] | None:
+            """Key the unique id of an entity by the address."""
+            unique_id = entity_entry.unique_id.lower()
+            if not unique_id.startswith(LEGACY_UNIQUE_ID_PREFIX):
+                return None
+            key = unique_id.removeprefix(LEGACY_UNIQUE_ID_PREFIX)
+            return {"new_unique_id": entity_unique_id(address, key)}
+
+        await er.async_migrate_entries(hass, entry.entry_id, _async_migrate_unique_id)
+
+        device_registry = dr.async_get(hass)
+        device = device_registry.async_get_device(
+            identifiers={(DOMAIN, LEGACY_DEVICE_ID)}
+        )
+        if device is not None and entry.entry_id in device.config_entries:
+            entities = er.async_entries_for_device(
+                er.async_get(hass), device.id, include_disabled_entities=True
+            )
+            if any(e.config_entry_id == entry.entry_id for e in entities):
+                for entry_id in device.config_entries - {entry.entry_id}:
+                    device_registry.async_update_device(
+                        device.id, remove_config_entry_id=entry_id
+                    )
+                device_registry.async_update_device(
+                    device.id, new_identifiers={(DOMAIN, address)}
+                )
+            else:
+                device_registry.async_update_device(
+                    device.id, remove_config_entry_id=entry.entry_id
+                )
+        hass.config_entries.async_update_entry(entry, version=2)
+        _LOGGER.debug("Migrated %s to version 2", entry.title)
+    return True
+
+
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
-    """Set up Chlorinator from a config entry."""
+    """Set up Chlorinator from a config entry.
 
-    address: str = entry.data[CONF_ADDRESS]
-    accesscode: str = entry.data[CONF_ACCESS_TOKEN]
-    ble_device = bluetooth.async_ble_device_from_address(
-        hass, address.upper(), True
-    ) or await get_device(address)
-    if not ble_device:
-        raise ConfigEntryNotReady(
-            f"Could not find chlorinator device with address {address}"
+    The platforms are set up right away, showing the values gathered before
+    the last restart. If Home Assistant has not seen the chlorinator advertise
+    yet, the first gather waits for its first advert, rather than holding up
+    startup with a scan of its own.
+    """
+    from bleak.backends.device import BLEDevice
+    from homeassistant.components import bluetooth
+    from homeassistant.const import CONF_ACCESS_TOKEN
+    from homeassistant.const import CONF_ADDRESS
+    from homeassistant.core import callback
+
+    from .connector import ChlorinatorConnector
+    from .coordinator import ChlorinatorDataUpdateCoordinator
+    from .last_state import LastState
+    from .metrics_view import async_setup_metrics
+    from .models import ChlorinatorData
+    from .routing import async_scanner_sources
+    from .routing import ConnectionRouter
+    from .services import async_setup_services
+
+    address = entry.data[CONF_ADDRESS].upper()
+    last_state = LastState(hass, address)
+    await last_state.async_load()
+    ble_device = bluetooth.async_ble_device_from_address(hass, address, True)
+    seen = ble_device is not None
+    if not seen:
+        _LOGGER.info(
+            "Chlorinator %s not seen yet, waiting for it to advertise", address
         )
+        # Connections are routed to wherever it advertises, once it does
+        ble_device = BLEDevice(address, last_state.name or entry.title, {})
 
+    accesscode: str = entry.data[CONF_ACCESS_TOKEN]
     _LOGGER.debug("async_setup_entry address:  %s accesscode %s", address, accesscode)
-    if ble_device.name == "HCHLOR":
+    if _is_halo(ble_device.name):
         # true
+        from pychlorinator.halochlorinator import HaloChlorinatorAPI
+
+        from .gpo_helper import add_gpo_support
+
         chlorinator = HaloChlorinatorAPI(ble_device, accesscode)
         # Add GPO support to the chlorinator instance
         add_gpo_support(chlorinator)
     else:
+        from pychlorinator.chlorinator import ChlorinatorAPI
+
         chlorinator = ChlorinatorAPI(ble_device, accesscode)
 
-    coordinator = ChlorinatorDataUpdateCoordinator(hass, chlorinator)
-    await coordinator.async_config_entry_first_refresh()
+    # Connect through the best adapter or proxy, reusing discovered services
+    router = ConnectionRouter(
+        lambda: async_scanner_sources(hass, address.upper()), ble_device
+    )
+    chlorinator.connector = ChlorinatorConnector(chlorinator, router)
 
-    hass.data.setdefault(DOMAIN, {})[entry.entry_id] = ChlorinatorData(
-        entry.title, chlorinator, coordinator
+    coordinator = ChlorinatorDataUpdateCoordinator(
+        hass, chlorinator, config_entry=entry, last_state=last_state
     )
+    coordinator.async_restore(last_state.data)
+    if seen:
+        await coordinator.async_config_entry_first_refresh()
+
+    data = ChlorinatorData(entry.title, chlorinator, coordinator)
+    hass.data.setdefault(DOMAIN, {})[entry.entry_id] = data
+    async_setup_services(hass)
+    async_setup_metrics(hass, entry, data)
 
-    hass.async_create_task(
-        hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    platforms = required_platforms(coordinator.data)
+    data.platforms.update(platforms)
+    await hass.config_entries.async_forward_entry_setups(entry, platforms)
+    # The platforms only add the entities of capabilities gathered after them
+    await coordinator.async_add_capability_entities(coordinator.data)
+
+    @callback
+    def _async_forward_new_platforms() -> None:
+        """Set up platforms for capabilities that have been discovered."""
+        new_platforms = [
+            platform
+            for platform in required_platforms(coordinator.data)
+            if platform not in data.platforms
+        ]
+        if not new_platforms:
+            return
+        _LOGGER.debug("Setting up platforms %s", new_platforms)
+        data.platforms.update(new_platforms)
+        hass.async_create_task(
+            hass.config_entries.async_forward_entry_setups(entry, new_platforms)
+        )
+
+    # Capabilities can show up in a later gather, e.g. if the first one failed
+    entry.async_on_unload(coordinator.async_add_listener(_async_forward_new_platforms))
+    if seen:
+        return True
+    advertised: list[Any] = []
+
+    @callback
+    def _async_device_seen(
+        service_info: bluetooth.BluetoothServiceInfoBleak,
+        change: bluetooth.BluetoothChange,
+    ) -> None:
+        """Gather on the first advert of the chlorinator."""
+        if advertised:
+            return
+        advertised.append(service_info.device)
+        if _is_halo(service_info.device.name) != _is_halo(ble_device.name):
+            # Set up for the other kind of chlorinator before the first advert
+            _LOGGER.info("Chlorinator %s advertised, setting up again", address)
+            hass.config_entries.async_schedule_reload(entry.entry_id)
+            return
+        _LOGGER.info("Chlorinator %s advertised, gathering", address)
+        coordinator.reset_data_age()
+        entry.async_create_background_task(
+            hass, coordinator.async_refresh(), f"{DOMAIN} first gather {address}"
+        )
+
+    entry.async_on_unload(
+        bluetooth.async_register_callback(
+            hass,
+            _async_device_seen,
+            bluetooth.BluetoothCallbackMatcher(address=address, connectable=True),
+            bluetooth.BluetoothScanningMode.PASSIVE,
+        )
     )
     return True
 
 
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
-    """Unload a config entry."""
+    """Unload a config entry.
+
+    Everything the entry set up is released, so reloading it does not leave
+    anything behind. The coordinator shuts down once this returns, and saves
+    the last gathered values.
+    """
+    from .services import async_unload_services
+
+    data = hass.data[DOMAIN][entry.entry_id]
+    # Live mode would keep updating entities that are being removed
+    data.coordinator.async_stop_live()
     unload_ok = True
-    for platform in PLATFORMS:
+    for platform in data.platforms:
         if not await hass.config_entries.async_forward_entry_unload(entry, platform):
             unload_ok = False
+    if not unload_ok:
+        return False
 
-    return unload_ok
+    data.coordinator.async_clear_platforms()
+    del hass.data[DOMAIN][entry.entry_id]
+    if not hass.data[DOMAIN]:
+        del hass.data[DOMAIN]
+        async_unload_services(hass)
+    return True
@@ -0,0 +1,5 @@
+"""Run the command line, see cli.py."""
+
+from .cli import main
+
+main()
@@ -0,0 +1,84 @@
+"""Target states of the chlorinator outputs and the frames that set them.
+
+Used by the apply service and the command line, so it does not depend on
+Home Assistant.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable
+from typing import Any
+
+from pychlorinator import halo_parsers
+
+from .codec import CHLORINATOR_FRAMES
+from .codec import GPO_FRAMES
+from .codec import GPOAppActions
+from .codec import HEATER_FRAMES
+from .codec import LIGHT_FRAMES
+from .codec import SOLAR_FRAMES
+
+ATTR_MODE = "mode"
+ATTR_HEATER = "heater"
+ATTR_SOLAR = "solar"
+ATTR_LIGHTING = "lighting"
+ATTR_LIGHTING_ZONE = "lighting_zone"
+ATTR_GPOS = ("gpo1", "gpo2", "gpo3", "gpo4")
+
+ALL_ZONES = "all"
+
+MODE_ACTIONS = {
+    "Off": halo_parsers.ChlorinatorActions.Off,
+    "Auto": halo_parsers.ChlorinatorActions.Auto,
+    "Low": halo_parsers.ChlorinatorActions.Low,
+    "Medium": halo_parsers.ChlorinatorActions.Medium,
+    "High": halo_parsers.ChlorinatorActions.High,
+}
+HEATER_ACTIONS = {
+    "Off": halo_parsers.HeaterAppActions.HeaterOff,
+    "On": halo_parsers.HeaterAppActions.HeaterOn,
+}
+SOLAR_ACTIONS = {
+    "Off": halo_parsers.SolarAppActions.Off,
+    "Auto": halo_parsers.SolarAppActions.Auto,
+    "On": halo_parsers.SolarAppActions.On,
+}
+LIGHT_ACTIONS = {
+    "Off": halo_parsers.LightAppActions.TurnOffZone,
+    "Auto": halo_parsers.LightAppActions.SetZoneModeToAuto,
+    "On": halo_parsers.LightAppActions.TurnOnZone,
+}
+GPO_ACTIONS = {
+    "Off": GPOAppActions.Off,
+    "Auto": GPOAppActions.Auto,
+    "On": GPOAppActions.On,
+}
+
+
+def encode_scene(
+    targets: dict[str, Any], zones_in_use: Iterable[int] = range(1, 5)
+) -> list[bytes]:
+    """Encode the requested target states as command frames.
+
+    Lighting is set on each of the listed zones, or on every zone in use when
+    the list contains "all".
+    """
+    frames = []
+    if ATTR_MODE in targets:
+        frames.append(CHLORINATOR_FRAMES[MODE_ACTIONS[targets[ATTR_MODE]]])
+    if ATTR_HEATER in targets:
+        frames.append(HEATER_FRAMES[HEATER_ACTIONS[targets[ATTR_HEATER]]])
+    if ATTR_SOLAR in targets:
+        frames.append(SOLAR_FRAMES[SOLAR_ACTIONS[targets[ATTR_SOLAR]]])
+    if ATTR_LIGHTING in targets:
+        action = LIGHT_ACTIONS[targets[ATTR_LIGHTING]]
+        zones = targets.get(ATTR_LIGHTING_ZONE, [1])
+        if isinstance(zones, int):
+            zones = [zones]
+        if ALL_ZONES in zones:
+            zones = zones_in_use
+        frames.extend(LIGHT_FRAMES[action, zone] for zone in dict.fromkeys(zones))
+    for gpo_num, gpo in enumerate(ATTR_GPOS, start=1):
+        if gpo in targets:
+            frames.append(GPO_FRAMES[GPO_ACTIONS[targets[gpo]], gpo_num])
+    return frames
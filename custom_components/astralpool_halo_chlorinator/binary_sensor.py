@@ -1,4 +1,5 @@
 """Platform for binary sensor integration."""
+
 from __future__ import annotations
 
 import logging
@@ -11,6 +12,7 @@ from homeassistant.components.binary_sensor import (
 )
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.entity import DeviceInfo
+from homeassistant.helpers.entity import EntityCategory
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
@@ -75,6 +77,21 @@ SOLAR_BINARY_SENSOR_TYPES: dict[str, BinarySensorEntityDescription] = {
 }
 
 
+# GPO binary sensor types - created dynamically for each GPO (1-4)
+def create_gpo_binary_sensor_types(
+    gpo_number: int,
+) -> dict[str, BinarySensorEntityDescription]:
+    """Create binary sensor descriptions for a specific GPO."""
+    return {
+        f"GPO{gpo_number}_UseTimers": BinarySensorEntityDescription(
+            key=f"GPO{gpo_number}_UseTimers",
+            icon="mdi:timer-outline",
+            name=f"GPO{gpo_number} Uses Timers",
+            entity_category=EntityCategory.DIAGNOSTIC,
+        ),
+    }
+
+
 async def async_setup_entry(
     hass: HomeAssistant,
     entry: config_entries.ConfigEntry,
@@ -89,11 +106,22 @@ async def async_setup_entry(
             "SolarEnabled": SOLAR_BINARY_SENSOR_TYPES,
             "HeaterEnabled": HEATER_BINARY_SENSOR_TYPES,
         }
+
+        # Check if this is a GPO sensor type
+        if sensor_type.startswith("GPO") and sensor_type.endswith("Enabled"):
+            try:
+                gpo_num = int(sensor_type[3])  # Get the number after "GPO"
+                binary_sensor_types_dict[sensor_type] = create_gpo_binary_sensor_types(
+                    gpo_num
+                )
+            except (ValueError, IndexError):
+                pass
+
         sensor_descs = binary_sensor_types_dict.get(sensor_type, {})
 
         new_entities = []
         for sensor_type, sensor_desc in sensor_descs.items():
-            unique_id = f"hchlor_{sensor_type}".lower()
+            unique_id = coordinator.unique_id(sensor_type)
             if unique_id not in coordinator.added_entities:
                 new_entities.append(HeaterBinarySensor(coordinator, sensor_desc))
                 coordinator.added_entities.add(unique_id)
@@ -124,19 +152,14 @@ class ChlorinatorBinarySensor(CoordinatorEntity, BinarySensorEntity):
         """Initialize the sensor."""
         super().__init__(coordinator)
         self._sensor = sensor
-        self._attr_unique_id = f"HCHLOR_{sensor}".lower()
+        self._attr_unique_id = coordinator.unique_id(sensor)
         self._attr_name = CHLORINATOR_BINARY_SENSOR_TYPES[sensor].name
         self.entity_description = CHLORINATOR_BINARY_SENSOR_TYPES[sensor]
         self._attr_device_class = CHLORINATOR_BINARY_SENSOR_TYPES[sensor].device_class
 
     @property
     def device_info(self) -> DeviceInfo | None:
-        return {
-            "identifiers": {(DOMAIN, "HCHLOR")},
-            "name": "HCHLOR",
-            "model": "Halo Chlor",
-            "manufacturer": "Astral Pool",
-        }
+        return self.coordinator.device_info
 
     @property
     def is_on(self) -> bool:
@@ -153,19 +176,14 @@ class HeaterBinarySensor(CoordinatorEntity, BinarySensorEntity):
         """Initialize the sensor."""
         super().__init__(coordinator)
         self._sensor = sensor_desc.key
-        self._attr_unique_id = f"hchlor_{self._sensor}".lower()
+        self._attr_unique_id = coordinator.unique_id(self._sensor)
         self.entity_description = sensor_desc
         self._attr_name = sensor_desc.name
         self._attr_device_class = sensor_desc.device_class
 
     @property
     def device_info(self) -> DeviceInfo | None:
-        return {
-            "identifiers": {(DOMAIN, "HCHLOR")},
-            "name": "HCHLOR",
-            "model": "Halo Chlor",
-            "manufacturer": "Astral Pool",
-        }
+        return self.coordinator.device_info
 
     @property
     def is_on(self) -> bool:
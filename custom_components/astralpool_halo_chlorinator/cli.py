@@ -0,0 +1,211 @@
+"""Command line for polling and controlling chlorinators without Home Assistant.
+
+Scans for chlorinators, polls one once or continuously, and sends actions,
+printing JSON lines. Runs against a real chlorinator over Bleak, or against
+the simulator with --simulate. Modules are imported by the command that
+needs them, so simulated runs do not load the BLE stack.
+
+    python -m custom_components.astralpool_halo_chlorinator poll --simulate
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import sys
+from enum import Enum
+from typing import Any
+
+from .const import LOCAL_NAMES
+
+# Seconds to scan for chlorinators
+SCAN_TIMEOUT = 10.0
+
+# Seconds between continuous polls, as in Home Assistant
+POLL_INTERVAL = 60.0
+
+TARGET_OPTIONS = ("mode", "heater", "solar", "lighting", "gpo1", "gpo2", "gpo3", "gpo4")
+
+
+def to_json(value: Any) -> Any:
+    """Return a gathered value as something JSON can represent."""
+    if isinstance(value, Enum):
+        return value.name if value.name is not None else value.value
+    if isinstance(value, (bytes, bytearray)):
+        return value.hex()
+    if isinstance(value, dict):
+        return {key: to_json(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_json(item) for item in value]
+    return value
+
+
+def _print(record: dict[str, Any]) -> None:
+    """Print a record as a JSON line."""
+    print(json.dumps(to_json(record), sort_keys=True), flush=True)
+
+
+async def async_open_device(args: argparse.Namespace) -> Any:
+    """Return the simulated chlorinator, or the real one at the address."""
+    if args.simulate:
+        from .simulator import SimulatedChlorinator
+
+        return SimulatedChlorinator(zones=args.zones)
+
+    if not args.address or not args.access_code:
+        raise SystemExit("--address and --access-code are needed without --simulate")
+
+    from bleak import BleakScanner
+
+    from .engine import BleakDevice
+
+    ble_device = await BleakScanner.find_device_by_address(args.address, args.timeout)
+    if ble_device is None:
+        raise SystemExit(f"Could not find chlorinator {args.address}")
+    if ble_device.name == "HCHLOR":
+        from pychlorinator.halochlorinator import HaloChlorinatorAPI
+
+        chlorinator = HaloChlorinatorAPI(ble_device, args.access_code)
+    else:
+        from pychlorinator.chlorinator import ChlorinatorAPI
+
+        chlorinator = ChlorinatorAPI(ble_device, args.access_code)
+    return BleakDevice(chlorinator)
+
+
+async def async_scan(args: argparse.Namespace) -> None:
+    """Print the chlorinators that advertise within the timeout."""
+    from bleak import BleakScanner
+
+    found = await BleakScanner.discover(timeout=args.timeout, return_adv=True)
+    for device, advertisement in found.values():
+        name = advertisement.local_name or device.name
+        if name and name.startswith(tuple(LOCAL_NAMES)):
+            _print(
+                {
+                    "address": device.address,
+                    "name": name,
+                    "rssi": advertisement.rssi,
+                }
+            )
+
+
+async def async_poll(args: argparse.Namespace) -> None:
+    """Print the state of the chlorinator, once or every interval."""
+    from .engine import AuthenticationRejected
+    from .engine import ChlorinatorEngine
+
+    engine = ChlorinatorEngine(await async_open_device(args))
+    polls = 0
+    while True:
+        try:
+            data = await engine.async_poll()
+        except AuthenticationRejected as e:
+            raise SystemExit(f"Access code rejected: {e}") from e
+        except Exception as e:
+            logging.getLogger(__name__).warning("Poll failed: %s", e)
+            data = {}
+        polls += 1
+        _print({"poll": polls, "data": data})
+        if args.interval is None or (args.count and polls >= args.count):
+            return
+        await asyncio.sleep(args.interval)
+
+
+async def async_action(args: argparse.Namespace) -> None:
+    """Send the requested target states over one session."""
+    from .actions import ATTR_LIGHTING_ZONE
+    from .actions import encode_scene
+    from .engine import ChlorinatorEngine
+
+    targets: dict[str, Any] = {
+        option: getattr(args, option)
+        for option in TARGET_OPTIONS
+        if getattr(args, option) is not None
+    }
+    targets[ATTR_LIGHTING_ZONE] = args.lighting_zone
+    zones = range(1, args.zones + 1) if args.simulate else range(1, 5)
+    frames = encode_scene(targets, zones)
+    if not frames:
+        raise SystemExit("Nothing to do, give at least one target state")
+
+    device = await async_open_device(args)
+    if not device.tiered:
+        raise SystemExit("Actions are only supported by Halo chlorinators")
+    engine = ChlorinatorEngine(device)
+    data = await engine.async_write(frames, read_back=not args.no_read_back)
+    _print({"frames": [frame.hex() for frame in frames], "data": data})
+
+
+def _lighting_zone(value: str) -> str | int:
+    """Parse a lighting zone, 1 to 4 or all."""
+    if value == "all":
+        return value
+    zone = int(value)
+    if not 1 <= zone <= 4:
+        raise argparse.ArgumentTypeError("lighting zones are 1 to 4, or all")
+    return zone
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Return the argument parser of the command line."""
+    from .actions import GPO_ACTIONS
+    from .actions import HEATER_ACTIONS
+    from .actions import LIGHT_ACTIONS
+    from .actions import MODE_ACTIONS
+    from .actions import SOLAR_ACTIONS
+
+    parser = argparse.ArgumentParser(
+        prog="python -m custom_components.astralpool_halo_chlorinator",
+        description=__doc__.split("\n\n")[0],
+    )
+    parser.add_argument("-v", "--verbose", action="store_true", help="debug logging")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    scan = commands.add_parser("scan", help="list chlorinators in range")
+    scan.add_argument("--timeout", type=float, default=SCAN_TIMEOUT)
+    scan.set_defaults(handler=async_scan)
+
+    device = argparse.ArgumentParser(add_help=False)
+    device.add_argument("--simulate", action="store_true", help="use the simulator")
+    device.add_argument("--zones", type=int, default=2, help="simulated zones")
+    device.add_argument("--address", help="Bluetooth address of the chlorinator")
+    device.add_argument("--access-code", help="access code from pairing")
+    device.add_argument("--timeout", type=float, default=SCAN_TIMEOUT)
+
+    poll = commands.add_parser("poll", parents=[device], help="print the state")
+    poll.add_argument(
+        "--interval",
+        type=float,
+        nargs="?",
+        const=POLL_INTERVAL,
+        help="keep polling, every INTERVAL seconds",
+    )
+    poll.add_argument("--count", type=int, help="stop after COUNT polls")
+    poll.set_defaults(handler=async_poll)
+
+    action = commands.add_parser("action", parents=[device], help="set outputs")
+    action.add_argument("--mode", choices=MODE_ACTIONS)
+    action.add_argument("--heater", choices=HEATER_ACTIONS)
+    action.add_argument("--solar", choices=SOLAR_ACTIONS)
+    action.add_argument("--lighting", choices=LIGHT_ACTIONS)
+    action.add_argument("--lighting-zone", type=_lighting_zone, nargs="+", default=[1])
+    for gpo in ("gpo1", "gpo2", "gpo3", "gpo4"):
+        action.add_argument(f"--{gpo}", choices=GPO_ACTIONS)
+    action.add_argument("--no-read-back", action="store_true")
+    action.set_defaults(handler=async_action)
+    return parser
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Run the command line."""
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(
+        level=logging.DEBUG if args.verbose else logging.WARNING, stream=sys.stderr
+    )
+    try:
+        asyncio.run(args.handler(args))
+    except KeyboardInterrupt:
+        pass
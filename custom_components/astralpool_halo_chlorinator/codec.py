@@ -0,0 +1,187 @@
+"""Encoding and decoding of Halo chlorinator protocol frames.
+
+Every frame is 20 bytes: a frame type (3 for a command, 2 for a read request),
+the command or characteristic id as a little endian short, then the payload.
+The layouts are compiled once, and every command frame without a free-form
+argument is encoded at import, so writing an action is a dictionary lookup.
+Decoding works on memoryviews, so received frames are not copied to slice off
+the header.
+"""
+
+from __future__ import annotations
+
+import re
+import struct
+from collections.abc import Iterable
+from enum import IntEnum
+from typing import Any
+
+from pychlorinator import halo_parsers
+
+FRAME_LENGTH = 20
+
+# Frame types
+COMMAND = 3
+READ_REQUEST = 2
+
+# Command ids
+CHLORINATOR_COMMAND = 500
+LIGHT_COMMAND = 501
+HEATER_COMMAND = 502
+SOLAR_COMMAND = 503
+GPO_COMMAND = 504
+
+# Frame type and command or characteristic id
+HEADER = struct.Struct("<BH")
+# Action and a one byte argument, the zone or GPO index where there is one
+ACTION = struct.Struct("<BHBB15x")
+# Action and a period in minutes, used by the chlorinator command
+PERIOD_ACTION = struct.Struct("<BHBi12x")
+# Characteristic to send back
+READ = struct.Struct("<BH17x")
+
+# Payload of a characteristic sent by the device
+PAYLOAD = slice(HEADER.size, FRAME_LENGTH)
+
+COMMAND_LAYOUTS: dict[int, struct.Struct] = {
+    CHLORINATOR_COMMAND: PERIOD_ACTION,
+    LIGHT_COMMAND: ACTION,
+    HEATER_COMMAND: ACTION,
+    SOLAR_COMMAND: ACTION,
+    GPO_COMMAND: ACTION,
+}
+
+# Characteristic ids and their parsers, as used by pychlorinator's gather
+CHARACTERISTIC_PARSERS: dict[int, type] = {
+    1: halo_parsers.DeviceProfileCharacteristic2,
+    9: halo_parsers.TempCharacteristic,
+    100: halo_parsers.SettingsCharacteristic2,
+    101: halo_parsers.WaterVolumeCharacteristic,
+    102: halo_parsers.SetPointCharacteristic,
+    104: halo_parsers.StateCharacteristic3,
+    105: halo_parsers.CapabilitiesCharacteristic2,
+    106: halo_parsers.MaintenanceStateCharacteristic,
+    201: halo_parsers.EquipmentModeCharacteristic,
+    202: halo_parsers.EquipmentParameterCharacteristic,
+    206: halo_parsers.EquipmentModeStateCharacteristicV2,
+    300: halo_parsers.LightStateCharacteristic,
+    301: halo_parsers.LightCapabilitiesCharacteristic,
+    302: halo_parsers.LightSetupCharacteristic,
+    600: halo_parsers.ProbeCharacteristic,
+    601: halo_parsers.CellCharacteristic2,
+    602: halo_parsers.PowerBoardCharacteristic,
+    1100: halo_parsers.HeaterCapabilitiesCharacteristic,
+    1101: halo_parsers.HeaterConfigCharacteristic,
+    1102: halo_parsers.HeaterStateCharacteristic,
+    1104: halo_parsers.HeaterCooldownStateCharacteristic,
+    1200: halo_parsers.SolarCapabilitiesCharacteristic,
+    1201: halo_parsers.SolarConfigCharacteristic,
+    1202: halo_parsers.SolarStateCharacteristic,
+    1300: halo_parsers.GPOSetupCharacteristic,
+    1301: halo_parsers.RelaySetupCharacteristic,
+    1302: halo_parsers.ValveSetupCharacteristic,
+}
+
+# Characteristics the device answers a read request of with one frame per
+# output, each decoding to the values of its own output
+INDEXED_CHARACTERISTICS = frozenset({1300, 1301, 1302})
+
+# Keys of the values the indexed characteristics decode to
+INDEXED_KEY = re.compile(
+    r"GPO\d+_(OutletEnabled|Function|Name|LightingZone|UseTimers)"
+    r"|Relay\d+_(Enabled|Action|Name|UseTimers)"
+    r"|Valve\d+_(Enabled|Name|UseTimers)"
+)
+
+
+class GPOAppActions(IntEnum):
+    """Actions that can be performed on GPO outputs."""
+
+    NoAction = 0
+    Off = 1
+    Auto = 2
+    On = 3
+
+
+def encode_action(command: int, action: int, argument: int = 0) -> bytes:
+    """Encode a command frame."""
+    return COMMAND_LAYOUTS[command].pack(COMMAND, command, action, argument)
+
+
+def decode_action(data: bytes | memoryview) -> tuple[int, int, int]:
+    """Decode a command frame into its command, action and argument."""
+    _, command = HEADER.unpack_from(data)
+    _, command, action, argument = COMMAND_LAYOUTS[command].unpack_from(data)
+    return command, action, argument
+
+
+def encode_read_request(characteristic: int) -> bytes:
+    """Encode the frame asking the device to send a characteristic."""
+    return READ.pack(READ_REQUEST, characteristic)
+
+
+def decode_header(data: bytes | memoryview) -> tuple[int, int]:
+    """Decode the frame type and the command or characteristic id."""
+    return HEADER.unpack_from(data)
+
+
+def decode_characteristic(data: bytes | memoryview) -> tuple[int, dict[str, Any]]:
+    """Decode a characteristic sent by the device into its id and values.
+
+    Raises KeyError for characteristics without a parser.
+    """
+    view = memoryview(data)
+    _, characteristic = HEADER.unpack_from(view)
+    parser = CHARACTERISTIC_PARSERS[characteristic]
+    return characteristic, vars(parser(view[PAYLOAD]))
+
+
+# State characteristics that confirm each command
+CONFIRM_CHARACTERISTICS: dict[int, tuple[int, ...]] = {
+    CHLORINATOR_COMMAND: (201, 202),
+    LIGHT_COMMAND: (300,),
+    HEATER_COMMAND: (1102,),
+    SOLAR_COMMAND: (1202,),
+    GPO_COMMAND: (201,),
+}
+
+
+def confirm_characteristics(frames: Iterable[bytes]) -> list[int]:
+    """Return the state characteristics that confirm the command frames."""
+    characteristics: list[int] = []
+    for frame in frames:
+        _, command = decode_header(frame)
+        for characteristic in CONFIRM_CHARACTERISTICS.get(command, ()):
+            if characteristic not in characteristics:
+                characteristics.append(characteristic)
+    return characteristics
+
+
+CHLORINATOR_FRAMES: dict[int, bytes] = {
+    action: encode_action(CHLORINATOR_COMMAND, action)
+    for action in halo_parsers.ChlorinatorActions
+}
+HEATER_FRAMES: dict[int, bytes] = {
+    action: encode_action(HEATER_COMMAND, action)
+    for action in halo_parsers.HeaterAppActions
+}
+SOLAR_FRAMES: dict[int, bytes] = {
+    action: encode_action(SOLAR_COMMAND, action)
+    for action in halo_parsers.SolarAppActions
+}
+# Keyed by action and zone number, 1 to 4
+LIGHT_FRAMES: dict[tuple[int, int], bytes] = {
+    (action, zone): encode_action(LIGHT_COMMAND, action, zone - 1)
+    for action in halo_parsers.LightAppActions
+    for zone in range(1, 5)
+}
+# Keyed by action and GPO number, 1 to 4
+GPO_FRAMES: dict[tuple[int, int], bytes] = {
+    (action, gpo_number): encode_action(GPO_COMMAND, action, gpo_number - 1)
+    for action in GPOAppActions
+    for gpo_number in range(1, 5)
+}
+READ_REQUESTS: dict[int, bytes] = {
+    characteristic: encode_read_request(characteristic)
+    for characteristic in CHARACTERISTIC_PARSERS
+}
@@ -3,41 +3,58 @@ from __future__ import annotations
 
 import asyncio
 import logging
+from collections.abc import Mapping
 from typing import Any
 
 from bluetooth_data_tools import human_readable_name
-from pychlorinator.halo_parsers import ScanResponse
 import voluptuous as vol
 
 from homeassistant import config_entries
 from homeassistant.components.bluetooth import (
+    BluetoothCallbackMatcher,
+    BluetoothChange,
     BluetoothScanningMode,
     BluetoothServiceInfoBleak,
     async_discovered_service_info,
+    async_last_service_info,
     async_process_advertisements,
+    async_register_callback,
 )
 from homeassistant.const import CONF_ACCESS_TOKEN, CONF_ADDRESS
+from homeassistant.core import callback
 from homeassistant.data_entry_flow import FlowResult
+from homeassistant.data_entry_flow import FlowResultType
 
-from .const import DOMAIN, LOCAL_NAMES
+from .const import DOMAIN
+from .discovery import AdvertisementCache
 
 _LOGGER = logging.getLogger(__name__)
 
 # number of seconds to wait for a device to be put in pairing mode
 WAIT_FOR_PAIRING_TIMEOUT = 20
+# number of seconds to wait for all devices to be put in pairing mode
+WAIT_FOR_BULK_PAIRING_TIMEOUT = 120
+
+HALO_NAME = "HCHLOR"
+
+# Source of the flows adding the other chlorinators paired in bulk
+SOURCE_BULK_PAIRED = "bulk_paired"
 
 
 class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     """Handle a config flow for Astral Chlorinator."""
 
-    VERSION = 1
+    VERSION = 2
 
     def __init__(self) -> None:
         """Initialize the config flow."""
         self._discovery_info: BluetoothServiceInfoBleak | None = None
         self._discovered_devices: dict[str, BluetoothServiceInfoBleak] = {}
         self._pairing_task: asyncio.Task | None = None
-        self._bytes_access_code: None
+        self._bytes_access_code: str | None = None
+        self._advertisements = AdvertisementCache()
+        self._bulk_access_codes: dict[str, str] = {}
+        self._reauth_entry: config_entries.ConfigEntry | None = None
 
     async def async_step_bluetooth(
         self, discovery_info: BluetoothServiceInfoBleak
@@ -51,7 +68,7 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                 None, discovery_info.name, discovery_info.address
             )
         }
-        if discovery_info.name == "HCHLOR":
+        if discovery_info.name == HALO_NAME:
             return await self.async_step_halo_bluetooth_confirm()
         return await self.async_step_user()
 
@@ -62,12 +79,11 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         assert self._discovery_info is not None
 
         if user_input is not None:
-            if getattr(self._discovery_info, "manufacturer_data", None) is not None:
-                # manufacturer_data exists - Appears to be a bleak bug that sometimes doesnt show manufacturer data
-                manufacturer_data = self._discovery_info.manufacturer_data[1095]
-                if not ScanResponse(manufacturer_data).isPairable:
-                    return await self.async_step_wait_for_pairing_mode()
-                # return self._discovery_info.name
+            # The scan response can be missing - Appears to be a bleak bug
+            # that sometimes doesnt show manufacturer data
+            scan_response = self._advertisements.async_parse(self._discovery_info)
+            if scan_response is not None and not scan_response.isPairable:
+                return await self.async_step_wait_for_pairing_mode()
 
         self._set_confirm_only()
         assert self._discovery_info.name
@@ -116,6 +132,9 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             self._discovery_info.address,
         )
 
+        if self._reauth_entry is not None:
+            return self._async_update_access_code(self._bytes_access_code)
+
         await self.async_set_unique_id(
             self._discovery_info.address, raise_on_progress=False
         )
@@ -134,11 +153,58 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     ) -> FlowResult:
         """Inform the user that the device never entered pairing mode."""
         if user_input is not None:
+            if self._discovery_info is None:
+                return await self.async_step_bulk_pairing()
             return await self.async_step_wait_for_pairing_mode()
 
         self._set_confirm_only()
         return self.async_show_form(step_id="pairing_timeout")
 
+    async def async_step_reauth(self, entry_data: Mapping[str, Any]) -> FlowResult:
+        """Handle an access code rejected by the chlorinator."""
+        self._reauth_entry = self.hass.config_entries.async_get_entry(
+            self.context["entry_id"]
+        )
+        self._discovery_info = async_last_service_info(
+            self.hass, entry_data[CONF_ADDRESS].upper(), True
+        )
+        return await self.async_step_reauth_confirm()
+
+    async def async_step_reauth_confirm(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Capture a new access code, from pairing mode on Halo chlorinators."""
+        assert self._reauth_entry is not None
+        if self._discovery_info is None:
+            return self.async_abort(reason="no_devices_found")
+
+        halo = self._discovery_info.name == HALO_NAME
+        if user_input is not None:
+            if halo:
+                return await self.async_step_wait_for_pairing_mode()
+            return self._async_update_access_code(user_input[CONF_ACCESS_TOKEN])
+
+        placeholders = {"name": self._reauth_entry.title}
+        if halo:
+            self._set_confirm_only()
+            return self.async_show_form(
+                step_id="reauth_confirm", description_placeholders=placeholders
+            )
+        return self.async_show_form(
+            step_id="reauth_confirm",
+            data_schema=vol.Schema({vol.Required(CONF_ACCESS_TOKEN): str}),
+            description_placeholders=placeholders,
+        )
+
+    @callback
+    def _async_update_access_code(self, access_code: str) -> FlowResult:
+        """Store the new access code of the reauthed entry and reload it."""
+        assert self._reauth_entry is not None
+        return self.async_update_reload_and_abort(
+            self._reauth_entry,
+            data={**self._reauth_entry.data, CONF_ACCESS_TOKEN: access_code},
+        )
+
     async def _async_wait_for_pairing_mode(self) -> None:
         """Process advertisements until pairing mode is detected."""
         assert self._discovery_info
@@ -147,10 +213,13 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         def is_device_in_pairing_mode(
             service_info: BluetoothServiceInfoBleak,
         ) -> bool:
-            manufacturer_data = service_info.manufacturer_data[1095]
-            self._bytes_access_code = ScanResponse(manufacturer_data).get_access_code()
+            # Repeated adverts with an unchanged payload are skipped unparsed
+            scan_response = self._advertisements.async_parse_changed(service_info)
+            if scan_response is None or not scan_response.isPairable:
+                return False
+            self._bytes_access_code = scan_response.get_access_code()
             _LOGGER.info("Access Code %s", self._bytes_access_code)
-            return ScanResponse(manufacturer_data).isPairable
+            return True
 
         await async_process_advertisements(
             self.hass,
@@ -160,12 +229,182 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             WAIT_FOR_PAIRING_TIMEOUT,
         )
 
+    async def async_step_bulk_pairing(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Wait for every discovered Halo chlorinator to enter pairing mode."""
+        if not self._pairing_task:
+            self._bulk_access_codes = {}
+            self._pairing_task = self.hass.async_create_task(
+                self._async_wait_for_bulk_pairing()
+            )
+
+        if not self._pairing_task.done():
+            return self.async_show_progress(
+                step_id="bulk_pairing",
+                progress_action="bulk_pairing",
+                progress_task=self._pairing_task,
+            )
+
+        try:
+            await self._pairing_task
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            self._pairing_task = None
+
+        if not self._bulk_access_codes:
+            return self.async_show_progress_done(next_step_id="pairing_timeout")
+        return self.async_show_progress_done(next_step_id="bulk_pairing_complete")
+
+    async def async_step_bulk_pairing_complete(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Create configuration entries for all devices that entered pairing mode."""
+        _LOGGER.info(
+            "Bulk pair complete - %d device(s): %s",
+            len(self._bulk_access_codes),
+            ", ".join(self._bulk_access_codes),
+        )
+        paired = [
+            {
+                CONF_ADDRESS: address,
+                CONF_ACCESS_TOKEN: access_code,
+                "name": self._bulk_title(address),
+            }
+            for address, access_code in self._bulk_access_codes.items()
+        ]
+        # This flow creates the first entry, the others go through flows of
+        # their own, which are waited for so their outcome can be reported
+        results = await asyncio.gather(
+            *(
+                self.hass.config_entries.flow.async_init(
+                    DOMAIN, context={"source": SOURCE_BULK_PAIRED}, data=data
+                )
+                for data in paired[1:]
+            ),
+            return_exceptions=True,
+        )
+        added = [paired[0]["name"]]
+        not_added = []
+        for data, result in zip(paired[1:], results):
+            if isinstance(result, Exception):
+                _LOGGER.error("Failed to add %s: %s", data["name"], result)
+                not_added.append(data["name"])
+            elif result["type"] is not FlowResultType.CREATE_ENTRY:
+                _LOGGER.warning("Not adding %s: %s", data["name"], result["reason"])
+                not_added.append(data["name"])
+            else:
+                added.append(data["name"])
+
+        await self.async_set_unique_id(
+            paired[0][CONF_ADDRESS], raise_on_progress=False
+        )
+        self._abort_if_unique_id_configured()
+        return self.async_create_entry(
+            title=paired[0]["name"],
+            data={
+                CONF_ADDRESS: paired[0][CONF_ADDRESS],
+                CONF_ACCESS_TOKEN: paired[0][CONF_ACCESS_TOKEN],
+            },
+            description="bulk_paired_partly" if not_added else "bulk_paired",
+            description_placeholders={
+                "added": ", ".join(added),
+                "not_added": ", ".join(not_added),
+            },
+        )
+
+    async def async_step_bulk_paired(self, paired: dict[str, Any]) -> FlowResult:
+        """Create a configuration entry for another device paired in bulk."""
+        await self.async_set_unique_id(paired[CONF_ADDRESS], raise_on_progress=False)
+        self._abort_if_unique_id_configured()
+        return self.async_create_entry(
+            title=paired["name"],
+            data={
+                CONF_ADDRESS: paired[CONF_ADDRESS],
+                CONF_ACCESS_TOKEN: paired[CONF_ACCESS_TOKEN],
+            },
+        )
+
+    def _bulk_title(self, address: str) -> str:
+        """Return the title of the entry of a device paired in bulk."""
+        service_info = self._discovered_devices.get(address)
+        name = service_info.name if service_info is not None else HALO_NAME
+        return human_readable_name(None, name, address)
+
+    async def _async_wait_for_bulk_pairing(self) -> None:
+        """Capture access codes from all candidates as they enter pairing mode."""
+        waiting = {
+            address
+            for address, service_info in self._discovered_devices.items()
+            if service_info.name == HALO_NAME
+        }
+        _LOGGER.info("_async_wait_for_bulk_pairing: %s", ", ".join(waiting))
+        all_paired = asyncio.Event()
+
+        @callback
+        def _async_check_pairing_mode(
+            service_info: BluetoothServiceInfoBleak, change: BluetoothChange
+        ) -> None:
+            if service_info.address not in waiting:
+                return
+            scan_response = self._advertisements.async_parse_changed(service_info)
+            if scan_response is None or not scan_response.isPairable:
+                return
+            self._bulk_access_codes[service_info.address] = (
+                scan_response.get_access_code()
+            )
+            _LOGGER.info("Access Code captured for %s", service_info.address)
+            waiting.discard(service_info.address)
+            if not waiting:
+                all_paired.set()
+
+        cancel = async_register_callback(
+            self.hass,
+            _async_check_pairing_mode,
+            BluetoothCallbackMatcher(local_name=HALO_NAME),
+            BluetoothScanningMode.ACTIVE,
+        )
+        try:
+            async with asyncio.timeout(WAIT_FOR_BULK_PAIRING_TIMEOUT):
+                await all_paired.wait()
+        finally:
+            cancel()
+
     """ Below is EQ """
 
     async def async_step_user(
         self, user_input: dict[str, Any] | None = None
     ) -> FlowResult:
-        """Handle the user step to pick discovered device."""
+        """Handle the user step, offering bulk pairing for multi-device sites."""
+        if user_input is None and self._discovery_info is None:
+            self._async_add_candidates()
+            halo_devices = [
+                service_info
+                for service_info in self._discovered_devices.values()
+                if service_info.name == HALO_NAME
+            ]
+            if len(halo_devices) > 1:
+                return self.async_show_menu(
+                    step_id="user", menu_options=["pick_device", "bulk_pairing"]
+                )
+        return await self.async_step_pick_device(user_input)
+
+    @callback
+    def _async_add_candidates(self) -> None:
+        """Index the unconfigured chlorinators once per flow."""
+        if self._discovered_devices:
+            return
+        self._advertisements.async_add_candidates(
+            async_discovered_service_info(self.hass),
+            self._async_current_ids(),
+        )
+        self._discovered_devices = self._advertisements.candidates
+
+    async def async_step_pick_device(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Handle the step to pick discovered device."""
         errors: dict[str, str] = {}
         if user_input is not None:
             address = user_input[CONF_ADDRESS]
@@ -187,18 +426,7 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         if discovery := self._discovery_info:
             self._discovered_devices[discovery.address] = discovery
         else:
-            current_addresses = self._async_current_ids()
-            for discovery in async_discovered_service_info(self.hass):
-                if (
-                    discovery.address in current_addresses
-                    or discovery.address in self._discovered_devices
-                    or not any(
-                        discovery.name.startswith(local_name)
-                        for local_name in LOCAL_NAMES
-                    )
-                ):
-                    continue
-                self._discovered_devices[discovery.address] = discovery
+            self._async_add_candidates()
 
         if not self._discovered_devices:
             return self.async_abort(reason="no_unconfigured_devices")
@@ -215,7 +443,7 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             }
         )
         return self.async_show_form(
-            step_id="user",
+            step_id="pick_device",
             data_schema=data_schema,
             errors=errors,
         )
@@ -0,0 +1,140 @@
+"""Shared connection path to a chlorinator.
+
+Every session connects through bleak_retry_connector's establish_connection,
+so connects are retried with backoff and the GATT services discovered on
+the first connection are reused afterwards. Connect times are recorded
+separately for connects that used cached services and those that did not,
+to show what the cache saves. A connect that runs over
+its deadline is cancelled, so the router can fail over to the next route.
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any
+
+from bleak.backends.device import BLEDevice
+from bleak_retry_connector import BleakClientWithServiceCache
+from bleak_retry_connector import establish_connection
+
+from .routing import ConnectionRouter
+from .trace import ProtocolTrace
+from .watchdog import CONNECT
+from .watchdog import Watchdog
+
+_LOGGER = logging.getLogger(__name__)
+
+# Attempts per adapter or proxy, the router fails over to the next one after
+CONNECT_ATTEMPTS = 2
+
+
+@dataclass
+class ConnectionStats:
+    """Connect counts and times, split by service cache hits and misses."""
+
+    hits: int = 0
+    misses: int = 0
+    failures: int = 0
+    hit_seconds: float = 0.0
+    miss_seconds: float = 0.0
+
+    def record(self, hit: bool, seconds: float) -> None:
+        """Record a successful connect."""
+        if hit:
+            self.hits += 1
+            self.hit_seconds += seconds
+        else:
+            self.misses += 1
+            self.miss_seconds += seconds
+
+    @property
+    def saved_seconds(self) -> float | None:
+        """Return the connect time saved by the cache, None until measurable."""
+        if not self.hits or not self.misses:
+            return None
+        return self.hits * (
+            self.miss_seconds / self.misses - self.hit_seconds / self.hits
+        )
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the stats for diagnostics."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "failures": self.failures,
+            "hit_seconds": round(self.hit_seconds, 3),
+            "miss_seconds": round(self.miss_seconds, 3),
+            "saved_seconds": self.saved_seconds,
+        }
+
+
+class CacheTrackingClient(BleakClientWithServiceCache):
+    """A client that records whether it connected with cached services."""
+
+    used_cached_services = False
+
+    async def connect(self, **kwargs: Any) -> None:
+        """Connect, recording if the retry connector allowed cached services.
+
+        It only does so when the services cached for the device are still
+        valid, and asks each attempt again, so the last one is recorded.
+        """
+        self.used_cached_services = bool(kwargs.get("dangerous_use_bleak_cache"))
+        await super().connect(**kwargs)
+
+
+class ChlorinatorConnector:
+    """Connect to a chlorinator through the best route, reusing services."""
+
+    def __init__(self, chlorinator: Any, router: ConnectionRouter | None = None):
+        """Initialise the connector."""
+        self.chlorinator = chlorinator
+        self.router = router
+        self.stats = ConnectionStats()
+        self.trace = ProtocolTrace()
+        self.watchdog = Watchdog()
+        # Sessions waiting for the library to release the connection
+        self.waiting = 0
+
+    async def async_connect(self) -> CacheTrackingClient:
+        """Return a connected client, failing over between routes."""
+        if self.router is None:
+            return await self._async_connect_device(self.chlorinator._ble_device)
+        return await self.router.async_connect(self._async_connect_device)
+
+    async def _async_connect_device(self, device: BLEDevice) -> CacheTrackingClient:
+        """Connect to the chlorinator through one adapter or proxy."""
+        start = time.monotonic()
+        try:
+            async with self.watchdog.phase(CONNECT):
+                client = await establish_connection(
+                    CacheTrackingClient,
+                    device,
+                    device.name or device.address,
+                    max_attempts=CONNECT_ATTEMPTS,
+                )
+        except Exception:
+            self.stats.failures += 1
+            raise
+        seconds = time.monotonic() - start
+        hit = client.used_cached_services
+        self.stats.record(hit, seconds)
+        _LOGGER.debug(
+            "Connected to %s in %.2fs, service cache %s",
+            device.address,
+            seconds,
+            "hit" if hit else "miss",
+        )
+        # Later library calls connect through the same route
+        self.chlorinator._ble_device = device
+        return client
+
+
+def get_connector(chlorinator: Any) -> ChlorinatorConnector:
+    """Return the connector of a chlorinator, adding one if it has none."""
+    connector: ChlorinatorConnector | None = getattr(chlorinator, "connector", None)
+    if connector is None:
+        connector = chlorinator.connector = ChlorinatorConnector(chlorinator)
+    return connector
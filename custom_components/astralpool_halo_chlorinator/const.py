@@ -3,3 +3,6 @@
 DOMAIN = "astralpool_halo_chlorinator"
 
 LOCAL_NAMES = {"HCHLOR"}
+
+# Manufacturer id used in the chlorinator advertisement data
+MANUFACTURER_ID = 1095
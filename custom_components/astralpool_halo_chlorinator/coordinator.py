@@ -1,114 +1,355 @@
 """Data coordinator for receiving Chlorinator updates."""
 
+import asyncio
 import logging
 from datetime import timedelta
+from pathlib import Path
 from typing import Any
 
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import callback
 from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import ConfigEntryAuthFailed
+from homeassistant.helpers import device_registry as dr
 from homeassistant.helpers.entity import DeviceInfo
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
 from homeassistant.helpers.update_coordinator import UpdateFailed
+from homeassistant.util import dt as dt_util
+from homeassistant.util import slugify
 from pychlorinator.halochlorinator import HaloChlorinatorAPI
 
 from .const import DOMAIN
+from .engine import AuthenticationRejected
+from .engine import BleakDevice
+from .engine import ChlorinatorEngine
+from .events import EVENT_TYPE
+from .events import TransitionDetector
+from .gather import GatherResult
+from .history import HistoryWriter
+from .last_state import LastState
+from .statistics import DailyStatisticsImporter
 
 _LOGGER = logging.getLogger(__name__)
 
 
+def entity_unique_id(address: str, key: str) -> str:
+    """Return the unique id of an entity of the chlorinator at address."""
+    return f"{address}_{key}".lower()
+
+
 class ChlorinatorDataUpdateCoordinator(DataUpdateCoordinator[dict[str, Any]]):
     """Data coordinator for getting Chlorinator updates."""
 
-    def __init__(self, hass: HomeAssistant, chlorinator: HaloChlorinatorAPI) -> None:
-        """Initialise the coordinator."""
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        chlorinator: HaloChlorinatorAPI,
+        config_entry: ConfigEntry | None = None,
+        last_state: LastState | None = None,
+    ) -> None:
+        """Initialise the coordinator, for config_entry if given."""
         super().__init__(
             hass,
             _LOGGER,
             name=DOMAIN,
             update_interval=timedelta(seconds=20),
         )
+        if config_entry is not None and config_entry is not self.config_entry:
+            # Tied to the entry for reauth, and to shut down on unload
+            self.config_entry = config_entry
+            config_entry.async_on_unload(self.async_shutdown)
         self._data_age = 0
         self.data = {}
         self.chlorinator = chlorinator
+        # The entities and the device are keyed by the address, so several
+        # chlorinators can be set up side by side
+        self.address = (
+            self.config_entry.unique_id
+            if self.config_entry is not None and self.config_entry.unique_id
+            else chlorinator._ble_device.address
+        ).upper()
         self.device_info = DeviceInfo(
-            identifiers={(DOMAIN, "1234")},
+            identifiers={(DOMAIN, self.address)},
             manufacturer="Astral Pool",
+            model="Halo Chlor",
             name="HCHLOR",
         )
         self.added_entities = set()
         self.add_sensor_callback = None
         self.add_binary_sensor_callback = None
         self.add_dynamic_select_entities = None
+        self._statistics = DailyStatisticsImporter(hass, self.address)
+        self.engine = ChlorinatorEngine(BleakDevice(chlorinator))
+        self._transitions = TransitionDetector()
+        self.gather_failures = 0
+        self.last_update_timestamp: float | None = None
+        self._live_task: asyncio.Task | None = None
+        self.history = HistoryWriter(
+            Path(hass.config.path(DOMAIN, slugify(self.address)))
+        )
+        self.last_state = last_state or LastState(hass, self.address)
+        # Restored data is older than any transition the next gather sees
+        self._restored = False
+
+    @property
+    def last_gather(self) -> GatherResult | None:
+        """Return the result of the last tiered gather."""
+        return self.engine.last_gather
+
+    @property
+    def live(self) -> bool:
+        """Return True while live mode reads the chemistry."""
+        return self._live_task is not None
+
+    @property
+    def lighting_zones(self) -> range:
+        """Return the lighting zones in use, at least zone 1."""
+        zones = self.data.get("NumZonesInUse") or 1
+        return range(1, min(zones, 4) + 1)
+
+    def unique_id(self, key: str) -> str:
+        """Return the unique id of one of the entities of this chlorinator."""
+        return entity_unique_id(self.address, key)
+
+    @callback
+    def async_restore(self, data: dict[str, Any]) -> None:
+        """Show the data gathered before a restart until the next gather."""
+        if data and not self.data:
+            self.data = data
+            self._restored = True
 
     def reset_data_age(self):
         """Resets the data age to 3 to make sure async_gatherdata is executed."""
         self._data_age = 3
 
+    async def async_confirm_write(self, data: dict[str, Any]) -> None:
+        """Merge state read back after a write, or refresh if there is none."""
+        if data:
+            self.engine.merge(data)
+            merged = {**self.data, **data}
+            self._async_fire_transitions(self.data, merged)
+            self.async_set_updated_data(merged)
+            return
+        self.reset_data_age()
+        await asyncio.sleep(1)
+        await self.async_request_refresh()
+
+    async def async_write_lighting(self, frames: list[bytes]) -> None:
+        """Write lighting frames in one session and read back only the lighting.
+
+        Every zone is set over the same connection, then the lighting
+        characteristics are read before disconnecting and merged into the data.
+        """
+        data = await self.engine.async_write(frames, groups=["lighting"])
+        await self.async_confirm_write(data)
+
+    @callback
+    def async_start_live(self, duration: float, interval: float) -> None:
+        """Read the chemistry every interval seconds, for duration seconds.
+
+        Regular polling is paused meanwhile and resumes once live mode ends. A
+        live mode that is already running is replaced.
+        """
+        self.async_stop_live()
+        self._live_task = self.hass.async_create_background_task(
+            self._async_live(duration, interval), f"{DOMAIN} live mode"
+        )
+
+    @callback
+    def async_stop_live(self) -> None:
+        """Stop live mode, if it runs."""
+        if self._live_task is not None:
+            self._live_task.cancel()
+            self._live_task = None
+
+    async def _async_live(self, duration: float, interval: float) -> None:
+        """Run live mode, then resume regular polling."""
+        task = asyncio.current_task()
+        _LOGGER.info("Live mode for %ss, reading every %ss", duration, interval)
+        try:
+            reads = await self.engine.async_live(
+                interval, duration, self._async_set_live_data
+            )
+            _LOGGER.info("Live mode finished after %d reads", reads)
+        except Exception as e:
+            _LOGGER.warning("Live mode stopped: %s", e)
+        finally:
+            if self._live_task is task:
+                self._live_task = None
+        self.reset_data_age()
+        await self.async_request_refresh()
+
+    @callback
+    def _async_set_live_data(self, data: dict[str, Any]) -> None:
+        """Update the listeners with a live read."""
+        if not self._restored:
+            self._async_fire_transitions(self.data, data)
+        self._restored = False
+        self.last_update_timestamp = dt_util.utcnow().timestamp()
+        self._async_record_history(data)
+        self.async_set_updated_data(data)
+
+    @callback
+    def _async_record_history(self, data: dict[str, Any]) -> None:
+        """Buffer a gather for the history files, flushing when due."""
+        if self.history.append(dt_util.utcnow(), data):
+            self.hass.async_create_background_task(
+                self.async_flush_history(), f"{DOMAIN} history flush"
+            )
+
+    async def async_flush_history(self) -> None:
+        """Append the buffered gathers to the history files."""
+        try:
+            await self.hass.async_add_executor_job(self.history.flush)
+        except OSError as e:
+            _LOGGER.warning("Failed to write the telemetry history: %s", e)
+
+    @callback
+    def async_clear_platforms(self) -> None:
+        """Forget the entity adders of the platforms and what they added.
+
+        Called once the platforms are unloaded, so nothing keeps them alive
+        and a reload adds every entity again.
+        """
+        self.add_sensor_callback = None
+        self.add_binary_sensor_callback = None
+        self.add_dynamic_select_entities = None
+        self.added_entities.clear()
+
+    async def async_shutdown(self) -> None:
+        """Stop live mode and the scheduled updates, and write what is pending.
+
+        Saving the running totals also cancels their delayed save, which would
+        keep the coordinator alive after an unload until then.
+        """
+        self.async_stop_live()
+        await super().async_shutdown()
+        await self.async_flush_history()
+        await self._statistics.async_save()
+        await self.last_state.async_flush()
+
+    @callback
+    def _async_fire_transitions(self, old: dict[str, Any], new: dict[str, Any]) -> None:
+        """Fire an event for each transition between two states."""
+        transitions = self._transitions.detect(old, new)
+        if not transitions:
+            return
+        entry_id = self.config_entry.entry_id if self.config_entry else None
+        devices = (
+            dr.async_entries_for_config_entry(dr.async_get(self.hass), entry_id)
+            if entry_id
+            else []
+        )
+        for transition in transitions:
+            _LOGGER.debug("Transition %s", transition)
+            self.hass.bus.async_fire(
+                EVENT_TYPE,
+                {
+                    "device_id": devices[0].id if devices else None,
+                    "entry_id": entry_id,
+                    **transition,
+                },
+            )
+
+    async def async_add_capability_entities(self, data: dict[str, Any]) -> None:
+        """Add the entities of the capabilities the data reports."""
+        if "SolarEnabled" in data and data["SolarEnabled"] == 1:
+            _LOGGER.debug("SolarEnabled : %s", data["SolarEnabled"])
+            if self.add_sensor_callback is not None:
+                await self.add_sensor_callback("SolarEnabled")
+            if self.add_binary_sensor_callback is not None:
+                await self.add_binary_sensor_callback("SolarEnabled")
+            if self.add_dynamic_select_entities is not None:
+                await self.add_dynamic_select_entities("SolarEnabled")
+
+        if "HeaterEnabled" in data and data["HeaterEnabled"] == 1:
+            _LOGGER.debug("HeaterEnabled : %s", data["HeaterEnabled"])
+            if self.add_sensor_callback is not None:
+                await self.add_sensor_callback("HeaterEnabled")
+            if self.add_binary_sensor_callback is not None:
+                await self.add_binary_sensor_callback("HeaterEnabled")
+            if self.add_dynamic_select_entities is not None:
+                await self.add_dynamic_select_entities("HeaterEnabled")
+
+        if "PoolSpaEnabled" in data and data["PoolSpaEnabled"] == 1:
+            _LOGGER.debug("PoolSpaEnabled : %s", data["PoolSpaEnabled"])
+
+        if "LightingEnabled" in data and data["LightingEnabled"] == 1:
+            _LOGGER.debug("LightingEnabled : %s", data["LightingEnabled"])
+            _LOGGER.debug("NumZonesInUse : %s", data["NumZonesInUse"])
+            if self.add_dynamic_select_entities is not None:
+                await self.add_dynamic_select_entities("LightingEnabled")
+
+        # Check for GPO outputs that are enabled
+        for gpo_num in range(1, 5):  # GPO1 to GPO4
+            gpo_outlet_key = f"GPO{gpo_num}_OutletEnabled"
+            gpo_mode_key = f"GPO{gpo_num}_Mode"
+            if gpo_outlet_key in data and data[gpo_outlet_key] == 1:
+                _LOGGER.debug("%s : %s", gpo_outlet_key, data[gpo_outlet_key])
+                if self.add_sensor_callback is not None:
+                    await self.add_sensor_callback(f"GPO{gpo_num}Enabled")
+                if self.add_binary_sensor_callback is not None:
+                    await self.add_binary_sensor_callback(f"GPO{gpo_num}Enabled")
+                if self.add_dynamic_select_entities is not None:
+                    await self.add_dynamic_select_entities(f"GPO{gpo_num}Enabled")
+            # Also expose GPO mode even if we haven't seen OutletEnabled yet
+            elif gpo_mode_key in data:
+                _LOGGER.debug("%s : %s", gpo_mode_key, data[gpo_mode_key])
+                if self.add_sensor_callback is not None:
+                    await self.add_sensor_callback(f"GPO{gpo_num}Enabled")
+                if self.add_binary_sensor_callback is not None:
+                    await self.add_binary_sensor_callback(f"GPO{gpo_num}Enabled")
+                if self.add_dynamic_select_entities is not None:
+                    await self.add_dynamic_select_entities(f"GPO{gpo_num}Enabled")
+
     async def _async_update_data(self):
         """Fetch data from API endpoint."""
+        if self.live:
+            # Live mode reads the chemistry, everything else waits for it
+            return self.data
         self._data_age += 1
         _LOGGER.debug("_data_age: %s", self._data_age)
         if self._data_age >= 3:  # 3 polling events = 60 seconds
             try:
-                data = await self.chlorinator.async_gatherdata()
-                _LOGGER.debug("halo_ble_client finish: %s", dict(sorted(data.items())))
+                data = await self.engine.async_poll(dt_util.utcnow())
+                if _LOGGER.isEnabledFor(logging.DEBUG):
+                    _LOGGER.debug(
+                        "halo_ble_client finish: %s", dict(sorted(data.items()))
+                    )
+            except AuthenticationRejected as e:
+                # Retrying cannot help, stop polling until the entry is reauthed
+                self.data = {}
+                self.engine.invalidate()
+                _LOGGER.error("Access code rejected, stopping updates: %s", e)
+                raise ConfigEntryAuthFailed("Access code rejected") from e
             except Exception as e:
                 _LOGGER.warning("Failed _gatherdata: %s %s", self._data_age, e)
                 data = {}
+            if not data:
+                # Counted for the metrics, the update only fails after 15
+                self.gather_failures += 1
             if data != {}:
+                if not self._restored:
+                    self._async_fire_transitions(self.data, data)
+                self._restored = False
                 self.data = data
                 self._data_age = 0
+                self.last_update_timestamp = dt_util.utcnow().timestamp()
+
+                self._async_record_history(data)
+                try:
+                    await self._statistics.async_load()
+                    self._statistics.collect(data)
+                    await self._statistics.async_flush()
+                except Exception as e:
+                    _LOGGER.warning("Failed to import daily statistics: %s", e)
 
-                if "SolarEnabled" in data and data["SolarEnabled"] == 1:
-                    _LOGGER.debug("SolarEnabled : %s", data["SolarEnabled"])
-                    if hasattr(self, "add_sensor_callback"):
-                        await self.add_sensor_callback("SolarEnabled")
-                    if hasattr(self, "add_binary_sensor_callback"):
-                        await self.add_binary_sensor_callback("SolarEnabled")
-                    if hasattr(self, "add_dynamic_select_entities"):
-                        await self.add_dynamic_select_entities("SolarEnabled")
-
-                if "HeaterEnabled" in data and data["HeaterEnabled"] == 1:
-                    _LOGGER.debug("HeaterEnabled : %s", data["HeaterEnabled"])
-                    if hasattr(self, "add_sensor_callback"):
-                        await self.add_sensor_callback("HeaterEnabled")
-                    if hasattr(self, "add_binary_sensor_callback"):
-                        await self.add_binary_sensor_callback("HeaterEnabled")
-                    if hasattr(self, "add_dynamic_select_entities"):
-                        await self.add_dynamic_select_entities("HeaterEnabled")
-
-                if "PoolSpaEnabled" in data and data["PoolSpaEnabled"] == 1:
-                    _LOGGER.debug("PoolSpaEnabled : %s", data["PoolSpaEnabled"])
-
-                if "LightingEnabled" in data and data["LightingEnabled"] == 1:
-                    _LOGGER.debug("LightingEnabled : %s", data["LightingEnabled"])
-                    _LOGGER.debug("NumZonesInUse : %s", data["NumZonesInUse"])
-                    if hasattr(self, "add_dynamic_select_entities"):
-                        await self.add_dynamic_select_entities("LightingEnabled")
-
-                # Check for GPO outputs that are enabled
-                for gpo_num in range(1, 5):  # GPO1 to GPO4
-                    gpo_outlet_key = f"GPO{gpo_num}_OutletEnabled"
-                    gpo_mode_key = f"GPO{gpo_num}_Mode"
-                    if gpo_outlet_key in data and data[gpo_outlet_key] == 1:
-                        _LOGGER.debug("%s : %s", gpo_outlet_key, data[gpo_outlet_key])
-                        if hasattr(self, "add_sensor_callback"):
-                            await self.add_sensor_callback(f"GPO{gpo_num}Enabled")
-                        if hasattr(self, "add_dynamic_select_entities"):
-                            await self.add_dynamic_select_entities(
-                                f"GPO{gpo_num}Enabled"
-                            )
-                    # Also expose GPO mode even if we haven't seen OutletEnabled yet
-                    elif gpo_mode_key in data:
-                        _LOGGER.debug("%s : %s", gpo_mode_key, data[gpo_mode_key])
-                        if hasattr(self, "add_sensor_callback"):
-                            await self.add_sensor_callback(f"GPO{gpo_num}Enabled")
-                        if hasattr(self, "add_dynamic_select_entities"):
-                            await self.add_dynamic_select_entities(
-                                f"GPO{gpo_num}Enabled"
-                            )
+                self.last_state.async_save(self.chlorinator._ble_device.name, data)
+                await self.async_add_capability_entities(data)
 
             elif self._data_age >= 15:  # 15 polling events  = 5 minutes
                 self.data = {}
+                self.engine.invalidate()
                 _LOGGER.error("Failed _gatherdata, giving up: %s", self._data_age)
                 raise UpdateFailed("Error communicating with API")
 
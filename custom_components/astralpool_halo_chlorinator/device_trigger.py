@@ -0,0 +1,128 @@
+"""Device triggers for the Astral Pool Halo Chlorinator integration."""
+
+from __future__ import annotations
+
+from typing import Any
+
+import voluptuous as vol
+from homeassistant.components.device_automation import DEVICE_TRIGGER_BASE_SCHEMA
+from homeassistant.components.homeassistant.triggers import event as event_trigger
+from homeassistant.const import CONF_DEVICE_ID
+from homeassistant.const import CONF_DOMAIN
+from homeassistant.const import CONF_PLATFORM
+from homeassistant.const import CONF_TYPE
+from homeassistant.core import CALLBACK_TYPE
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import device_registry as dr
+from homeassistant.helpers.trigger import TriggerActionType
+from homeassistant.helpers.trigger import TriggerInfo
+from homeassistant.helpers.typing import ConfigType
+
+from .const import DOMAIN
+from .events import EVENT_TYPE
+from .events import GPO_MODE_CHANGED
+from .events import GPO_SUBTYPES
+from .events import HEATER_OFF
+from .events import HEATER_ON
+from .events import PH_HIGH
+from .events import PH_LOW
+from .events import PH_NORMAL
+from .events import PUMP_STARTED
+from .events import PUMP_STOPPED
+from .events import SOLAR_ACTIVE
+from .events import SOLAR_INACTIVE
+from .events import TRANSITION_TYPES
+
+CONF_SUBTYPE = "subtype"
+
+TRIGGER_SCHEMA = DEVICE_TRIGGER_BASE_SCHEMA.extend(
+    {
+        vol.Required(CONF_TYPE): vol.In(TRANSITION_TYPES),
+        vol.Optional(CONF_SUBTYPE): vol.In(GPO_SUBTYPES),
+    }
+)
+
+# Triggers offered for a device, and the capability key that enables them
+TRIGGER_CAPABILITIES: dict[str, tuple[str, ...]] = {
+    "pump_is_operating": (PUMP_STARTED, PUMP_STOPPED),
+    "HeaterEnabled": (HEATER_ON, HEATER_OFF),
+    "SolarEnabled": (SOLAR_ACTIVE, SOLAR_INACTIVE),
+    "ph_measurement": (PH_HIGH, PH_LOW, PH_NORMAL),
+}
+
+
+def _entries_data(hass: HomeAssistant, device_id: str) -> list[dict[str, Any]]:
+    """Return the gathered data of each chlorinator entry of a device."""
+    device = dr.async_get(hass).async_get(device_id)
+    if device is None:
+        return []
+    return [
+        entry_data.coordinator.data or {}
+        for entry_id in device.config_entries
+        if (entry_data := hass.data.get(DOMAIN, {}).get(entry_id))
+    ]
+
+
+def _trigger_types(data: dict[str, Any]) -> list[tuple[str, str | None]]:
+    """Return the trigger types and subtypes the data of an entry supports."""
+    trigger_types: list[tuple[str, str | None]] = []
+    for key, types in TRIGGER_CAPABILITIES.items():
+        if key not in data or (key.endswith("Enabled") and data[key] != 1):
+            continue
+        trigger_types.extend((t, None) for t in types)
+    for subtype, gpo_num in GPO_SUBTYPES.items():
+        if f"GPO{gpo_num}_Mode" in data:
+            trigger_types.append((GPO_MODE_CHANGED, subtype))
+    return trigger_types
+
+
+async def async_get_triggers(
+    hass: HomeAssistant, device_id: str
+) -> list[dict[str, str]]:
+    """List the device triggers for a chlorinator.
+
+    Each entry of the device offers the triggers its own data supports.
+    """
+    base = {
+        CONF_PLATFORM: "device",
+        CONF_DOMAIN: DOMAIN,
+        CONF_DEVICE_ID: device_id,
+    }
+    # Keyed to drop the triggers more than one entry offers, in order
+    trigger_types = {
+        trigger_type: None
+        for data in _entries_data(hass, device_id)
+        for trigger_type in _trigger_types(data)
+    }
+    triggers = []
+    for trigger_type, subtype in trigger_types:
+        trigger = {**base, CONF_TYPE: trigger_type}
+        if subtype is not None:
+            trigger[CONF_SUBTYPE] = subtype
+        triggers.append(trigger)
+    return triggers
+
+
+async def async_attach_trigger(
+    hass: HomeAssistant,
+    config: ConfigType,
+    action: TriggerActionType,
+    trigger_info: TriggerInfo,
+) -> CALLBACK_TYPE:
+    """Attach a trigger to the chlorinator transition events."""
+    event_data = {
+        CONF_DEVICE_ID: config[CONF_DEVICE_ID],
+        CONF_TYPE: config[CONF_TYPE],
+    }
+    if CONF_SUBTYPE in config:
+        event_data[CONF_SUBTYPE] = config[CONF_SUBTYPE]
+    event_config = event_trigger.TRIGGER_SCHEMA(
+        {
+            event_trigger.CONF_PLATFORM: "event",
+            event_trigger.CONF_EVENT_TYPE: EVENT_TYPE,
+            event_trigger.CONF_EVENT_DATA: event_data,
+        }
+    )
+    return await event_trigger.async_attach_trigger(
+        hass, event_config, action, trigger_info, platform_type="device"
+    )
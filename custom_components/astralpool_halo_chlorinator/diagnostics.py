@@ -0,0 +1,47 @@
+"""Diagnostics support for the Astral Pool Halo Chlorinator integration."""
+
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_ACCESS_TOKEN
+from homeassistant.core import HomeAssistant
+
+from .connector import get_connector
+from .const import DOMAIN
+from .models import ChlorinatorData
+
+TO_REDACT = {CONF_ACCESS_TOKEN, "SerialNumber"}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    data: ChlorinatorData = hass.data[DOMAIN][entry.entry_id]
+    connector = get_connector(data.device)
+    last_gather = data.coordinator.last_gather
+    return {
+        "entry": async_redact_data(entry.as_dict(), TO_REDACT),
+        "data": async_redact_data(
+            {
+                key: getattr(value, "name", value)
+                for key, value in sorted(data.coordinator.data.items())
+            },
+            TO_REDACT,
+        ),
+        "connection": connector.stats.as_dict(),
+        "last_gather": (
+            None
+            if last_gather is None
+            else {
+                "seconds": last_gather.seconds,
+                "latency": last_gather.latency,
+                "missing": last_gather.missing,
+            }
+        ),
+        "trace": connector.trace.dump(),
+        "watchdog": connector.watchdog.as_dict(),
+    }
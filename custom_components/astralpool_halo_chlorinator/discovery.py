@@ -0,0 +1,96 @@
+"""Advertisement parsing and candidate tracking for chlorinator discovery."""
+
+from __future__ import annotations
+
+import logging
+import struct
+from collections.abc import Iterable
+
+from homeassistant.components.bluetooth import BluetoothServiceInfoBleak
+from homeassistant.core import callback
+from pychlorinator.halo_parsers import ScanResponse
+
+from .const import LOCAL_NAMES
+from .const import MANUFACTURER_ID
+
+_LOGGER = logging.getLogger(__name__)
+
+_LOCAL_NAME_PREFIXES = tuple(LOCAL_NAMES)
+
+
+def is_chlorinator(service_info: BluetoothServiceInfoBleak) -> bool:
+    """Return True if the advertisement comes from a supported chlorinator."""
+    return bool(service_info.name) and service_info.name.startswith(
+        _LOCAL_NAME_PREFIXES
+    )
+
+
+class AdvertisementCache:
+    """Parse each chlorinator advertisement payload once.
+
+    Busy RF environments repeat the same advertisement many times a second, so
+    the raw manufacturer payload of the last advert seen for each address is
+    kept and an identical payload is answered from the cache instead of being
+    parsed again.
+    """
+
+    def __init__(self) -> None:
+        """Initialise an empty cache."""
+        self._payloads: dict[str, bytes] = {}
+        self._responses: dict[str, ScanResponse | None] = {}
+        self.candidates: dict[str, BluetoothServiceInfoBleak] = {}
+
+    @callback
+    def async_parse(
+        self, service_info: BluetoothServiceInfoBleak
+    ) -> ScanResponse | None:
+        """Return the scan response for an advertisement."""
+        return self._async_parse(service_info)[0]
+
+    @callback
+    def async_parse_changed(
+        self, service_info: BluetoothServiceInfoBleak
+    ) -> ScanResponse | None:
+        """Return the scan response only if the payload changed since last seen."""
+        scan_response, changed = self._async_parse(service_info)
+        return scan_response if changed else None
+
+    @callback
+    def _async_parse(
+        self, service_info: BluetoothServiceInfoBleak
+    ) -> tuple[ScanResponse | None, bool]:
+        """Parse an advertisement, returning the response and if it changed."""
+        address = service_info.address
+        payload = service_info.manufacturer_data.get(MANUFACTURER_ID)
+        if payload is None:
+            # Bleak sometimes reports an advert without the manufacturer data
+            return self._responses.get(address), False
+        if self._payloads.get(address) == payload:
+            return self._responses[address], False
+
+        try:
+            scan_response = ScanResponse(payload)
+        except (struct.error, ValueError) as e:
+            _LOGGER.debug("Ignoring malformed advertisement from %s: %s", address, e)
+            scan_response = None
+        self._payloads[address] = payload
+        self._responses[address] = scan_response
+        return scan_response, True
+
+    @callback
+    def async_add_candidates(
+        self,
+        service_infos: Iterable[BluetoothServiceInfoBleak],
+        exclude: Iterable[str] = (),
+    ) -> None:
+        """Index the chlorinators found in service_infos by address."""
+        excluded = set(exclude)
+        for service_info in service_infos:
+            address = service_info.address
+            if (
+                address in excluded
+                or address in self.candidates
+                or not is_chlorinator(service_info)
+            ):
+                continue
+            self.candidates[address] = service_info
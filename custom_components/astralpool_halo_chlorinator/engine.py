@@ -0,0 +1,272 @@
+"""Polling and writing engine for a chlorinator, without Home Assistant.
+
+The engine keeps the gathered state of one chlorinator, reads only the
+polling tiers that have expired, and writes command frames over a single
+session. It talks to a device through a small interface, so it runs the
+same against a real chlorinator over Bleak or the simulator. The coordinator
+and the command line both drive it.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections.abc import AsyncIterator
+from collections.abc import Callable
+from collections.abc import Iterable
+from contextlib import AbstractAsyncContextManager
+from contextlib import asynccontextmanager
+from datetime import datetime
+from datetime import timezone
+from typing import Any
+from typing import Protocol
+
+from .codec import CHARACTERISTIC_PARSERS
+from .codec import confirm_characteristics
+from .codec import INDEXED_KEY
+from .gather import GatherEngine
+from .gather import GatherResult
+from .gather import ReadSession
+from .polling import LIVE_TIER
+from .polling import STATIC_TIER
+from .polling import TierCache
+from .watchdog import Watchdog
+
+_LOGGER = logging.getLogger(__name__)
+
+# Consecutive polls that stayed connected but were sent nothing, after which
+# the access code is taken to be rejected. A stale session key leaves a single
+# poll silent, dropped links and radio failures are not counted.
+AUTH_REJECTED_POLLS = 3
+
+# Seconds a live mode session is kept open, before it is closed for at least
+# LIVE_PAUSE_SECONDS so writes and other devices on the adapter get a turn
+LIVE_SESSION_SECONDS = 60
+LIVE_PAUSE_SECONDS = 5
+
+
+class AuthenticationRejected(Exception):
+    """The chlorinator keeps connecting but ignores the access code."""
+
+
+class EngineSession(ReadSession, Protocol):
+    """A session that can write frames and request characteristics."""
+
+    async def async_write_frames(
+        self, frames: Iterable[bytes], acknowledged: bool = True
+    ) -> None:
+        """Write command frames in order, waiting for the last to be confirmed."""
+
+    @property
+    def silent(self) -> bool:
+        """Return True if the device sent nothing, yet stayed connected."""
+
+
+class ChlorinatorDevice(Protocol):
+    """A chlorinator the engine can gather from and open sessions to."""
+
+    # Whether single characteristics can be read, so tiers can be polled
+    tiered: bool
+    # Deadlines of the phases of talking to the device
+    watchdog: Watchdog
+
+    async def async_gather_all(self) -> dict[str, Any]:
+        """Gather every characteristic, for devices that are not tiered."""
+
+    def session(self) -> AbstractAsyncContextManager[EngineSession]:
+        """Open an authenticated session."""
+
+
+class BleakDevice:
+    """A chlorinator reached over Bleak through the shared connector."""
+
+    def __init__(self, chlorinator: Any) -> None:
+        """Initialise the device."""
+        from pychlorinator.halochlorinator import HaloChlorinatorAPI
+
+        from .connector import get_connector
+
+        self.chlorinator = chlorinator
+        self.tiered = isinstance(chlorinator, HaloChlorinatorAPI)
+        self.watchdog = get_connector(chlorinator).watchdog
+
+    async def async_gather_all(self) -> dict[str, Any]:
+        """Gather every characteristic over one session."""
+        if not self.tiered:
+            from .equilibrium import async_gather
+
+            return await async_gather(self.chlorinator)
+
+        async with self.session() as session:
+            result = await GatherEngine(session, watchdog=self.watchdog).async_gather(
+                CHARACTERISTIC_PARSERS
+            )
+        return result.data
+
+    @asynccontextmanager
+    async def session(self) -> AsyncIterator[EngineSession]:
+        """Open an authenticated session with the chlorinator."""
+        from .session import async_authenticated_session
+
+        async with async_authenticated_session(self.chlorinator) as session:
+            yield session
+
+
+class ChlorinatorEngine:
+    """Gather and write the state of one chlorinator."""
+
+    def __init__(self, device: ChlorinatorDevice) -> None:
+        """Initialise the engine."""
+        self.device = device
+        self.data: dict[str, Any] = {}
+        self.last_gather: GatherResult | None = None
+        self.silent_polls = 0
+        self._tiers = TierCache()
+
+    def invalidate(self) -> None:
+        """Forget the state, so the next poll gathers everything."""
+        self.data = {}
+        self._tiers.invalidate()
+
+    def merge(self, fresh: dict[str, Any]) -> dict[str, Any]:
+        """Merge freshly read values into the state and return it."""
+        self.data = {**self.data, **fresh}
+        return self.data
+
+    async def async_poll(self, now: datetime | None = None) -> dict[str, Any]:
+        """Gather the characteristics whose polling tier has expired.
+
+        The first poll, and any once the static tier has expired or was
+        invalidated, reads every tier. Later polls only read the expired tiers
+        and keep the values of the others. Either is done over one session.
+        Returns the state, or an empty dict if nothing was read.
+
+        Raises AuthenticationRejected once AUTH_REJECTED_POLLS polls in a row
+        stayed connected without being sent anything. Polls that lost the
+        connection count neither way.
+        """
+        data, silent = await self._async_poll(now)
+        if data:
+            self.silent_polls = 0
+            return data
+        if not silent:
+            return data
+        self.silent_polls += 1
+        if self.silent_polls >= AUTH_REJECTED_POLLS:
+            raise AuthenticationRejected(
+                f"Nothing was sent in {self.silent_polls} authenticated sessions"
+            )
+        return data
+
+    async def _async_poll(self, now: datetime | None) -> tuple[dict[str, Any], bool]:
+        """Gather the expired tiers, or everything.
+
+        Returns the state, and whether the session stayed silent.
+        """
+        if not self.device.tiered:
+            data = await self.device.async_gather_all()
+            if data:
+                self.data = data
+            return data, False
+
+        now = now or datetime.now(timezone.utc)
+        tiers = self._tiers.expired(now)
+        gather_all = STATIC_TIER in tiers or not self.data
+        if gather_all:
+            tiers = list(self._tiers.tiers)
+
+        _LOGGER.debug("Reading tiers %s", ", ".join(tier.name for tier in tiers))
+        async with self.device.session() as session:
+            result = await GatherEngine(
+                session, watchdog=self.device.watchdog
+            ).async_gather(self._tiers.characteristics(tiers))
+            # Checked before disconnecting
+            silent = session.silent
+        self.last_gather = result
+        if not result.data:
+            # Fall back to a full gather next time
+            self._tiers.invalidate()
+            return {}, silent
+        self._tiers.mark_read(tiers, now)
+        if gather_all:
+            # Values of characteristics the device stopped sending are dropped,
+            # but not the setup of outputs whose frame was missed this time
+            self.data = {
+                **{
+                    key: value
+                    for key, value in self.data.items()
+                    if INDEXED_KEY.fullmatch(key)
+                },
+                **result.data,
+            }
+            return self.data, False
+        return self.merge(result.data), False
+
+    async def async_write(
+        self,
+        frames: list[bytes],
+        read_back: bool = True,
+        groups: Iterable[str] | None = None,
+    ) -> dict[str, Any]:
+        """Write command frames in one session and return what was read back.
+
+        The last frame is acknowledged, so a write that did not reach the
+        device raises. The state characteristics affected by the frames are
+        then read back, or those of the gather groups when given. The write
+        went through if the read back fails, so nothing is returned instead,
+        like session.async_write_frames does. The engine leaves its state as
+        it is; callers merge the values read back, like the coordinator's
+        async_confirm_write does with merge, and refresh if there are none.
+        """
+        async with self.device.session() as session:
+            await session.async_write_frames(frames)
+            if not read_back:
+                return {}
+            characteristics = None if groups else confirm_characteristics(frames)
+            try:
+                result = await GatherEngine(
+                    session, watchdog=self.device.watchdog
+                ).async_gather(characteristics, groups)
+            except Exception as e:
+                _LOGGER.debug("Failed to read back state: %s", e)
+                return {}
+        if result.missing:
+            _LOGGER.debug("Read back missed %s", result.missing)
+        return result.data
+
+    async def async_live(
+        self,
+        interval: float,
+        duration: float,
+        on_data: Callable[[dict[str, Any]], None],
+        session_seconds: float = LIVE_SESSION_SECONDS,
+        pause_seconds: float = LIVE_PAUSE_SECONDS,
+    ) -> int:
+        """Read the live tier every interval seconds, for duration seconds.
+
+        The reads share a session, which is reopened after session_seconds, or
+        after a read that got no answer at all. Every read is merged into the
+        state, which is passed to on_data. Returns the number of reads.
+        """
+        loop = asyncio.get_running_loop()
+        end = loop.time() + duration
+        reads = 0
+        while True:
+            release = min(end, loop.time() + session_seconds)
+            async with self.device.session() as session:
+                while True:
+                    started = loop.time()
+                    result = await GatherEngine(
+                        session, watchdog=self.device.watchdog
+                    ).async_gather(LIVE_TIER.characteristics)
+                    next_read = started + interval
+                    if result.data:
+                        reads += 1
+                        on_data(self.merge(result.data))
+                    if not result.data or next_read >= release:
+                        break
+                    await asyncio.sleep(next_read - loop.time())
+            if next_read >= end:
+                return reads
+            _LOGGER.debug("Pausing live mode after %d reads", reads)
+            await asyncio.sleep(max(pause_seconds, next_read - loop.time()))
@@ -0,0 +1,147 @@
+"""Sessions with a Viron eQuilibrium chlorinator over the shared connector.
+
+pychlorinator connects on its own for every gather and action it writes to
+an eQuilibrium. The same steps are done here through the shared connector
+instead, so these connections are routed, reuse discovered services and run
+every step under the deadline of its phase, like those to a Halo.
+"""
+
+from __future__ import annotations
+
+import logging
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from typing import Any
+
+from bleak import BleakClient
+from bleak.exc import BleakError
+from pychlorinator import chlorinator_parsers
+from pychlorinator.chlorinator import ChlorinatorAPI
+from pychlorinator.chlorinator import decrypt_characteristic
+from pychlorinator.chlorinator import encrypt_characteristic
+from pychlorinator.chlorinator import encrypt_mac_key
+from pychlorinator.chlorinator import UUID_CHLORINATOR_APP_ACTION
+from pychlorinator.chlorinator import UUID_CHLORINATOR_CAPABILITIES
+from pychlorinator.chlorinator import UUID_CHLORINATOR_SETTINGS
+from pychlorinator.chlorinator import UUID_CHLORINATOR_SETUP
+from pychlorinator.chlorinator import UUID_CHLORINATOR_STATE
+from pychlorinator.chlorinator import UUID_CHLORINATOR_STATISTICS
+from pychlorinator.chlorinator import UUID_CHLORINATOR_TIMERS
+from pychlorinator.chlorinator import UUID_LIGHTING_SETUP
+from pychlorinator.chlorinator import UUID_LIGHTING_STATE
+from pychlorinator.chlorinator import UUID_LIGHTING_TIMERS
+from pychlorinator.chlorinator import UUID_MASTER_AUTHENTICATION
+from pychlorinator.chlorinator import UUID_SLAVE_SESSION_KEY
+
+from .connector import get_connector
+from .session import async_hold_connection
+from .watchdog import AUTH
+from .watchdog import DISCONNECT
+from .watchdog import PhaseTimeout
+from .watchdog import READ
+from .watchdog import SESSION_KEY
+from .watchdog import Watchdog
+from .watchdog import WRITE
+
+_LOGGER = logging.getLogger(__name__)
+
+# Characteristics read by a gather, and their parsers
+GATHER_PARSERS: dict[str, type] = {
+    UUID_CHLORINATOR_STATE: chlorinator_parsers.ChlorinatorState,
+    UUID_CHLORINATOR_SETUP: chlorinator_parsers.ChlorinatorSetup,
+    UUID_CHLORINATOR_CAPABILITIES: chlorinator_parsers.ChlorinatorCapabilities,
+    UUID_CHLORINATOR_TIMERS: chlorinator_parsers.ChlorinatorTimers,
+    UUID_CHLORINATOR_STATISTICS: chlorinator_parsers.ChlorinatorStatistics,
+    UUID_CHLORINATOR_SETTINGS: chlorinator_parsers.ChlorinatorSettings,
+}
+
+# Characteristics read before writing an action, the device drops the
+# connection otherwise
+ACTION_READS = (
+    UUID_CHLORINATOR_STATE,
+    UUID_CHLORINATOR_SETUP,
+    UUID_CHLORINATOR_TIMERS,
+    UUID_CHLORINATOR_SETTINGS,
+    UUID_LIGHTING_STATE,
+    UUID_LIGHTING_SETUP,
+    UUID_LIGHTING_TIMERS,
+)
+
+
+class EquilibriumSession:
+    """An authenticated connection to an eQuilibrium chlorinator."""
+
+    def __init__(
+        self, client: BleakClient, session_key: bytes, watchdog: Watchdog
+    ) -> None:
+        """Initialise the session."""
+        self.client = client
+        self.session_key = session_key
+        self.watchdog = watchdog
+
+    async def async_read(self, uuid: str) -> bytes:
+        """Read and decrypt a characteristic."""
+        async with self.watchdog.phase(READ):
+            data = await self.client.read_gatt_char(uuid)
+        return decrypt_characteristic(data, self.session_key)
+
+    async def async_write(self, uuid: str, data: bytes) -> None:
+        """Encrypt and write a characteristic."""
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            _LOGGER.debug("Data to write %s", data.hex())
+        async with self.watchdog.phase(WRITE):
+            await self.client.write_gatt_char(
+                uuid, encrypt_characteristic(data, self.session_key)
+            )
+
+
+@asynccontextmanager
+async def async_authenticated_session(
+    chlorinator: ChlorinatorAPI,
+) -> AsyncIterator[EquilibriumSession]:
+    """Connect to the chlorinator and authenticate with its access code.
+
+    Waits, like a session with a Halo, until no other session is connected.
+    """
+    connector = get_connector(chlorinator)
+    watchdog = connector.watchdog
+    async with async_hold_connection(chlorinator):
+        client = await connector.async_connect()
+        try:
+            async with watchdog.phase(SESSION_KEY):
+                session_key = await client.read_gatt_char(UUID_SLAVE_SESSION_KEY)
+            chlorinator._session_key = session_key
+
+            mac = encrypt_mac_key(session_key, bytes(chlorinator._access_code, "utf_8"))
+            async with watchdog.phase(AUTH):
+                await client.write_gatt_char(UUID_MASTER_AUTHENTICATION, mac)
+
+            yield EquilibriumSession(client, session_key, watchdog)
+        finally:
+            try:
+                async with watchdog.phase(DISCONNECT):
+                    await client.disconnect()
+            except (PhaseTimeout, BleakError) as e:
+                _LOGGER.debug("Failed to disconnect: %s", e)
+
+
+async def async_gather(chlorinator: ChlorinatorAPI) -> dict[str, Any]:
+    """Read and decode every characteristic of the chlorinator."""
+    data: dict[str, Any] = {}
+    async with async_authenticated_session(chlorinator) as session:
+        for uuid, parser in GATHER_PARSERS.items():
+            data.update(vars(parser(await session.async_read(uuid))))
+    return data
+
+
+async def async_write_action(
+    chlorinator: ChlorinatorAPI, action: int, period_minutes: int = 0
+) -> None:
+    """Write an action to the chlorinator."""
+    async with async_authenticated_session(chlorinator) as session:
+        for uuid in ACTION_READS:
+            await session.async_read(uuid)
+        await session.async_write(
+            UUID_CHLORINATOR_APP_ACTION,
+            bytes(chlorinator_parsers.ChlorinatorAction(action, period_minutes)),
+        )
@@ -0,0 +1,111 @@
+"""Detect transitions in the chlorinator state between updates.
+
+Automations that only care about the pump starting, a GPO changing mode or
+the pH leaving its range would otherwise have to watch entity states that
+are written on every update. The coordinator compares each update with the
+previous one and fires an event for each transition found.
+"""
+
+from __future__ import annotations
+
+from typing import Any
+
+from .const import DOMAIN
+
+EVENT_TYPE = f"{DOMAIN}_event"
+
+PUMP_STARTED = "pump_started"
+PUMP_STOPPED = "pump_stopped"
+HEATER_ON = "heater_on"
+HEATER_OFF = "heater_off"
+SOLAR_ACTIVE = "solar_active"
+SOLAR_INACTIVE = "solar_inactive"
+GPO_MODE_CHANGED = "gpo_mode_changed"
+PH_HIGH = "ph_high"
+PH_LOW = "ph_low"
+PH_NORMAL = "ph_normal"
+
+TRANSITION_TYPES = (
+    PUMP_STARTED,
+    PUMP_STOPPED,
+    HEATER_ON,
+    HEATER_OFF,
+    SOLAR_ACTIVE,
+    SOLAR_INACTIVE,
+    GPO_MODE_CHANGED,
+    PH_HIGH,
+    PH_LOW,
+    PH_NORMAL,
+)
+
+# GPO mode changes are told apart by the GPO they happened on
+GPO_SUBTYPES = {f"gpo{gpo_num}": gpo_num for gpo_num in range(1, 5)}
+
+# State flags and the transitions fired when they turn on and off
+SWITCH_TRANSITIONS: dict[str, tuple[str, str]] = {
+    "pump_is_operating": (PUMP_STARTED, PUMP_STOPPED),
+    "HeaterOn": (HEATER_ON, HEATER_OFF),
+    "SolarPumpState": (SOLAR_ACTIVE, SOLAR_INACTIVE),
+}
+
+# pH range, and how far back inside it the pH has to come to count as normal
+PH_LOW_THRESHOLD = 7.2
+PH_HIGH_THRESHOLD = 7.8
+PH_HYSTERESIS = 0.05
+
+_PH_BAND_TRANSITIONS = {"low": PH_LOW, "high": PH_HIGH, "normal": PH_NORMAL}
+
+
+def _ph_band(ph: float | None, band: str | None) -> str | None:
+    """Return the band of a pH reading, staying in the previous one when close."""
+    if ph is None or ph <= 0:
+        # No probe, or no reading yet
+        return band
+    if ph < PH_LOW_THRESHOLD:
+        return "low"
+    if ph > PH_HIGH_THRESHOLD:
+        return "high"
+    if band == "low" and ph < PH_LOW_THRESHOLD + PH_HYSTERESIS:
+        return band
+    if band == "high" and ph > PH_HIGH_THRESHOLD - PH_HYSTERESIS:
+        return band
+    return "normal"
+
+
+class TransitionDetector:
+    """Find the transitions between two updates of the chlorinator state."""
+
+    def __init__(self) -> None:
+        """Initialise the detector."""
+        self._ph_band: str | None = None
+
+    def detect(self, old: dict[str, Any], new: dict[str, Any]) -> list[dict[str, Any]]:
+        """Return the transitions from the old to the new state.
+
+        Nothing is reported for values that were not known before.
+        """
+        transitions: list[dict[str, Any]] = []
+        for key, (turned_on, turned_off) in SWITCH_TRANSITIONS.items():
+            if key not in old or key not in new or bool(old[key]) == bool(new[key]):
+                continue
+            transitions.append({"type": turned_on if new[key] else turned_off})
+
+        for subtype, gpo_num in GPO_SUBTYPES.items():
+            key = f"GPO{gpo_num}_Mode"
+            if key not in old or key not in new or old[key] == new[key]:
+                continue
+            transitions.append(
+                {
+                    "type": GPO_MODE_CHANGED,
+                    "subtype": subtype,
+                    "from": getattr(old[key], "name", old[key]),
+                    "to": getattr(new[key], "name", new[key]),
+                }
+            )
+
+        ph = new.get("ph_measurement")
+        band = _ph_band(ph, self._ph_band)
+        if self._ph_band is not None and band != self._ph_band:
+            transitions.append({"type": _PH_BAND_TRANSITIONS[band], "ph": ph})
+        self._ph_band = band
+        return transitions
@@ -0,0 +1,150 @@
+"""Pipelined characteristic reads over one authenticated session.
+
+Characteristics are independent of each other, so instead of waiting for
+each answer before asking for the next one, several read requests are kept
+in flight on the session. Answers are decoded with the pychlorinator parsers
+as they arrive, and the time each characteristic took to be answered is
+reported with the result.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections.abc import Iterable
+from dataclasses import dataclass
+from dataclasses import field
+from typing import Any
+from typing import Protocol
+
+from .watchdog import PHASE_TIMEOUTS
+from .watchdog import READ
+from .watchdog import Watchdog
+
+_LOGGER = logging.getLogger(__name__)
+
+# Seconds to wait for the device to answer a read request
+READ_TIMEOUT = PHASE_TIMEOUTS[READ]
+
+# Read requests kept in flight at once
+MAX_IN_FLIGHT = 4
+
+# Characteristics by the part of the pool equipment they describe
+GATHER_GROUPS: dict[str, tuple[int, ...]] = {
+    "device": (1, 100, 101, 105),
+    "chlorinator": (9, 102, 104, 106, 600, 601, 602),
+    "equipment": (201, 202, 206, 1300, 1301, 1302),
+    "lighting": (300, 301, 302),
+    "heater": (1100, 1101, 1102, 1104),
+    "solar": (1200, 1201, 1202),
+}
+
+
+class ReadSession(Protocol):
+    """A session that characteristic reads can be requested on."""
+
+    async def async_request(self, characteristic: int) -> asyncio.Future:
+        """Request a characteristic and return the future of its values."""
+
+
+@dataclass
+class GatherResult:
+    """The decoded values of a gather and how long the reads took."""
+
+    data: dict[str, Any] = field(default_factory=dict)
+    # Seconds from writing the read request to decoding the answer
+    latency: dict[int, float] = field(default_factory=dict)
+    missing: list[int] = field(default_factory=list)
+    seconds: float = 0.0
+
+
+def group_characteristics(groups: Iterable[str]) -> list[int]:
+    """Return the characteristics of the gather groups."""
+    characteristics: list[int] = []
+    for group in groups:
+        for characteristic in GATHER_GROUPS[group]:
+            if characteristic not in characteristics:
+                characteristics.append(characteristic)
+    return characteristics
+
+
+class GatherEngine:
+    """Read characteristics with several requests in flight."""
+
+    def __init__(
+        self,
+        session: ReadSession,
+        max_in_flight: int = MAX_IN_FLIGHT,
+        timeout: float = READ_TIMEOUT,
+        watchdog: Watchdog | None = None,
+    ) -> None:
+        """Initialise the engine.
+
+        With a watchdog, reads run under its read deadline instead of the
+        timeout, and the ones that run over are recorded.
+        """
+        self.session = session
+        self.max_in_flight = max_in_flight
+        self.timeout = timeout
+        self.watchdog = watchdog
+
+    async def async_gather(
+        self,
+        characteristics: Iterable[int] | None = None,
+        groups: Iterable[str] | None = None,
+    ) -> GatherResult:
+        """Read the characteristics, and those of the groups, and merge them.
+
+        Characteristics that are not answered within the timeout, or fail to
+        decode, are reported as missing. Errors writing a read request are
+        connection errors, and raised after the other reads are cancelled.
+        """
+        selected = list(characteristics or ())
+        for characteristic in group_characteristics(groups or ()):
+            if characteristic not in selected:
+                selected.append(characteristic)
+
+        result = GatherResult()
+        in_flight = asyncio.Semaphore(self.max_in_flight)
+        start = time.monotonic()
+
+        async def _async_read(characteristic: int) -> None:
+            async with in_flight:
+                requested = time.monotonic()
+                # Failing to write the request means the connection failed
+                future = await self.session.async_request(characteristic)
+                try:
+                    if self.watchdog is None:
+                        async with asyncio.timeout(self.timeout):
+                            values = await future
+                    else:
+                        async with self.watchdog.phase(READ):
+                            values = await future
+                except Exception as e:
+                    _LOGGER.debug(
+                        "No values for characteristic %s: %s", characteristic, e
+                    )
+                    result.missing.append(characteristic)
+                    return
+                result.latency[characteristic] = time.monotonic() - requested
+                result.data.update(values)
+
+        reads = [asyncio.create_task(_async_read(c)) for c in selected]
+        try:
+            await asyncio.gather(*reads)
+        except BaseException:
+            for read in reads:
+                read.cancel()
+            raise
+        result.seconds = time.monotonic() - start
+        if result.latency and _LOGGER.isEnabledFor(logging.DEBUG):
+            slowest = max(result.latency, key=result.latency.__getitem__)
+            _LOGGER.debug(
+                "Read %d characteristics in %.2fs, slowest %s in %.2fs",
+                len(result.latency),
+                result.seconds,
+                slowest,
+                result.latency[slowest],
+            )
+        return result
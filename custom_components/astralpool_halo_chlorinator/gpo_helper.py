@@ -5,29 +5,16 @@ This module extends the pychlorinator library with GPO-specific functionality.
 
 from __future__ import annotations
 
-import asyncio
 import logging
-import struct
-from enum import IntEnum
+from typing import Any
 
-from bleak import BleakClient
-from pychlorinator.halochlorinator import encrypt_characteristic
-from pychlorinator.halochlorinator import encrypt_mac_key
 from pychlorinator.halochlorinator import HaloChlorinatorAPI
-from pychlorinator.halochlorinator import UUID_MASTER_AUTHENTICATION_2
-from pychlorinator.halochlorinator import UUID_RX_CHARACTERISTIC
-from pychlorinator.halochlorinator import UUID_SLAVE_SESSION_KEY_2
 
-_LOGGER = logging.getLogger(__name__)
-
-
-class GPOAppActions(IntEnum):
-    """Actions that can be performed on GPO outputs."""
+from .codec import GPO_FRAMES
+from .codec import GPOAppActions
+from .session import async_write_frames
 
-    NoAction = 0
-    Off = 1
-    Auto = 2
-    On = 3
+_LOGGER = logging.getLogger(__name__)
 
 
 class GPOAction:
@@ -52,22 +39,30 @@ class GPOAction:
 
     def __bytes__(self):
         """Convert to bytes for BLE transmission."""
-        fmt = "=3s B B 15x"
-        _LOGGER.info(
-            "Selected GPO Action is %s for GPO%d", self.action, self.gpo_number
-        )
-        return struct.pack(fmt, self.header_bytes, self.action, self.gpo_number - 1)
+        frame = GPO_FRAMES.get((self.action, self.gpo_number))
+        if frame is not None and frame.startswith(self.header_bytes):
+            return frame
+        # Frames with another header are encoded on the fly
+        return self.header_bytes + bytes([self.action, self.gpo_number - 1]) + bytes(15)
 
 
 async def async_write_gpo_action(
-    chlorinator: HaloChlorinatorAPI, action: GPOAppActions, gpo_number: int
-) -> None:
+    chlorinator: HaloChlorinatorAPI,
+    action: GPOAppActions,
+    gpo_number: int,
+    read_back: bool = False,
+) -> dict[str, Any]:
     """Connect to the Chlorinator and write a GPO action command to it.
 
     Args:
         chlorinator: The HaloChlorinatorAPI instance
         action: The GPO action to perform
         gpo_number: The GPO output number (1-4)
+        read_back: Read the GPO state back on the same connection
+
+    Returns:
+        The decoded GPO state if read_back is set and the read succeeded,
+        otherwise an empty dict
 
     Raises:
         ValueError: If gpo_number is not in range 1-4
@@ -80,34 +75,16 @@ async def async_write_gpo_action(
         "Writing GPO action: GPO%d -> %s", gpo_number, GPOAppActions(action).name
     )
 
-    while chlorinator._connected:
-        _LOGGER.debug("Already connected, Waiting")
-        await asyncio.sleep(1)
-
     try:
-        async with BleakClient(chlorinator._ble_device, timeout=10) as client:
-            chlorinator._session_key = await client.read_gatt_char(
-                UUID_SLAVE_SESSION_KEY_2
-            )
-            _LOGGER.debug("Got session key %s", chlorinator._session_key.hex())
-
-            mac = encrypt_mac_key(
-                chlorinator._session_key, bytes(chlorinator._access_code, "utf_8")
-            )
-            _LOGGER.debug("Mac key to write %s", mac)
-            await client.write_gatt_char(UUID_MASTER_AUTHENTICATION_2, mac)
-
-            data = GPOAction(action, gpo_number).__bytes__()
-            _LOGGER.debug("Data to write %s", data.hex())
-            data = encrypt_characteristic(data, chlorinator._session_key)
-            _LOGGER.debug("Encrypted data to write %s", data.hex())
-            await client.write_gatt_char(UUID_RX_CHARACTERISTIC, data)
-
-            _LOGGER.info(
-                "Successfully wrote GPO action for GPO%d: %s",
-                gpo_number,
-                GPOAppActions(action).name,
-            )
+        data = await async_write_frames(
+            chlorinator, [GPO_FRAMES[action, gpo_number]], read_back
+        )
+        _LOGGER.info(
+            "Successfully wrote GPO action for GPO%d: %s",
+            gpo_number,
+            GPOAppActions(action).name,
+        )
+        return data
     except Exception as e:
         _LOGGER.error("Failed to write GPO action for GPO%d: %s", gpo_number, str(e))
         raise
@@ -124,10 +101,10 @@ def add_gpo_support(chlorinator: HaloChlorinatorAPI) -> None:
     """
 
     async def _async_write_gpo_action_wrapper(
-        action: GPOAppActions, gpo_number: int
-    ) -> None:
+        action: GPOAppActions, gpo_number: int, read_back: bool = False
+    ) -> dict[str, Any]:
         """Wrapper method for async_write_gpo_action."""
-        await async_write_gpo_action(chlorinator, action, gpo_number)
+        return await async_write_gpo_action(chlorinator, action, gpo_number, read_back)
 
     # Add the method to the instance
     chlorinator.async_write_gpo_action = _async_write_gpo_action_wrapper
@@ -0,0 +1,219 @@
+"""Per-gather history of chlorinator telemetry in compressed CSV files.
+
+Every gather is appended as a row of its numeric values to a gzipped CSV
+file per UTC day, with full precision. Rows are buffered and appended as a
+new gzip member every FLUSH_ROWS rows, which readers decompress as one
+stream. A file's columns are fixed by its header, so a gather with fields
+the file has no column for starts a new part of the day. Exports stream the
+rows of a time range into a single file, one row at a time.
+"""
+
+from __future__ import annotations
+
+import csv
+import gzip
+import logging
+import threading
+from collections.abc import Iterator
+from datetime import date
+from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
+from enum import Enum
+from pathlib import Path
+from typing import Any
+
+_LOGGER = logging.getLogger(__name__)
+
+# Rows buffered before they are appended to the files
+FLUSH_ROWS = 30
+
+# Days of files kept, older ones are deleted when a day starts
+RETENTION_DAYS = 365
+
+TIMESTAMP = "timestamp"
+SUFFIX = ".csv.gz"
+
+
+def numeric_values(data: dict[str, Any]) -> dict[str, int | float]:
+    """Return the numeric values of a gather, enums and booleans as numbers."""
+    values: dict[str, int | float] = {}
+    for key, value in data.items():
+        if isinstance(value, Enum):
+            value = value.value
+        if isinstance(value, bool):
+            values[key] = int(value)
+        elif isinstance(value, (int, float)):
+            values[key] = value
+    return values
+
+
+def _read_header(path: Path) -> list[str]:
+    """Return the columns of a history file, decompressing only its start.
+
+    A file cut short before the end of its header has no columns.
+    """
+    try:
+        with gzip.open(path, "rt", newline="") as file:
+            return next(csv.reader(file), [])
+    except (EOFError, gzip.BadGzipFile) as e:
+        _LOGGER.warning("Skipping unreadable history file %s: %s", path, e)
+        return []
+
+
+class HistoryWriter:
+    """Buffer gathers and append them to the history files of a chlorinator."""
+
+    def __init__(
+        self,
+        directory: Path,
+        flush_rows: int = FLUSH_ROWS,
+        retention_days: int = RETENTION_DAYS,
+    ) -> None:
+        """Initialise the writer for the files in directory."""
+        self.directory = directory
+        self.flush_rows = flush_rows
+        self.retention_days = retention_days
+        self._pending: list[tuple[datetime, dict[str, int | float]]] = []
+        # Columns of the file each day is appended to
+        self._current: dict[date, tuple[Path, list[str]]] = {}
+        self._lock = threading.Lock()
+
+    def append(self, timestamp: datetime, data: dict[str, Any]) -> bool:
+        """Buffer a gather, return True once the buffer should be flushed."""
+        values = numeric_values(data)
+        if values:
+            self._pending.append((timestamp, values))
+        return len(self._pending) >= self.flush_rows
+
+    def files(self) -> list[tuple[date, Path]]:
+        """Return the history files by day, oldest first."""
+        if not self.directory.is_dir():
+            return []
+        files = []
+        for path in self.directory.glob(f"*{SUFFIX}"):
+            day, _, part = path.name.removesuffix(SUFFIX).partition(".")
+            try:
+                files.append((date.fromisoformat(day), int(part or 0), path))
+            except ValueError:
+                continue
+        return [(day, path) for day, _, path in sorted(files)]
+
+    def flush(self) -> int:
+        """Append the buffered rows to their files and return how many.
+
+        Does blocking I/O, run it in the executor.
+        """
+        with self._lock:
+            rows, self._pending = self._pending, []
+            if not rows:
+                return 0
+            self.directory.mkdir(parents=True, exist_ok=True)
+            start = 0
+            while start < len(rows):
+                path, columns = self._target(rows[start][0].date(), rows[start][1])
+                end = start + 1
+                while (
+                    end < len(rows)
+                    and rows[end][0].date() == rows[start][0].date()
+                    and rows[end][1].keys() <= set(columns)
+                ):
+                    end += 1
+                self._write(path, columns, rows[start:end])
+                start = end
+            return len(rows)
+
+    def _target(
+        self, day: date, values: dict[str, int | float]
+    ) -> tuple[Path, list[str]]:
+        """Return the file a row of the day goes to, and its columns."""
+        if day not in self._current:
+            self._current.clear()
+            parts = [path for file_day, path in self.files() if file_day == day]
+            if parts:
+                self._current[day] = (parts[-1], _read_header(parts[-1]))
+            else:
+                self._prune(day)
+        if day in self._current:
+            path, columns = self._current[day]
+            if values.keys() <= set(columns[1:]):
+                return path, columns
+            part = path.name.removesuffix(SUFFIX).partition(".")[2]
+            name = f"{day.isoformat()}.{int(part or 0) + 1}{SUFFIX}"
+        else:
+            name = f"{day.isoformat()}{SUFFIX}"
+        columns = [TIMESTAMP, *sorted(values)]
+        self._current[day] = (self.directory / name, columns)
+        return self.directory / name, columns
+
+    def _write(
+        self,
+        path: Path,
+        columns: list[str],
+        rows: list[tuple[datetime, dict[str, int | float]]],
+    ) -> None:
+        """Append rows to a file as one gzip member, with a header if new."""
+        new = not path.exists()
+        with gzip.open(path, "at", newline="") as file:
+            writer = csv.writer(file)
+            if new:
+                writer.writerow(columns)
+            for timestamp, values in rows:
+                writer.writerow(
+                    [
+                        timestamp.isoformat(),
+                        *(values.get(column, "") for column in columns[1:]),
+                    ]
+                )
+
+    def _prune(self, today: date) -> None:
+        """Delete the files older than the retention."""
+        oldest = today - timedelta(days=self.retention_days)
+        for day, path in self.files():
+            if day >= oldest:
+                break
+            _LOGGER.debug("Deleting history file %s", path)
+            path.unlink(missing_ok=True)
+
+    def rows(self, start: datetime, end: datetime) -> Iterator[dict[str, str]]:
+        """Yield the stored rows from start up to end, one file at a time.
+
+        A file cut short, by a crash during a flush, yields the rows before
+        the cut, and the rest of its tail is skipped.
+        """
+        start, end = start.astimezone(timezone.utc), end.astimezone(timezone.utc)
+        for day, path in self.files():
+            if not start.date() <= day <= end.date():
+                continue
+            try:
+                with gzip.open(path, "rt", newline="") as file:
+                    for row in csv.DictReader(file):
+                        if start <= datetime.fromisoformat(row[TIMESTAMP]) < end:
+                            yield row
+            except (EOFError, gzip.BadGzipFile) as e:
+                _LOGGER.warning("Skipping the truncated end of %s: %s", path, e)
+
+    def export(self, start: datetime, end: datetime, target: Path) -> int:
+        """Write the rows from start up to end to one file, return how many.
+
+        Only the headers are read to find the columns, the rows themselves
+        are streamed from file to file. Does blocking I/O, run it in the
+        executor.
+        """
+        columns = [TIMESTAMP]
+        first, last = start.astimezone(timezone.utc), end.astimezone(timezone.utc)
+        for day, path in self.files():
+            if not first.date() <= day <= last.date():
+                continue
+            for column in _read_header(path):
+                if column not in columns:
+                    columns.append(column)
+        count = 0
+        target.parent.mkdir(parents=True, exist_ok=True)
+        with gzip.open(target, "wt", newline="") as file:
+            writer = csv.DictWriter(file, columns, restval="")
+            writer.writeheader()
+            for row in self.rows(start, end):
+                writer.writerow(row)
+                count += 1
+        return count
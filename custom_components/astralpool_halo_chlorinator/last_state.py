@@ -0,0 +1,103 @@
+"""The last values gathered from a chlorinator, kept across restarts.
+
+Entities show these until the chlorinator is reached again, so a restart, or
+a chlorinator that has not advertised yet, does not leave them unknown. The
+gathered data holds pychlorinator enums and raw bytes, which are stored
+tagged with their type and turned back into them on load.
+"""
+
+from __future__ import annotations
+
+import importlib
+from enum import Enum
+from typing import Any
+
+from homeassistant.core import callback
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+from homeassistant.util import slugify
+
+from .const import DOMAIN
+
+STORAGE_VERSION = 1
+
+# Seconds the last values are saved after, at most
+SAVE_DELAY = 300
+
+# Only enums of pychlorinator are restored, whatever the stored file says
+ENUM_MODULE_PREFIX = "pychlorinator."
+
+
+def _encode(value: Any) -> Any:
+    """Return a gathered value as something that can be stored as JSON."""
+    if isinstance(value, Enum):
+        cls = type(value)
+        return {"enum": f"{cls.__module__}:{cls.__qualname__}", "value": value.value}
+    if isinstance(value, bytes):
+        return {"bytes": value.hex()}
+    if isinstance(value, (list, tuple)):
+        return [_encode(item) for item in value]
+    return value
+
+
+def _decode(value: Any) -> Any:
+    """Return a stored value as it was gathered.
+
+    An enum that no longer exists, or no longer has the value, is restored as
+    the raw value.
+    """
+    if isinstance(value, list):
+        return [_decode(item) for item in value]
+    if not isinstance(value, dict):
+        return value
+    if "bytes" in value:
+        return bytes.fromhex(value["bytes"])
+    module_name, _, qualname = value["enum"].partition(":")
+    if not module_name.startswith(ENUM_MODULE_PREFIX):
+        return value["value"]
+    try:
+        cls: Any = importlib.import_module(module_name)
+        for name in qualname.split("."):
+            cls = getattr(cls, name)
+        return cls(value["value"])
+    except (ImportError, AttributeError, ValueError):
+        return value["value"]
+
+
+class LastState:
+    """The name and the last gathered data of a chlorinator."""
+
+    def __init__(self, hass: HomeAssistant, address: str) -> None:
+        """Initialise the last state of the chlorinator at address."""
+        self._store: Store[dict[str, Any]] = Store(
+            hass, STORAGE_VERSION, f"{DOMAIN}.{slugify(address)}_last_state"
+        )
+        self.name: str | None = None
+        self.data: dict[str, Any] = {}
+
+    async def async_load(self) -> None:
+        """Load the last state saved before a restart."""
+        stored = await self._store.async_load() or {}
+        self.name = stored.get("name")
+        self.data = {
+            key: _decode(value) for key, value in stored.get("data", {}).items()
+        }
+
+    def _data_to_save(self) -> dict[str, Any]:
+        """Return the last state to save."""
+        return {
+            "name": self.name,
+            "data": {key: _encode(value) for key, value in self.data.items()},
+        }
+
+    @callback
+    def async_save(self, name: str | None, data: dict[str, Any]) -> None:
+        """Keep a gather, saving it after the delay."""
+        self.name = name
+        self.data = data
+        self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+
+    async def async_flush(self) -> None:
+        """Save the last state now, rather than after the delay."""
+        if self.data:
+            await self._store.async_save(self._data_to_save())
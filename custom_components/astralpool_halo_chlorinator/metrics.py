@@ -0,0 +1,257 @@
+"""OpenMetrics rendering of chlorinator telemetry.
+
+Each chlorinator's samples are collected when its coordinator updates, and
+the whole document is rendered and encoded right away, so a scrape only has
+to send the last rendered bytes.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from enum import Enum
+from typing import Any
+
+CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+PREFIX = "halo_"
+
+GAUGE = "gauge"
+COUNTER = "counter"
+
+
+@dataclass(frozen=True)
+class Metric:
+    """A metric family, and the gathered key it is read from if any."""
+
+    name: str
+    type: str
+    help: str
+    key: str | None = None
+    unit: str | None = None
+
+
+# Gathered values exported as gauges, booleans as 0 or 1
+DATA_METRICS = (
+    Metric("ph", GAUGE, "Measured pH.", "ph_measurement"),
+    Metric("orp_millivolts", GAUGE, "Measured ORP.", "ORPMeasurement", "millivolts"),
+    Metric(
+        "water_temperature_celsius", GAUGE, "Water temperature.", "WaterTemp", "celsius"
+    ),
+    Metric(
+        "solar_roof_temperature_celsius",
+        GAUGE,
+        "Solar roof temperature.",
+        "SolarRoof",
+        "celsius",
+    ),
+    Metric("cell_level", GAUGE, "Chlorinator cell output level.", "RealCelllevel"),
+    Metric(
+        "cell_current_milliamps",
+        GAUGE,
+        "Chlorinator cell current.",
+        "CellCurrentmA",
+        "milliamps",
+    ),
+    Metric(
+        "previous_day_cell_load",
+        GAUGE,
+        "Chlorinator cell load over the previous day.",
+        "PreviousDaysCellLoad",
+    ),
+    # Despite its name, the device sends the volume dosed
+    Metric(
+        "dosing_pump_millilitres",
+        GAUGE,
+        "Acid dosed today.",
+        "DosingPumpSecs",
+        "millilitres",
+    ),
+    Metric("ph_setpoint", GAUGE, "pH setpoint.", "ph_control_setpoint"),
+    Metric(
+        "chlorine_setpoint", GAUGE, "Chlorine setpoint.", "chlorine_control_setpoint"
+    ),
+    Metric("pump_operating", GAUGE, "Whether the pump runs.", "pump_is_operating"),
+    Metric("cell_operating", GAUGE, "Whether the cell runs.", "cell_is_operating"),
+    Metric("heater_on", GAUGE, "Whether the heater is on.", "HeaterOn"),
+    Metric("solar_pump_on", GAUGE, "Whether the solar pump runs.", "SolarPumpState"),
+)
+
+# Outputs whose mode is exported, and the gathered key of the mode
+MODE_KEYS = {
+    "pump": "mode",
+    "heater": "HeaterMode",
+    "solar": "SolarMode",
+    **{f"gpo{gpo_num}": f"GPO{gpo_num}_Mode" for gpo_num in range(1, 5)},
+    **{f"lighting_zone_{zone}": f"LightingMode_{zone}" for zone in range(1, 5)},
+}
+
+UP = Metric("up", GAUGE, "Whether the last update gathered data.")
+LAST_UPDATE = Metric(
+    "last_update_timestamp_seconds",
+    GAUGE,
+    "Time of the last update.",
+    unit="seconds",
+)
+MODE = Metric("output_mode", GAUGE, "Mode of an output, 1 for the current mode.")
+GATHER_SECONDS = Metric(
+    "gather_seconds", GAUGE, "Duration of the last tiered gather.", unit="seconds"
+)
+GATHER_MISSING = Metric(
+    "gather_missing_characteristics",
+    GAUGE,
+    "Characteristics not answered in the last tiered gather.",
+)
+LATENCY = Metric(
+    "characteristic_latency_seconds",
+    GAUGE,
+    "Time to answer each characteristic in the last tiered gather.",
+    unit="seconds",
+)
+CONNECTIONS = Metric(
+    "connections", COUNTER, "Successful connections, by service cache hit or miss."
+)
+CONNECTION_FAILURES = Metric(
+    "connection_failures",
+    COUNTER,
+    "Connections through an adapter or proxy that failed after all its attempts.",
+)
+GATHER_FAILURES = Metric("gather_failures", COUNTER, "Updates that gathered no data.")
+DEADLINE_BREACHES = Metric(
+    "deadline_breaches", COUNTER, "Phases cancelled for running over their deadline."
+)
+QUEUE_DEPTH = Metric(
+    "queue_depth", GAUGE, "Sessions waiting for the connection to be free."
+)
+
+METRICS = (
+    UP,
+    LAST_UPDATE,
+    *DATA_METRICS,
+    MODE,
+    GATHER_SECONDS,
+    GATHER_MISSING,
+    LATENCY,
+    CONNECTIONS,
+    CONNECTION_FAILURES,
+    GATHER_FAILURES,
+    DEADLINE_BREACHES,
+    QUEUE_DEPTH,
+)
+
+Sample = tuple[dict[str, str], float]
+# Labels of a chlorinator, and its samples by metric family
+EntrySamples = tuple[dict[str, str], dict[Metric, list[Sample]]]
+
+
+def _number(value: Any) -> float | None:
+    """Return a gathered value as a number, None if it is not one."""
+    if isinstance(value, Enum):
+        value = value.value
+    if isinstance(value, (bool, int, float)):
+        return float(value)
+    return None
+
+
+def _escape(value: str) -> str:
+    """Escape a label value."""
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format(value: float) -> str:
+    """Format a sample value, integers without a fraction."""
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+def collect(
+    data: dict[str, Any],
+    *,
+    timestamp: float | None,
+    connection: dict[str, Any],
+    gather: Any | None = None,
+    gather_failures: int = 0,
+    queue_depth: int = 0,
+    breaches: dict[str, int] | None = None,
+) -> dict[Metric, list[Sample]]:
+    """Return the samples of one chlorinator, keyed by metric family.
+
+    The connection stats are those of ConnectionStats.as_dict, gather is the
+    GatherResult of the last tiered gather, if there was one, and breaches
+    are the deadline breaches of the watchdog by phase.
+    """
+    samples: dict[Metric, list[Sample]] = {
+        UP: [({}, 1.0 if data else 0.0)],
+        CONNECTIONS: [
+            ({"service_cache": "hit"}, float(connection["hits"])),
+            ({"service_cache": "miss"}, float(connection["misses"])),
+        ],
+        CONNECTION_FAILURES: [({}, float(connection["failures"]))],
+        GATHER_FAILURES: [({}, float(gather_failures))],
+        QUEUE_DEPTH: [({}, float(queue_depth))],
+        DEADLINE_BREACHES: [
+            ({"phase": phase}, float(count))
+            for phase, count in (breaches or {}).items()
+        ],
+    }
+    if timestamp is not None:
+        samples[LAST_UPDATE] = [({}, timestamp)]
+    for metric in DATA_METRICS:
+        value = _number(data.get(metric.key))
+        if value is not None:
+            samples[metric] = [({}, value)]
+    samples[MODE] = [
+        ({"output": output, "mode": data[key].name}, 1.0)
+        for output, key in MODE_KEYS.items()
+        if isinstance(data.get(key), Enum)
+    ]
+    if gather is not None:
+        samples[GATHER_SECONDS] = [({}, gather.seconds)]
+        samples[GATHER_MISSING] = [({}, float(len(gather.missing)))]
+        samples[LATENCY] = [
+            ({"characteristic": str(characteristic)}, latency)
+            for characteristic, latency in sorted(gather.latency.items())
+        ]
+    return samples
+
+
+class MetricsExporter:
+    """Samples of every chlorinator, and the document rendered from them."""
+
+    def __init__(self) -> None:
+        """Initialise the exporter with no chlorinators."""
+        self._entries: dict[str, EntrySamples] = {}
+        self.body = self._render()
+
+    def update(
+        self,
+        entry_id: str,
+        labels: dict[str, str],
+        samples: dict[Metric, list[Sample]],
+    ) -> None:
+        """Replace the samples of a chlorinator and render the document."""
+        self._entries[entry_id] = (labels, samples)
+        self.body = self._render()
+
+    def remove(self, entry_id: str) -> None:
+        """Remove the samples of a chlorinator and render the document."""
+        if self._entries.pop(entry_id, None) is not None:
+            self.body = self._render()
+
+    def _render(self) -> bytes:
+        """Render the samples of every chlorinator as OpenMetrics text."""
+        lines: list[str] = []
+        for metric in METRICS:
+            name = PREFIX + metric.name
+            lines.append(f"# TYPE {name} {metric.type}")
+            if metric.unit:
+                lines.append(f"# UNIT {name} {metric.unit}")
+            lines.append(f"# HELP {name} {metric.help}")
+            sample_name = f"{name}_total" if metric.type == COUNTER else name
+            for entry_labels, samples in self._entries.values():
+                for labels, value in samples.get(metric, ()):
+                    label_text = ",".join(
+                        f'{key}="{_escape(label)}"'
+                        for key, label in {**entry_labels, **labels}.items()
+                    )
+                    lines.append(f"{sample_name}{{{label_text}}} {_format(value)}")
+        lines.append("# EOF\n")
+        return "\n".join(lines).encode()
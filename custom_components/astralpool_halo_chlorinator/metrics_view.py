@@ -0,0 +1,73 @@
+"""HTTP view serving chlorinator telemetry to Prometheus."""
+
+from __future__ import annotations
+
+from aiohttp import web
+from homeassistant.components.http import HomeAssistantView
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import callback
+from homeassistant.core import HomeAssistant
+
+from .connector import get_connector
+from .const import DOMAIN
+from .metrics import collect
+from .metrics import CONTENT_TYPE
+from .metrics import MetricsExporter
+from .models import ChlorinatorData
+
+METRICS_URL = f"/api/{DOMAIN}/metrics"
+
+# hass.data key of the exporter, shared by every config entry
+DATA_METRICS = f"{DOMAIN}_metrics"
+
+
+class ChlorinatorMetricsView(HomeAssistantView):
+    """Serve the last rendered metrics of every chlorinator."""
+
+    url = METRICS_URL
+    name = f"api:{DOMAIN}:metrics"
+
+    def __init__(self, exporter: MetricsExporter) -> None:
+        """Initialise the view."""
+        self.exporter = exporter
+
+    async def get(self, request: web.Request) -> web.Response:
+        """Return the metrics as OpenMetrics text."""
+        return web.Response(
+            body=self.exporter.body, headers={"Content-Type": CONTENT_TYPE}
+        )
+
+
+@callback
+def async_setup_metrics(
+    hass: HomeAssistant, entry: ConfigEntry, data: ChlorinatorData
+) -> None:
+    """Render the metrics of an entry on every update of its coordinator."""
+    exporter: MetricsExporter | None = hass.data.get(DATA_METRICS)
+    if exporter is None:
+        exporter = hass.data[DATA_METRICS] = MetricsExporter()
+        hass.http.register_view(ChlorinatorMetricsView(exporter))
+
+    coordinator = data.coordinator
+    connector = get_connector(data.device)
+    labels = {"entry_id": entry.entry_id, "name": data.title}
+
+    @callback
+    def _async_render() -> None:
+        exporter.update(
+            entry.entry_id,
+            labels,
+            collect(
+                coordinator.data,
+                timestamp=coordinator.last_update_timestamp,
+                connection=connector.stats.as_dict(),
+                gather=coordinator.last_gather,
+                gather_failures=coordinator.gather_failures,
+                queue_depth=connector.waiting,
+                breaches=connector.watchdog.breaches,
+            ),
+        )
+
+    _async_render()
+    entry.async_on_unload(coordinator.async_add_listener(_async_render))
+    entry.async_on_unload(lambda: exporter.remove(entry.entry_id))
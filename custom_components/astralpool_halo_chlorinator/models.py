@@ -2,6 +2,7 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
+from dataclasses import field
 
 from pychlorinator.halochlorinator import HaloChlorinatorAPI
 
@@ -15,3 +16,4 @@ class ChlorinatorData:
     title: str
     device: HaloChlorinatorAPI
     coordinator: ChlorinatorDataUpdateCoordinator
+    platforms: set[str] = field(default_factory=set)
@@ -0,0 +1,91 @@
+"""Polling tiers for Halo chlorinator characteristics.
+
+The library's gather makes the chlorinator send every characteristic it has,
+then waits for it to drop the connection. Most of that does not change
+between gathers: capabilities and setup only change when the pool is
+reconfigured, and are read again daily to pick that up, and the probe and
+power board statistics change at most hourly. Characteristics are grouped in
+tiers by how quickly they change, and a gather only reads the tiers whose
+cached values have expired.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import datetime
+from datetime import timedelta
+
+
+@dataclass(frozen=True)
+class PollingTier:
+    """Characteristics that are read together, and how long they are kept."""
+
+    name: str
+    characteristics: tuple[int, ...]
+    # None keeps the values until the cache is invalidated
+    ttl: timedelta | None
+
+
+# Profile, settings, capabilities and setup, including the *Enabled flags,
+# NumZonesInUse and the GPO outlet configuration
+STATIC_TIER = PollingTier(
+    "static",
+    (1, 100, 101, 105, 301, 302, 1100, 1200, 1300, 1301, 1302),
+    timedelta(days=1),
+)
+
+# Set points, maintenance, configuration and the probe and power board
+# statistics
+HOURLY_TIER = PollingTier(
+    "hourly",
+    (102, 106, 600, 602, 1101, 1201),
+    timedelta(hours=1),
+)
+
+# Measurements, the state of the pump, outputs, lighting, heater and solar,
+# and the cell statistics, with the dosing and filter pump run times of today
+GATHER_TIER = PollingTier(
+    "gather",
+    (9, 104, 201, 202, 206, 300, 601, 1102, 1104, 1202),
+    timedelta(0),
+)
+
+POLLING_TIERS = (STATIC_TIER, HOURLY_TIER, GATHER_TIER)
+
+# pH, ORP, the cell level and current, and the acid dosed today, read on
+# their own in live mode
+LIVE_TIER = PollingTier("live", (104, 601), timedelta(0))
+
+
+class TierCache:
+    """Track when the cached values of each polling tier expire."""
+
+    def __init__(self, tiers: Iterable[PollingTier] = POLLING_TIERS) -> None:
+        """Initialise the cache with every tier expired."""
+        self.tiers = tuple(tiers)
+        self._read: dict[PollingTier, datetime] = {}
+
+    def expired(self, now: datetime) -> list[PollingTier]:
+        """Return the tiers that have to be read again."""
+        return [
+            tier
+            for tier in self.tiers
+            if tier not in self._read
+            or (tier.ttl is not None and now - self._read[tier] >= tier.ttl)
+        ]
+
+    def characteristics(self, tiers: Iterable[PollingTier]) -> list[int]:
+        """Return the characteristics to read for the tiers."""
+        return [
+            characteristic for tier in tiers for characteristic in tier.characteristics
+        ]
+
+    def mark_read(self, tiers: Iterable[PollingTier], now: datetime) -> None:
+        """Record that the tiers have been read."""
+        for tier in tiers:
+            self._read[tier] = now
+
+    def invalidate(self) -> None:
+        """Expire every tier, so the next gather reads everything."""
+        self._read.clear()
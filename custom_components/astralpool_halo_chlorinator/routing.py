@@ -0,0 +1,154 @@
+"""Route connections through the best Bluetooth adapter or proxy.
+
+The chlorinator is often in range of several adapters and ESPHome proxies,
+and the one that resolved it at setup is not necessarily the best one later.
+Before each session the connectable sources that currently see the device
+are ranked by signal strength and free connection slots, and if connecting
+through one fails the next one is tried. Only the connect is routed: once
+connected, an error is the device's and would not go away on another route.
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from collections.abc import Awaitable
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+from typing import TYPE_CHECKING
+from typing import TypeVar
+
+from bleak.exc import BleakError
+
+if TYPE_CHECKING:
+    from homeassistant.core import HomeAssistant
+
+_LOGGER = logging.getLogger(__name__)
+
+_T = TypeVar("_T")
+
+# Seconds a source that failed to connect is ranked after the others
+FAILURE_BACKOFF = 300
+
+# Ranks sources that did not report a signal strength last
+NO_RSSI = -127
+
+FALLBACK_SOURCE = "fallback"
+
+# Errors connecting through a source, after which the next one is tried
+CONNECT_ERRORS = (BleakError, TimeoutError)
+
+
+@dataclass(frozen=True)
+class ConnectionSource:
+    """An adapter or proxy that can connect to the chlorinator."""
+
+    source: str
+    device: Any
+    rssi: int | None = None
+    slots_in_use: int = 0
+    # None if the source does not report its connection slots
+    slots_free: int | None = None
+
+
+class ConnectionRouter:
+    """Pick the source to connect through, and fail over to the others."""
+
+    def __init__(
+        self,
+        sources: Callable[[], list[ConnectionSource]],
+        fallback_device: Any,
+    ) -> None:
+        """Initialise the router.
+
+        Args:
+            sources: Returns the connectable sources that currently see the
+                device
+            fallback_device: Used when no source sees the device
+        """
+        self._sources = sources
+        self.fallback_device = fallback_device
+        self._failures: dict[str, float] = {}
+
+    def ranked(self) -> list[ConnectionSource]:
+        """Return the sources to try, best first."""
+        now = time.monotonic()
+        sources = self._sources()
+        if not sources:
+            return [ConnectionSource(FALLBACK_SOURCE, self.fallback_device)]
+
+        def _rank(source: ConnectionSource) -> tuple:
+            failed = self._failures.get(source.source)
+            return (
+                failed is not None and now - failed < FAILURE_BACKOFF,
+                source.slots_free == 0,
+                -(NO_RSSI if source.rssi is None else source.rssi),
+                source.slots_in_use,
+            )
+
+        return sorted(sources, key=_rank)
+
+    def best(self) -> ConnectionSource:
+        """Return the source to connect through."""
+        return self.ranked()[0]
+
+    def record_success(self, source: str) -> None:
+        """Record a successful connection through a source."""
+        self._failures.pop(source, None)
+
+    def record_failure(self, source: str) -> None:
+        """Record a failed connection, so the source is tried last for a while."""
+        self._failures[source] = time.monotonic()
+
+    async def async_connect(self, connect: Callable[[Any], Awaitable[_T]]) -> _T:
+        """Connect through the best source, failing over to the next on error.
+
+        Only CONNECT_ERRORS fail over, anything else is raised straight away.
+        """
+        error: Exception | None = None
+        for source in self.ranked():
+            _LOGGER.debug(
+                "Connecting through %s (rssi %s, %s slots in use)",
+                source.source,
+                source.rssi,
+                source.slots_in_use,
+            )
+            try:
+                result = await connect(source.device)
+            except CONNECT_ERRORS as e:
+                _LOGGER.debug("Failed to connect through %s: %s", source.source, e)
+                self.record_failure(source.source)
+                error = e
+                continue
+            self.record_success(source.source)
+            return result
+        assert error is not None
+        raise error
+
+
+def async_scanner_sources(hass: HomeAssistant, address: str) -> list[ConnectionSource]:
+    """Return the connectable adapters and proxies that currently see a device."""
+    from homeassistant.components import bluetooth
+
+    sources = []
+    for scanner_device in bluetooth.async_scanner_devices_by_address(
+        hass, address, connectable=True
+    ):
+        scanner = scanner_device.scanner
+        slots_in_use, slots_free = 0, None
+        # Only reported by newer Bluetooth stacks, and not by every scanner
+        get_allocations = getattr(scanner, "get_allocations", None)
+        if get_allocations is not None and (allocations := get_allocations()):
+            slots_in_use = allocations.slots - allocations.free
+            slots_free = allocations.free
+        sources.append(
+            ConnectionSource(
+                scanner.source,
+                scanner_device.ble_device,
+                scanner_device.advertisement.rssi,
+                slots_in_use,
+                slots_free,
+            )
+        )
+    return sources
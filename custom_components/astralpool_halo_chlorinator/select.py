@@ -13,11 +13,19 @@ from homeassistant.helpers.entity import DeviceInfo
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 from pychlorinator import halo_parsers
+from pychlorinator.halochlorinator import HaloChlorinatorAPI
 
+from .actions import LIGHT_ACTIONS
+from .codec import CHLORINATOR_FRAMES
+from .codec import HEATER_FRAMES
+from .codec import LIGHT_FRAMES
+from .codec import SOLAR_FRAMES
 from .const import DOMAIN
 from .coordinator import ChlorinatorDataUpdateCoordinator
+from .equilibrium import async_write_action
 from .gpo_helper import GPOAppActions
 from .models import ChlorinatorData
+from .session import async_write_frames
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -37,31 +45,39 @@ async def async_setup_entry(
     async def add_dynamic_select_entities(device_type):
         new_entities = []
 
-        if device_type == "HeaterEnabled" and not hasattr(
-            coordinator, "heater_mode_select_added"
-        ):
+        # Keys of the added selects are kept with the added entities, so they
+        # are forgotten when the entry is unloaded
+        added = coordinator.added_entities
+
+        if device_type == "HeaterEnabled" and "heater_mode_select" not in added:
             new_entities.append(HeaterModeSelect(coordinator))
-            coordinator.heater_mode_select_added = True  # Prevents re-adding
+            added.add("heater_mode_select")  # Prevents re-adding
 
-        if device_type == "SolarEnabled" and not hasattr(
-            coordinator, "solar_mode_select_added"
-        ):
+        if device_type == "SolarEnabled" and "solar_mode_select" not in added:
             new_entities.append(SolarModeSelect(coordinator))
-            coordinator.solar_mode_select_added = True  # Prevents re-adding
-
-        if device_type == "LightingEnabled" and not hasattr(
-            coordinator, "lighting_mode_select_added"
-        ):
-            new_entities.append(LightingModeSelect(coordinator))
-            coordinator.lighting_mode_select_added = True  # Prevents re-adding
+            added.add("solar_mode_select")  # Prevents re-adding
+
+        # Add a lighting select entity for every zone in use
+        if device_type == "LightingEnabled":
+            for zone in coordinator.lighting_zones:
+                if f"lighting{zone}_mode_select" not in added:
+                    new_entities.append(LightingModeSelect(coordinator, zone))
+                    added.add(f"lighting{zone}_mode_select")
+            if (
+                len(coordinator.lighting_zones) > 1
+                and "lighting_all_mode_select" not in added
+            ):
+                new_entities.append(LightingAllZonesSelect(coordinator))
+                added.add("lighting_all_mode_select")
 
         # Add GPO select entities dynamically
         for gpo_num in range(1, 5):  # GPO1 to GPO4
-            if device_type == f"GPO{gpo_num}Enabled" and not hasattr(
-                coordinator, f"gpo{gpo_num}_mode_select_added"
+            if (
+                device_type == f"GPO{gpo_num}Enabled"
+                and f"gpo{gpo_num}_mode_select" not in added
             ):
                 new_entities.append(GPOModeSelect(coordinator, gpo_num))
-                setattr(coordinator, f"gpo{gpo_num}_mode_select_added", True)
+                added.add(f"gpo{gpo_num}_mode_select")
 
         if new_entities:
             async_add_entities(new_entities)
@@ -83,7 +99,6 @@ class ChlorinatorModeSelect(
     _attr_icon = "mdi:power"
     _attr_options = ["Off", "Auto", "Low", "Medium", "High"]
     _attr_name = "Mode"
-    _attr_unique_id = "HCHLOR_mode_select"
 
     def __init__(
         self,
@@ -91,15 +106,11 @@ class ChlorinatorModeSelect(
     ) -> None:
         """Initialize the sensor."""
         super().__init__(coordinator)
+        self._attr_unique_id = coordinator.unique_id("mode_select")
 
     @property
     def device_info(self) -> DeviceInfo | None:
-        return {
-            "identifiers": {(DOMAIN, "HCHLOR")},
-            "name": "HCHLOR",
-            "model": "Halo Chlor",
-            "manufacturer": "Astral Pool",
-        }
+        return self.coordinator.device_info
 
     @property
     def current_option(self):
@@ -140,7 +151,15 @@ class ChlorinatorModeSelect(
             action = halo_parsers.ChlorinatorActions.NoAction
 
         _LOGGER.debug("Select entity state changed to %s", action)
-        await self.coordinator.chlorinator.async_write_action(action)
+        if isinstance(self.coordinator.chlorinator, HaloChlorinatorAPI):
+            data = await async_write_frames(
+                self.coordinator.chlorinator,
+                [CHLORINATOR_FRAMES[action]],
+                read_back=True,
+            )
+            await self.coordinator.async_confirm_write(data)
+            return
+        await async_write_action(self.coordinator.chlorinator, action)
         self.coordinator.reset_data_age()
         await asyncio.sleep(1)
         await self.coordinator.async_request_refresh()
@@ -154,7 +173,6 @@ class HeaterModeSelect(
     _attr_icon = "mdi:power"
     _attr_options = ["Off", "On"]
     _attr_name = "Heater Mode"
-    _attr_unique_id = "HCHLOR_heater_onoff_select"
 
     def __init__(
         self,
@@ -162,15 +180,11 @@ class HeaterModeSelect(
     ) -> None:
         """Initialize the sensor."""
         super().__init__(coordinator)
+        self._attr_unique_id = coordinator.unique_id("heater_onoff_select")
 
     @property
     def device_info(self) -> DeviceInfo | None:
-        return {
-            "identifiers": {(DOMAIN, "HCHLOR")},
-            "name": "HCHLOR",
-            "model": "Halo Chlor",
-            "manufacturer": "Astral Pool",
-        }
+        return self.coordinator.device_info
 
     @property
     def current_option(self):
@@ -196,10 +210,12 @@ class HeaterModeSelect(
             action = halo_parsers.HeaterAppActions.NoAction
 
         _LOGGER.debug("Select Heater entity state changed to %s", action)
-        await self.coordinator.chlorinator.async_write_heater_action(action)
-        self.coordinator.reset_data_age()
-        await asyncio.sleep(1)
-        await self.coordinator.async_request_refresh()
+        data = await async_write_frames(
+            self.coordinator.chlorinator,
+            [HEATER_FRAMES[action]],
+            read_back=True,
+        )
+        await self.coordinator.async_confirm_write(data)
 
 
 class SolarModeSelect(
@@ -210,7 +226,6 @@ class SolarModeSelect(
     _attr_icon = "mdi:power"
     _attr_options = ["Off", "Auto", "On"]
     _attr_name = "Solar Mode"
-    _attr_unique_id = "HCHLOR_solar_onoff_select"
 
     def __init__(
         self,
@@ -218,15 +233,11 @@ class SolarModeSelect(
     ) -> None:
         """Initialize the sensor."""
         super().__init__(coordinator)
+        self._attr_unique_id = coordinator.unique_id("solar_onoff_select")
 
     @property
     def device_info(self) -> DeviceInfo | None:
-        return {
-            "identifiers": {(DOMAIN, "HCHLOR")},
-            "name": "HCHLOR",
-            "model": "Halo Chlor",
-            "manufacturer": "Astral Pool",
-        }
+        return self.coordinator.device_info
 
     @property
     def current_option(self):
@@ -252,42 +263,46 @@ class SolarModeSelect(
             action = halo_parsers.SolarAppActions.NoAction
 
         _LOGGER.debug("Select Solar entity state changed to %s", action)
-        await self.coordinator.chlorinator.async_write_solar_action(action)
-        self.coordinator.reset_data_age()
-        await asyncio.sleep(1)
-        await self.coordinator.async_request_refresh()
+        data = await async_write_frames(
+            self.coordinator.chlorinator,
+            [SOLAR_FRAMES[action]],
+            read_back=True,
+        )
+        await self.coordinator.async_confirm_write(data)
 
 
 class LightingModeSelect(
     CoordinatorEntity[ChlorinatorDataUpdateCoordinator], SelectEntity
 ):
-    """Representation of a Clorinator Light Select entity."""
+    """Representation of a Clorinator Light Select entity for one zone."""
 
     _attr_icon = "mdi:power"
     _attr_options = ["Off", "Auto", "On"]
-    _attr_name = "Light Mode Zone1"
-    _attr_unique_id = "HCHLOR_lightz1_onoff_select"
     _attr_device_class = SwitchDeviceClass.SWITCH
 
     def __init__(
         self,
         coordinator: ChlorinatorDataUpdateCoordinator,
+        zone: int = 1,
     ) -> None:
-        """Initialize the sensor."""
+        """Initialize the lighting select entity.
+
+        Args:
+            coordinator: The data update coordinator
+            zone: The lighting zone number (1-4)
+        """
         super().__init__(coordinator)
+        self.zone = zone
+        self._attr_name = f"Light Mode Zone{zone}"
+        self._attr_unique_id = coordinator.unique_id(f"lightz{zone}_onoff_select")
 
     @property
     def device_info(self) -> DeviceInfo | None:
-        return {
-            "identifiers": {(DOMAIN, "HCHLOR")},
-            "name": "HCHLOR",
-            "model": "Halo Chlor",
-            "manufacturer": "Astral Pool",
-        }
+        return self.coordinator.device_info
 
     @property
     def current_option(self):
-        mode = self.coordinator.data.get("LightingMode_1")
+        mode = self.coordinator.data.get(f"LightingMode_{self.zone}")
 
         if mode is halo_parsers.Mode.Off:
             return "Off"
@@ -298,21 +313,13 @@ class LightingModeSelect(
 
     async def async_select_option(self, option: str) -> None:
         """Change the selected option."""
-        action: halo_parsers.LightAppActions.NoAction
-        if option == "Off":
-            action = halo_parsers.LightAppActions.TurnOffZone
-        elif option == "Auto":
-            action = halo_parsers.LightAppActions.SetZoneModeToAuto
-        elif option == "On":
-            action = halo_parsers.LightAppActions.TurnOnZone
-        else:
-            action = halo_parsers.LightAppActions.NoAction
+        if option not in LIGHT_ACTIONS:
+            _LOGGER.warning("Invalid light option: %s", option)
+            return
+        action = LIGHT_ACTIONS[option]
 
-        _LOGGER.debug("Select Light Z1 entity state changed to %s", action)
-        await self.coordinator.chlorinator.async_write_light_action(action)
-        self.coordinator.reset_data_age()
-        await asyncio.sleep(1)
-        await self.coordinator.async_request_refresh()
+        _LOGGER.debug("Select Light Z%d entity state changed to %s", self.zone, action)
+        await self.coordinator.async_write_lighting([LIGHT_FRAMES[action, self.zone]])
 
     @property
     def is_on(self) -> bool:
@@ -328,6 +335,45 @@ class LightingModeSelect(
         await self.async_select_option("Off")
 
 
+class LightingAllZonesSelect(LightingModeSelect):
+    """Representation of a Clorinator Light Select entity for every zone.
+
+    All zones in use are set over one connection.
+    """
+
+    def __init__(self, coordinator: ChlorinatorDataUpdateCoordinator) -> None:
+        """Initialize the all zones select entity."""
+        super().__init__(coordinator)
+        self._attr_name = "Light Mode All Zones"
+        self._attr_unique_id = coordinator.unique_id("lightall_onoff_select")
+
+    @property
+    def current_option(self):
+        """Return the mode shared by every zone, None when they differ."""
+        modes = {
+            self.coordinator.data.get(f"LightingMode_{zone}")
+            for zone in self.coordinator.lighting_zones
+        }
+        if len(modes) != 1:
+            return None
+        mode = modes.pop()
+        if mode is None:
+            return None
+        return mode.name if mode.name in self._attr_options else None
+
+    async def async_select_option(self, option: str) -> None:
+        """Change the selected option of every zone in use."""
+        if option not in LIGHT_ACTIONS:
+            _LOGGER.warning("Invalid light option: %s", option)
+            return
+        action = LIGHT_ACTIONS[option]
+
+        _LOGGER.debug("Select Light all zones entity state changed to %s", action)
+        await self.coordinator.async_write_lighting(
+            [LIGHT_FRAMES[action, zone] for zone in self.coordinator.lighting_zones]
+        )
+
+
 class GPOModeSelect(CoordinatorEntity[ChlorinatorDataUpdateCoordinator], SelectEntity):
     """Representation of a GPO Select entity."""
 
@@ -348,17 +394,12 @@ class GPOModeSelect(CoordinatorEntity[ChlorinatorDataUpdateCoordinator], SelectE
         super().__init__(coordinator)
         self.gpo_number = gpo_number
         self._attr_name = f"GPO{gpo_number} Mode"
-        self._attr_unique_id = f"HCHLOR_gpo{gpo_number}_mode_select"
+        self._attr_unique_id = coordinator.unique_id(f"gpo{gpo_number}_mode_select")
 
     @property
     def device_info(self) -> DeviceInfo | None:
         """Return device info."""
-        return {
-            "identifiers": {(DOMAIN, "HCHLOR")},
-            "name": "HCHLOR",
-            "model": "Halo Chlor",
-            "manufacturer": "Astral Pool",
-        }
+        return self.coordinator.device_info
 
     @property
     def current_option(self):
@@ -402,12 +443,10 @@ class GPOModeSelect(CoordinatorEntity[ChlorinatorDataUpdateCoordinator], SelectE
         )
 
         try:
-            await self.coordinator.chlorinator.async_write_gpo_action(
-                action, self.gpo_number
+            data = await self.coordinator.chlorinator.async_write_gpo_action(
+                action, self.gpo_number, read_back=True
             )
-            self.coordinator.reset_data_age()
-            await asyncio.sleep(1)
-            await self.coordinator.async_request_refresh()
+            await self.coordinator.async_confirm_write(data)
         except ValueError as e:
             _LOGGER.error("Invalid GPO configuration: %s", e)
         except Exception as e:
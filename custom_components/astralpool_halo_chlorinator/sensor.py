@@ -263,7 +263,7 @@ async def async_setup_entry(
 
         new_entities = []
         for sensor_type, sensor_desc in sensor_descs.items():
-            unique_id = f"hchlor_{sensor_type}".lower()
+            unique_id = coordinator.unique_id(sensor_type)
             if unique_id not in coordinator.added_entities:
                 new_entities.append(HeaterSensor(coordinator, sensor_desc))
                 coordinator.added_entities.add(unique_id)
@@ -297,7 +297,7 @@ class ChlorinatorSensor(
         """Initialize the sensor."""
         super().__init__(coordinator)
         self._sensor = sensor
-        self._attr_unique_id = f"HCHLOR_{sensor}".lower()
+        self._attr_unique_id = coordinator.unique_id(sensor)
         self._attr_name = CHLORINATOR_SENSOR_TYPES[sensor].name
         self.entity_description = CHLORINATOR_SENSOR_TYPES[sensor]
         self._attr_native_unit_of_measurement = CHLORINATOR_SENSOR_TYPES[
@@ -306,12 +306,7 @@ class ChlorinatorSensor(
 
     @property
     def device_info(self) -> DeviceInfo | None:
-        return {
-            "identifiers": {(DOMAIN, "HCHLOR")},
-            "name": "HCHLOR",
-            "model": "Halo Chlor",
-            "manufacturer": "Astral Pool",
-        }
+        return self.coordinator.device_info
 
     @property
     def native_value(self):
@@ -325,20 +320,14 @@ class HeaterSensor(CoordinatorEntity[ChlorinatorDataUpdateCoordinator], SensorEn
         """Initialize the sensor."""
         super().__init__(coordinator)
         self._sensor = sensor_desc.key
-        self._attr_unique_id = f"hchlor_{self._sensor}".lower()
+        self._attr_unique_id = coordinator.unique_id(self._sensor)
         self.entity_description = sensor_desc
         self._attr_name = sensor_desc.name
         self._attr_native_unit_of_measurement = sensor_desc.native_unit_of_measurement
 
     @property
     def device_info(self) -> DeviceInfo | None:
-        # Device info remains the same
-        return {
-            "identifiers": {(DOMAIN, "HCHLOR")},
-            "name": "HCHLOR",
-            "model": "Halo Chlor",
-            "manufacturer": "Astral Pool",
-        }
+        return self.coordinator.device_info
 
     @property
     def native_value(self):
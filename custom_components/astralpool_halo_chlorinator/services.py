@@ -0,0 +1,245 @@
+"""Services for the Astral Pool Halo Chlorinator integration."""
+
+from __future__ import annotations
+
+import logging
+from pathlib import Path
+
+import voluptuous as vol
+from homeassistant.core import HomeAssistant
+from homeassistant.core import ServiceCall
+from homeassistant.core import ServiceResponse
+from homeassistant.core import SupportsResponse
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.exceptions import ServiceValidationError
+from homeassistant.helpers import config_validation as cv
+from homeassistant.util import dt as dt_util
+from pychlorinator.halochlorinator import HaloChlorinatorAPI
+
+from .actions import ALL_ZONES
+from .actions import ATTR_GPOS
+from .actions import ATTR_HEATER
+from .actions import ATTR_LIGHTING
+from .actions import ATTR_LIGHTING_ZONE
+from .actions import ATTR_MODE
+from .actions import ATTR_SOLAR
+from .actions import encode_scene
+from .actions import GPO_ACTIONS
+from .actions import HEATER_ACTIONS
+from .actions import LIGHT_ACTIONS
+from .actions import MODE_ACTIONS
+from .actions import SOLAR_ACTIONS
+from .codec import decode_header
+from .codec import LIGHT_COMMAND
+from .connector import get_connector
+from .const import DOMAIN
+from .models import ChlorinatorData
+from .session import async_write_frames
+
+_LOGGER = logging.getLogger(__name__)
+
+SERVICE_APPLY = "apply"
+SERVICE_DUMP_TRACE = "dump_trace"
+SERVICE_LIVE_MODE = "live_mode"
+SERVICE_EXPORT_HISTORY = "export_history"
+
+SERVICES = (
+    SERVICE_APPLY,
+    SERVICE_DUMP_TRACE,
+    SERVICE_LIVE_MODE,
+    SERVICE_EXPORT_HISTORY,
+)
+
+ATTR_CONFIG_ENTRY_ID = "config_entry_id"
+ATTR_CLEAR = "clear"
+ATTR_DURATION = "duration"
+ATTR_INTERVAL = "interval"
+ATTR_START = "start"
+ATTR_END = "end"
+
+# Bounds of live mode in seconds, so one chlorinator cannot hold the adapter
+LIVE_DURATION = 600
+MAX_LIVE_DURATION = 1800
+LIVE_INTERVAL = 5
+MIN_LIVE_INTERVAL = 2
+MAX_LIVE_INTERVAL = 60
+
+APPLY_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_CONFIG_ENTRY_ID): cv.string,
+        vol.Optional(ATTR_MODE): vol.In(MODE_ACTIONS),
+        vol.Optional(ATTR_HEATER): vol.In(HEATER_ACTIONS),
+        vol.Optional(ATTR_SOLAR): vol.In(SOLAR_ACTIONS),
+        vol.Optional(ATTR_LIGHTING): vol.In(LIGHT_ACTIONS),
+        vol.Optional(ATTR_LIGHTING_ZONE, default=["1"]): vol.All(
+            cv.ensure_list,
+            [vol.Any(ALL_ZONES, vol.All(vol.Coerce(int), vol.Range(min=1, max=4)))],
+        ),
+        **{vol.Optional(gpo): vol.In(GPO_ACTIONS) for gpo in ATTR_GPOS},
+    }
+)
+
+DUMP_TRACE_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_CONFIG_ENTRY_ID): cv.string,
+        vol.Optional(ATTR_CLEAR, default=False): cv.boolean,
+    }
+)
+
+LIVE_MODE_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_CONFIG_ENTRY_ID): cv.string,
+        vol.Optional(ATTR_DURATION, default=LIVE_DURATION): vol.All(
+            vol.Coerce(int), vol.Range(min=0, max=MAX_LIVE_DURATION)
+        ),
+        vol.Optional(ATTR_INTERVAL, default=LIVE_INTERVAL): vol.All(
+            vol.Coerce(float), vol.Range(min=MIN_LIVE_INTERVAL, max=MAX_LIVE_INTERVAL)
+        ),
+    }
+)
+
+EXPORT_HISTORY_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_CONFIG_ENTRY_ID): cv.string,
+        vol.Required(ATTR_START): cv.datetime,
+        vol.Optional(ATTR_END): cv.datetime,
+    }
+)
+
+
+def _resolve_entry_id(hass: HomeAssistant, entry_id: str | None) -> str:
+    """Return the id of the targeted config entry."""
+    entries: dict[str, ChlorinatorData] = hass.data.get(DOMAIN, {})
+    if entry_id is None:
+        if len(entries) != 1:
+            raise ServiceValidationError(
+                f"{ATTR_CONFIG_ENTRY_ID} is required when more than one "
+                "chlorinator is configured"
+            )
+        return next(iter(entries))
+    if entry_id not in entries:
+        raise ServiceValidationError(f"Unknown chlorinator entry {entry_id}")
+    return entry_id
+
+
+def _get_halo_entry_data(
+    hass: HomeAssistant, entry_id: str, service: str
+) -> ChlorinatorData:
+    """Return the data of a config entry, which must be a Halo chlorinator."""
+    data: ChlorinatorData = hass.data[DOMAIN][entry_id]
+    if not isinstance(data.device, HaloChlorinatorAPI):
+        raise ServiceValidationError(
+            f"{service} is only supported by Halo chlorinators"
+        )
+    return data
+
+
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the integration services."""
+    if hass.services.has_service(DOMAIN, SERVICE_APPLY):
+        return
+
+    async def async_apply(call: ServiceCall) -> None:
+        """Apply several target states over one authenticated connection."""
+        entry_id = _resolve_entry_id(hass, call.data.get(ATTR_CONFIG_ENTRY_ID))
+        data = _get_halo_entry_data(hass, entry_id, SERVICE_APPLY)
+        frames = encode_scene(call.data, data.coordinator.lighting_zones)
+        if not frames:
+            return
+        if all(decode_header(frame)[1] == LIGHT_COMMAND for frame in frames):
+            try:
+                await data.coordinator.async_write_lighting(frames)
+            except Exception as e:
+                raise HomeAssistantError(f"Failed to apply actions: {e}") from e
+            return
+
+        _LOGGER.debug("Applying %d actions in one session", len(frames))
+        try:
+            state = await async_write_frames(data.device, frames, read_back=True)
+        except Exception as e:
+            raise HomeAssistantError(f"Failed to apply actions: {e}") from e
+
+        await data.coordinator.async_confirm_write(state)
+
+    async def async_dump_trace(call: ServiceCall) -> ServiceResponse:
+        """Return the recent protocol frames of a chlorinator."""
+        entry_id = _resolve_entry_id(hass, call.data.get(ATTR_CONFIG_ENTRY_ID))
+        data: ChlorinatorData = hass.data[DOMAIN][entry_id]
+        trace = get_connector(data.device).trace
+        frames = trace.dump()
+        if call.data[ATTR_CLEAR]:
+            trace.clear()
+        return {"frames": frames}
+
+    async def async_live_mode(call: ServiceCall) -> None:
+        """Read the chemistry of a chlorinator every few seconds for a while."""
+        entry_id = _resolve_entry_id(hass, call.data.get(ATTR_CONFIG_ENTRY_ID))
+        data = _get_halo_entry_data(hass, entry_id, SERVICE_LIVE_MODE)
+        coordinator = data.coordinator
+        if not call.data[ATTR_DURATION]:
+            if coordinator.live:
+                coordinator.async_stop_live()
+                coordinator.reset_data_age()
+                await coordinator.async_request_refresh()
+            return
+
+        # Only one chlorinator at a time, the others still have to be polled
+        entries: dict[str, ChlorinatorData] = hass.data[DOMAIN]
+        for other_id, other in entries.items():
+            if other_id != entry_id and other.coordinator.live:
+                raise ServiceValidationError(
+                    f"Live mode is already running for {other.title}"
+                )
+        coordinator.async_start_live(call.data[ATTR_DURATION], call.data[ATTR_INTERVAL])
+
+    async def async_export_history(call: ServiceCall) -> ServiceResponse:
+        """Export the telemetry history of a time range to a compressed CSV."""
+        entry_id = _resolve_entry_id(hass, call.data.get(ATTR_CONFIG_ENTRY_ID))
+        coordinator = hass.data[DOMAIN][entry_id].coordinator
+        start = dt_util.as_utc(call.data[ATTR_START])
+        end = dt_util.as_utc(call.data.get(ATTR_END) or dt_util.utcnow())
+        if end <= start:
+            raise ServiceValidationError(f"{ATTR_END} must be after {ATTR_START}")
+
+        history = coordinator.history
+        await coordinator.async_flush_history()
+        target = Path(
+            hass.config.path(
+                DOMAIN,
+                "exports",
+                f"{history.directory.name}_{start:%Y%m%dT%H%M%S}_"
+                f"{end:%Y%m%dT%H%M%S}.csv.gz",
+            )
+        )
+        try:
+            rows = await hass.async_add_executor_job(history.export, start, end, target)
+        except OSError as e:
+            raise HomeAssistantError(f"Failed to export the history: {e}") from e
+        return {"path": str(target), "rows": rows}
+
+    hass.services.async_register(
+        DOMAIN, SERVICE_APPLY, async_apply, schema=APPLY_SCHEMA
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_DUMP_TRACE,
+        async_dump_trace,
+        schema=DUMP_TRACE_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+    hass.services.async_register(
+        DOMAIN, SERVICE_LIVE_MODE, async_live_mode, schema=LIVE_MODE_SCHEMA
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_EXPORT_HISTORY,
+        async_export_history,
+        schema=EXPORT_HISTORY_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
+
+def async_unload_services(hass: HomeAssistant) -> None:
+    """Remove the integration services, once no chlorinator is left."""
+    for service in SERVICES:
+        hass.services.async_remove(DOMAIN, service)
@@ -0,0 +1,372 @@
+"""Authenticated BLE sessions with a Halo chlorinator.
+
+pychlorinator opens, authenticates and closes a connection for every single
+action it writes. This module keeps the connection and session key around so
+several command frames can be sent, and the state they change read back,
+over one authenticated connection. Every step of a session runs under the
+deadline its phase has in the connector's watchdog.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections.abc import AsyncIterator
+from collections.abc import Iterable
+from contextlib import asynccontextmanager
+from typing import Any
+
+from bleak import BleakClient
+from bleak.exc import BleakError
+from pychlorinator.halochlorinator import decrypt_characteristic
+from pychlorinator.halochlorinator import encrypt_characteristic
+from pychlorinator.halochlorinator import encrypt_mac_key
+from pychlorinator.halochlorinator import HaloChlorinatorAPI
+from pychlorinator.halochlorinator import UUID_MASTER_AUTHENTICATION_2
+from pychlorinator.halochlorinator import UUID_RX_CHARACTERISTIC
+from pychlorinator.halochlorinator import UUID_SLAVE_SESSION_KEY_2
+from pychlorinator.halochlorinator import UUID_TX_CHARACTERISTIC
+
+from .codec import CHARACTERISTIC_PARSERS
+from .codec import confirm_characteristics
+from .codec import decode_characteristic
+from .codec import decode_header
+from .codec import FRAME_LENGTH
+from .codec import INDEXED_CHARACTERISTICS
+from .codec import READ_REQUESTS
+from .connector import get_connector
+from .gather import GatherEngine
+from .trace import ProtocolTrace
+from .trace import RX
+from .trace import TX
+from .watchdog import AUTH
+from .watchdog import DISCONNECT
+from .watchdog import DROP
+from .watchdog import PhaseTimeout
+from .watchdog import READ
+from .watchdog import SESSION_KEY
+from .watchdog import WAIT
+from .watchdog import Watchdog
+from .watchdog import WRITE
+
+_LOGGER = logging.getLogger(__name__)
+
+# Seconds between checks whether the connection is free again. The library
+# only has a flag for it, which is cleared when a phase runs over as well.
+WAIT_INTERVAL = 0.1
+
+# Seconds between checks whether the device dropped the link, as often as
+# pychlorinator checks
+DROP_INTERVAL = 0.1
+
+# Bytes of the MTU taken by the header of an ATT write
+ATT_WRITE_HEADER = 3
+
+WRITE_WITHOUT_RESPONSE = "write-without-response"
+
+# Seconds without another frame of an indexed characteristic after which all
+# of its frames are taken to have arrived. Capped to part of the read deadline.
+INDEXED_QUIET_SECONDS = 0.25
+
+
+def supports_write_without_response(client: BleakClient) -> bool:
+    """Return True if frames can be written without waiting for a response.
+
+    The RX characteristic has to allow it, and a whole frame has to fit in the
+    negotiated MTU, as writes without response cannot be split.
+    """
+    characteristic = client.services.get_characteristic(UUID_RX_CHARACTERISTIC)
+    return (
+        characteristic is not None
+        and WRITE_WITHOUT_RESPONSE in characteristic.properties
+        and client.mtu_size - ATT_WRITE_HEADER >= FRAME_LENGTH
+    )
+
+
+class ChlorinatorSession:
+    """An authenticated connection to a Halo chlorinator."""
+
+    def __init__(
+        self,
+        client: BleakClient,
+        session_key: bytes,
+        trace: ProtocolTrace | None = None,
+        watchdog: Watchdog | None = None,
+    ) -> None:
+        """Initialise the session."""
+        self.client = client
+        self.session_key = session_key
+        self.trace = trace
+        self.watchdog = watchdog or Watchdog()
+        self._waiters: dict[int, asyncio.Future[dict[str, Any]]] = {}
+        # Values of the frames of indexed characteristics so far, and the
+        # timer that hands them to the reader once the device is quiet
+        self._collected: dict[int, tuple[dict[str, Any], asyncio.TimerHandle]] = {}
+        self._requested: dict[int, float] = {}
+        self._notifying = False
+        # Frames the device sent over the session
+        self.notifications = 0
+        self.without_response = supports_write_without_response(client)
+
+    @property
+    def silent(self) -> bool:
+        """Return True if the device sent nothing, yet stayed connected.
+
+        A device that ignores the access code does this, while a dropped
+        link leaves the session disconnected instead.
+        """
+        return not self.notifications and self.client.is_connected
+
+    @property
+    def ignored(self) -> bool:
+        """Return True if reads were requested, but the device sent nothing."""
+        return self._notifying and not self.notifications
+
+    async def async_write(self, frame: bytes, acknowledged: bool = False) -> None:
+        """Encrypt and write a single frame.
+
+        Frames are written without response where the device allows it,
+        unless acknowledged, which waits for the device to confirm the write.
+        """
+        data = encrypt_characteristic(frame, self.session_key)
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            _LOGGER.debug("Data to write %s", frame.hex())
+            _LOGGER.debug("Encrypted data to write %s", data.hex())
+        if self.trace is not None:
+            self.trace.record(TX, frame)
+        async with self.watchdog.phase(WRITE):
+            await self.client.write_gatt_char(
+                UUID_RX_CHARACTERISTIC,
+                data,
+                response=None if acknowledged or not self.without_response else False,
+            )
+
+    async def async_write_frames(
+        self, frames: Iterable[bytes], acknowledged: bool = True
+    ) -> None:
+        """Write command frames back to back, in order.
+
+        At most the last frame is acknowledged, which also makes sure the ones
+        before it were sent before the session can be closed. Reads that
+        follow confirm the frames just as well, as they are answered after.
+        """
+        frames = list(frames)
+        start = time.monotonic()
+        for index, frame in enumerate(frames, 1):
+            await self.async_write(frame, acknowledged and index == len(frames))
+        _LOGGER.debug(
+            "Wrote %d frames in %.3fs%s",
+            len(frames),
+            time.monotonic() - start,
+            " without response" if self.without_response else "",
+        )
+
+    def _handle_notification(self, _: Any, data: bytearray) -> None:
+        """Decode a characteristic sent by the device and wake its reader."""
+        self.notifications += 1
+        frame = decrypt_characteristic(bytes(data), self.session_key)
+        decrypted = memoryview(frame)
+        _, characteristic = decode_header(decrypted)
+        requested = self._requested.pop(characteristic, None)
+        if self.trace is not None:
+            latency = None if requested is None else time.monotonic() - requested
+            self.trace.record(RX, frame, latency)
+        waiter = self._waiters.get(characteristic)
+        if waiter is None or waiter.done():
+            return
+        try:
+            _, values = decode_characteristic(decrypted)
+        except Exception as e:
+            if characteristic in self._collected:
+                _LOGGER.debug("Skipping frame of %s: %s", characteristic, e)
+            else:
+                waiter.set_exception(e)
+            return
+        if characteristic in INDEXED_CHARACTERISTICS:
+            self._collect(characteristic, waiter, values)
+        else:
+            waiter.set_result(values)
+
+    def _collect(
+        self,
+        characteristic: int,
+        waiter: asyncio.Future[dict[str, Any]],
+        values: dict[str, Any],
+    ) -> None:
+        """Merge a frame of an indexed characteristic, until no more arrive."""
+        collected, quiet = self._collected.get(characteristic, ({}, None))
+        if quiet is not None:
+            quiet.cancel()
+        collected.update(values)
+        quiet = asyncio.get_running_loop().call_later(
+            min(INDEXED_QUIET_SECONDS, self.watchdog.timeouts[READ] / 2),
+            self._collected_all,
+            characteristic,
+            waiter,
+        )
+        self._collected[characteristic] = (collected, quiet)
+
+    def _collected_all(
+        self, characteristic: int, waiter: asyncio.Future[dict[str, Any]]
+    ) -> None:
+        """Wake the reader of an indexed characteristic with all its frames."""
+        collected, _ = self._collected.pop(characteristic)
+        if not waiter.done():
+            waiter.set_result(collected)
+
+    async def async_request(self, characteristic: int) -> asyncio.Future:
+        """Request a characteristic and return the future of its values.
+
+        Indexed characteristics resolve to the merged values of all the
+        frames the device sends for them, once it sent no more for a moment.
+        The future fails with KeyError for characteristics without a parser.
+        """
+        if not self._notifying:
+            async with self.watchdog.phase(WRITE):
+                await self.client.start_notify(
+                    UUID_TX_CHARACTERISTIC, self._handle_notification
+                )
+            self._notifying = True
+
+        waiter: asyncio.Future[dict[str, Any]] = (
+            asyncio.get_running_loop().create_future()
+        )
+        if characteristic not in CHARACTERISTIC_PARSERS:
+            waiter.set_exception(KeyError(characteristic))
+            return waiter
+
+        def _remove_waiter(_: asyncio.Future) -> None:
+            if self._waiters.get(characteristic) is waiter:
+                del self._waiters[characteristic]
+                if characteristic in self._collected:
+                    # Given up on before the device was quiet
+                    self._collected.pop(characteristic)[1].cancel()
+
+        self._waiters[characteristic] = waiter
+        self._requested[characteristic] = time.monotonic()
+        waiter.add_done_callback(_remove_waiter)
+        await self.async_write(READ_REQUESTS[characteristic])
+        return waiter
+
+    async def async_read(self, characteristics: Iterable[int]) -> dict[str, Any]:
+        """Request characteristics and return their merged decoded values.
+
+        Characteristics that are not answered within the read deadline, or
+        fail to decode, are left out of the result.
+        """
+        result = await GatherEngine(self, watchdog=self.watchdog).async_gather(
+            characteristics
+        )
+        return result.data
+
+
+@asynccontextmanager
+async def async_hold_connection(chlorinator: Any) -> AsyncIterator[None]:
+    """Wait until no other session is connected, then hold the connection.
+
+    Library actions, and sessions of this module and of equilibrium, wait
+    until the connection is released again.
+    """
+    connector = get_connector(chlorinator)
+    connector.waiting += 1
+    try:
+        async with connector.watchdog.phase(WAIT):
+            if getattr(chlorinator, "_connected", False):
+                _LOGGER.debug("Already connected, Waiting")
+            while getattr(chlorinator, "_connected", False):
+                await asyncio.sleep(WAIT_INTERVAL)
+    finally:
+        connector.waiting -= 1
+
+    chlorinator._connected = True
+    try:
+        yield
+    finally:
+        chlorinator._connected = False
+
+
+async def _async_disconnect(client: BleakClient, watchdog: Watchdog) -> None:
+    """Disconnect, logging a failure rather than raising it."""
+    try:
+        async with watchdog.phase(DISCONNECT):
+            await client.disconnect()
+    except (PhaseTimeout, BleakError) as e:
+        # Left for the stack to drop, the session is done with it
+        _LOGGER.debug("Failed to disconnect: %s", e)
+
+
+async def _async_release(client: BleakClient, watchdog: Watchdog) -> None:
+    """Wait for the device to drop the link, disconnecting if it keeps it.
+
+    Like pychlorinator, the Halo is left to disconnect, as being disconnected
+    from can hang its Bluetooth.
+    """
+    try:
+        async with watchdog.phase(DROP):
+            while client.is_connected:
+                await asyncio.sleep(DROP_INTERVAL)
+    except PhaseTimeout as e:
+        _LOGGER.debug("Link was not dropped: %s", e)
+        await _async_disconnect(client, watchdog)
+
+
+@asynccontextmanager
+async def async_authenticated_session(
+    chlorinator: HaloChlorinatorAPI,
+) -> AsyncIterator[ChlorinatorSession]:
+    """Connect to the chlorinator and authenticate with its access code.
+
+    A phase that runs over its deadline raises PhaseTimeout, after the
+    connection has been released. A session that ends with an error, or
+    whose reads the device ignored, disconnects right away, so a retry is not
+    held up by a link in an unknown state. Otherwise the device is left to
+    drop the link.
+    """
+    connector = get_connector(chlorinator)
+    watchdog = connector.watchdog
+    async with async_hold_connection(chlorinator):
+        client = await connector.async_connect()
+        try:
+            async with watchdog.phase(SESSION_KEY):
+                session_key = await client.read_gatt_char(UUID_SLAVE_SESSION_KEY_2)
+            if _LOGGER.isEnabledFor(logging.DEBUG):
+                _LOGGER.debug("Got session key %s", session_key.hex())
+            chlorinator._session_key = session_key
+
+            mac = encrypt_mac_key(session_key, bytes(chlorinator._access_code, "utf_8"))
+            _LOGGER.debug("Mac key to write %s", mac)
+            async with watchdog.phase(AUTH):
+                await client.write_gatt_char(UUID_MASTER_AUTHENTICATION_2, mac)
+
+            session = ChlorinatorSession(client, session_key, connector.trace, watchdog)
+            yield session
+        except BaseException:
+            await _async_disconnect(client, watchdog)
+            raise
+        if session.ignored:
+            await _async_disconnect(client, watchdog)
+        else:
+            await _async_release(client, watchdog)
+
+
+async def async_write_frames(
+    chlorinator: HaloChlorinatorAPI, frames: list[bytes], read_back: bool = False
+) -> dict[str, Any]:
+    """Write command frames in one session.
+
+    The last frame is acknowledged, so a write that did not reach the device
+    raises. With read_back, the state characteristics affected by the frames
+    are then read before disconnecting and their decoded values returned. The
+    write went through if the read fails, so nothing is returned instead, and
+    callers refresh the state.
+    """
+    async with async_authenticated_session(chlorinator) as session:
+        await session.async_write_frames(frames)
+        if not read_back:
+            return {}
+        try:
+            return await session.async_read(confirm_characteristics(frames))
+        except Exception as e:
+            _LOGGER.debug("Failed to read back state: %s", e)
+            return {}
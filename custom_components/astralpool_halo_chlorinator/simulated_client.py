@@ -0,0 +1,129 @@
+"""Simulated Bleak client of a simulated Halo chlorinator.
+
+Speaks the encrypted GATT protocol of a Halo chlorinator on top of the
+simulator, so sessions and the connector run against it as they would
+against a real device.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Any
+
+from pychlorinator.halochlorinator import decrypt_characteristic
+from pychlorinator.halochlorinator import encrypt_characteristic
+from pychlorinator.halochlorinator import encrypt_mac_key
+from pychlorinator.halochlorinator import UUID_MASTER_AUTHENTICATION_2
+from pychlorinator.halochlorinator import UUID_RX_CHARACTERISTIC
+from pychlorinator.halochlorinator import UUID_SLAVE_SESSION_KEY_2
+
+from .codec import COMMAND
+from .codec import decode_header
+from .codec import READ_REQUEST
+from .simulator import SimulatedChlorinator
+
+
+class SimulatedServices:
+    """The GATT services of a simulated chlorinator."""
+
+    def get_characteristic(self, uuid: str) -> SimulatedCharacteristic | None:
+        """Return the characteristic with the UUID, if the device has it."""
+        if uuid != UUID_RX_CHARACTERISTIC:
+            return None
+        return SimulatedCharacteristic()
+
+
+class SimulatedCharacteristic:
+    """The RX characteristic of a simulated chlorinator."""
+
+    properties = ["write", "write-without-response"]
+
+
+class SimulatedClient:
+    """A Bleak client connected to a simulated chlorinator.
+
+    Hands out a session key, and once the access code is proven applies the
+    command frames written to it and answers read requests with encrypted
+    notifications. Read requests written before that are ignored, like a
+    real device does. The link is dropped by the device once it has been
+    idle for the drop delay of the chlorinator after authentication.
+    """
+
+    mtu_size = 23
+    used_cached_services = False
+
+    def __init__(self, chlorinator: SimulatedChlorinator) -> None:
+        """Initialise the client."""
+        self.chlorinator = chlorinator
+        self.services = SimulatedServices()
+        self.is_connected = True
+        self.authenticated = False
+        self.session_key = bytes(range(16))
+        self._notify: Any = None
+        self._drop: asyncio.TimerHandle | None = None
+
+    async def read_gatt_char(self, uuid: str) -> bytes:
+        """Read a GATT characteristic, only the session key can be read."""
+        assert uuid == UUID_SLAVE_SESSION_KEY_2
+        return self.session_key
+
+    async def write_gatt_char(
+        self, uuid: str, data: bytes, response: bool | None = None
+    ) -> None:
+        """Authenticate, or apply a frame written to the RX characteristic."""
+        if uuid == UUID_MASTER_AUTHENTICATION_2:
+            self.authenticated = data == encrypt_mac_key(
+                self.session_key, self.chlorinator.access_code.encode()
+            )
+            if self.authenticated:
+                self._active()
+            return
+        assert uuid == UUID_RX_CHARACTERISTIC
+        if not self.authenticated:
+            return
+        self._active()
+        frame = decrypt_characteristic(data, self.session_key)
+        frame_type, characteristic = decode_header(frame)
+        if frame_type == COMMAND:
+            self.chlorinator.apply(frame)
+        elif frame_type == READ_REQUEST and characteristic in self.chlorinator.frames:
+            asyncio.get_running_loop().call_later(
+                self.chlorinator.answer_delay, self._answer, characteristic
+            )
+
+    def _answer(self, characteristic: int) -> None:
+        """Send a characteristic that was requested, a frame per output."""
+        if self.is_connected:
+            for frame in self.chlorinator.answers(characteristic):
+                self.send(frame)
+
+    def _active(self) -> None:
+        """Keep the link for the drop delay from now on."""
+        if self._drop is not None:
+            self._drop.cancel()
+        self._drop = asyncio.get_running_loop().call_later(
+            self.chlorinator.drop_delay, self._dropped
+        )
+
+    def _dropped(self) -> None:
+        """Drop the idle link, as the device does."""
+        self.is_connected = False
+
+    def send(self, frame: bytes) -> None:
+        """Encrypt a frame and send it as a notification."""
+        if self.authenticated:
+            self._active()
+        if self._notify is not None:
+            self._notify(
+                None, bytearray(encrypt_characteristic(frame, self.session_key))
+            )
+
+    async def start_notify(self, uuid: str, callback: Any) -> None:
+        """Send notifications to the callback."""
+        self._notify = callback
+
+    async def disconnect(self) -> None:
+        """Drop the connection."""
+        if self._drop is not None:
+            self._drop.cancel()
+        self.is_connected = False
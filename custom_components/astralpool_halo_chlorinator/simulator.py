@@ -0,0 +1,271 @@
+"""Simulated Halo chlorinator.
+
+Keeps a raw frame for every characteristic and answers read requests with
+them after a delay, decoded by the same parsers as frames from a real device.
+Indexed characteristics have a frame per output, and are answered with all
+of them, like a real device does.
+Command frames change the mode bytes of the frames they affect, so writes
+can be read back. Used to run the engine and the command line without a
+device. Sessions and the connector run against it through the simulated
+Bleak client in simulated_client.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import struct
+from collections.abc import AsyncIterator
+from collections.abc import Iterable
+from contextlib import asynccontextmanager
+from typing import Any
+from typing import TYPE_CHECKING
+
+from pychlorinator import halo_parsers
+
+from .codec import CHARACTERISTIC_PARSERS
+from .codec import CHLORINATOR_COMMAND
+from .codec import decode_action
+from .codec import decode_characteristic
+from .codec import FRAME_LENGTH
+from .codec import GPO_COMMAND
+from .codec import GPOAppActions
+from .codec import HEADER
+from .codec import HEATER_COMMAND
+from .codec import INDEXED_CHARACTERISTICS
+from .codec import LIGHT_COMMAND
+from .codec import PAYLOAD
+from .codec import SOLAR_COMMAND
+from .watchdog import Watchdog
+
+if TYPE_CHECKING:
+    from .simulated_client import SimulatedClient
+
+# Seconds the simulated device takes to answer a read request
+ANSWER_DELAY = 0.02
+
+# Seconds the simulated device keeps an idle link once authenticated
+DROP_DELAY = 0.1
+
+# Frame type of the characteristics sent by the simulated device
+NOTIFICATION = 0
+
+ACCESS_CODE = "1234"
+
+# Mode byte values, as decoded by halo_parsers.Mode
+OFF, AUTO, ON = 0, 1, 2
+
+CHLORINATOR_MODES = {
+    halo_parsers.ChlorinatorActions.Off: OFF,
+    halo_parsers.ChlorinatorActions.Auto: AUTO,
+    halo_parsers.ChlorinatorActions.On: ON,
+    halo_parsers.ChlorinatorActions.Low: ON,
+    halo_parsers.ChlorinatorActions.Medium: ON,
+    halo_parsers.ChlorinatorActions.High: ON,
+}
+PUMP_SPEEDS = {
+    halo_parsers.ChlorinatorActions.Low: 0,
+    halo_parsers.ChlorinatorActions.Medium: 1,
+    halo_parsers.ChlorinatorActions.High: 2,
+}
+LIGHT_MODES = {
+    halo_parsers.LightAppActions.TurnOffZone: OFF,
+    halo_parsers.LightAppActions.SetZoneModeToAuto: AUTO,
+    halo_parsers.LightAppActions.TurnOnZone: ON,
+}
+HEATER_MODES = {
+    halo_parsers.HeaterAppActions.HeaterOff: 0,
+    halo_parsers.HeaterAppActions.HeaterOn: 1,
+}
+SOLAR_MODES = {
+    halo_parsers.SolarAppActions.Off: OFF,
+    halo_parsers.SolarAppActions.Auto: AUTO,
+    halo_parsers.SolarAppActions.On: ON,
+}
+GPO_MODES = {
+    GPOAppActions.Off: OFF,
+    GPOAppActions.Auto: AUTO,
+    GPOAppActions.On: ON,
+}
+
+GPO_DEVICE_TYPES = halo_parsers.GPOSetupCharacteristic.GPODeviceTypeValues
+GPO_NAMES = halo_parsers.GPOSetupCharacteristic.GPONameValues
+
+# Outputs of the indexed characteristics, each with a frame of its own
+GPO_OUTLETS = 4
+RELAYS = 2
+VALVES = 2
+
+
+class SimulatedChlorinator:
+    """A Halo chlorinator held in memory."""
+
+    tiered = True
+
+    def __init__(
+        self,
+        answer_delay: float = ANSWER_DELAY,
+        zones: int = 2,
+        access_code: str = ACCESS_CODE,
+        drop_delay: float = DROP_DELAY,
+    ) -> None:
+        """Initialise the chlorinator with a pool in Auto mode."""
+        self.answer_delay = answer_delay
+        self.drop_delay = drop_delay
+        self.access_code = access_code
+        self.frames: dict[int, bytearray] = {
+            characteristic: bytearray(
+                HEADER.pack(NOTIFICATION, characteristic)
+                + bytes(FRAME_LENGTH - HEADER.size)
+            )
+            for characteristic in CHARACTERISTIC_PARSERS
+        }
+        # Frames of the outputs after the first, of indexed characteristics
+        self.more_frames: dict[int, list[bytearray]] = {
+            characteristic: [] for characteristic in INDEXED_CHARACTERISTICS
+        }
+        self.connections = 0
+        self.written: list[bytes] = []
+        self.watchdog = Watchdog()
+
+        # Temperatures and measurements are sent in tenths
+        self.set(9, 4, "H", 265)
+        self.set(104, 1, "B", 60)
+        self.set(104, 6, "H", 650)
+        self.set(104, 9, "B", 74)
+        # Equipment enabled, pump in Auto, GPO1 in Auto
+        self.set(201, 0, "B", 1)
+        self.set(201, 1, "B", AUTO)
+        self.set(201, 2, "B", AUTO)
+        self.set(202, 0, "B", 1)
+        # Lighting enabled on the zones in use
+        self.set(301, 0, "B", 1)
+        self.set(301, 3, "B", zones)
+        self.set(1100, 0, "B", 1)
+        self.set(1200, 0, "B", 1)
+        self.set(1202, 7, "B", AUTO)
+        # Outlets enabled, two on each of the two Connect devices
+        for outlet in range(GPO_OUTLETS):
+            device_type = GPO_DEVICE_TYPES.Connect1.value + outlet // 2
+            self.set(1300, 0, "B", device_type, index=outlet)
+            self.set(1300, 1, "B", outlet % 2, index=outlet)
+            self.set(1300, 2, "B", 1, index=outlet)
+            name = GPO_NAMES.CleaningPump.value + outlet
+            self.set(1300, 4, "B", name, index=outlet)
+        # Relays and valves, disabled
+        for relay in range(RELAYS):
+            self.set(1301, 0, "B", relay, index=relay)
+            self.set(1301, 2, "B", relay, index=relay)
+        for valve in range(VALVES):
+            self.set(1302, 0, "B", valve, index=valve)
+
+    def frame(self, characteristic: int, index: int = 0) -> bytearray:
+        """Return the frame of a characteristic, for the output at index."""
+        if index == 0:
+            return self.frames[characteristic]
+        more = self.more_frames[characteristic]
+        while len(more) < index:
+            header = self.frames[characteristic][: PAYLOAD.start]
+            more.append(header + bytes(FRAME_LENGTH - PAYLOAD.start))
+        return more[index - 1]
+
+    def answers(self, characteristic: int) -> list[bytes]:
+        """Return the frames sent for a read request of a characteristic."""
+        return [
+            bytes(self.frames[characteristic]),
+            *map(bytes, self.more_frames.get(characteristic, ())),
+        ]
+
+    def set(
+        self, characteristic: int, offset: int, fmt: str, value: int, index: int = 0
+    ) -> None:
+        """Set a field of a characteristic, at an offset into its payload.
+
+        Fields of indexed characteristics are set in the frame of the output
+        at index.
+        """
+        struct.pack_into(
+            f"<{fmt}", self.frame(characteristic, index), PAYLOAD.start + offset, value
+        )
+
+    def values(self, characteristic: int) -> dict[str, Any]:
+        """Return the decoded values of a characteristic, of all its frames."""
+        values: dict[str, Any] = {}
+        for frame in self.answers(characteristic):
+            values.update(decode_characteristic(frame)[1])
+        return values
+
+    def apply(self, frame: bytes) -> None:
+        """Apply a command frame to the state."""
+        self.written.append(frame)
+        command, action, argument = decode_action(frame)
+        if command == CHLORINATOR_COMMAND and action in CHLORINATOR_MODES:
+            self.set(201, 1, "B", CHLORINATOR_MODES[action])
+            if action in PUMP_SPEEDS:
+                self.set(202, 0, "B", PUMP_SPEEDS[action])
+        elif command == LIGHT_COMMAND and action in LIGHT_MODES:
+            self.set(300, argument, "B", LIGHT_MODES[action])
+        elif command == HEATER_COMMAND and action in HEATER_MODES:
+            self.set(1102, 2, "B", HEATER_MODES[action])
+        elif command == SOLAR_COMMAND and action in SOLAR_MODES:
+            self.set(1202, 7, "B", SOLAR_MODES[action])
+        elif command == GPO_COMMAND and action in GPO_MODES:
+            self.set(201, 2 + argument, "B", GPO_MODES[action])
+
+    async def async_gather_all(self) -> dict[str, Any]:
+        """Gather every characteristic, one after the other like the library."""
+        self.connections += 1
+        data: dict[str, Any] = {}
+        for characteristic in self.frames:
+            await asyncio.sleep(self.answer_delay)
+            data.update(self.values(characteristic))
+        return data
+
+    @asynccontextmanager
+    async def session(self) -> AsyncIterator[SimulatedSession]:
+        """Open a session with the simulated chlorinator."""
+        self.connections += 1
+        yield SimulatedSession(self)
+
+    def client(self) -> SimulatedClient:
+        """Return a new Bleak client connected to the simulated chlorinator.
+
+        Imported here, so simulated runs that do not connect leave Bleak
+        unloaded.
+        """
+        from .simulated_client import SimulatedClient
+
+        self.connections += 1
+        return SimulatedClient(self)
+
+
+class SimulatedSession:
+    """A session with a simulated chlorinator."""
+
+    # The simulated chlorinator answers every session
+    silent = False
+
+    def __init__(self, chlorinator: SimulatedChlorinator) -> None:
+        """Initialise the session."""
+        self.chlorinator = chlorinator
+
+    async def async_write_frames(
+        self, frames: Iterable[bytes], acknowledged: bool = True
+    ) -> None:
+        """Apply command frames in order."""
+        for frame in frames:
+            self.chlorinator.apply(frame)
+
+    async def async_request(self, characteristic: int) -> asyncio.Future:
+        """Request a characteristic and return the future of its values."""
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future[dict[str, Any]] = loop.create_future()
+        if characteristic not in self.chlorinator.frames:
+            future.set_exception(KeyError(characteristic))
+            return future
+
+        def _answer() -> None:
+            if not future.done():
+                future.set_result(self.chlorinator.values(characteristic))
+
+        loop.call_later(self.chlorinator.answer_delay, _answer)
+        return future
@@ -0,0 +1,196 @@
+"""Long-term statistics backfill for the chlorinator daily counters.
+
+The chlorinator only reports daily figures for "today" (running totals that
+reset at midnight) and "yesterday" (``PreviousDaysCellLoad``). Recording those
+as entity states stores one row per poll while only one value per day is
+meaningful, and a day that Home Assistant was not running for never makes it
+into history. This module turns the counters into one external statistic row
+per day and imports them in batches, skipping days that are already stored.
+The running totals are kept in storage, so a day is not lost when Home
+Assistant restarts during it.
+"""
+
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from datetime import timedelta
+from typing import Any
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+from homeassistant.util import slugify
+
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION = 1
+
+# Seconds the running totals are saved after, at most
+SAVE_DELAY = 300
+
+
+@dataclass(frozen=True)
+class DailyStatistic:
+    """Description of a daily counter reported by the chlorinator."""
+
+    key: str
+    name: str
+    unit: str | None
+    # True if the device reports the value for the previous day, False if it
+    # reports a running total for the current day that resets at midnight.
+    previous_day: bool
+
+
+DAILY_STATISTICS: tuple[DailyStatistic, ...] = (
+    DailyStatistic("PreviousDaysCellLoad", "Cell load", "%", True),
+    DailyStatistic("DosingPumpSecs", "Dosing pump", "mL", False),
+    DailyStatistic("FilterPumpMins", "Filter pump run time", "min", False),
+)
+
+
+class DailyStatisticsImporter:
+    """Collect daily counters from gathers and import them as statistics."""
+
+    def __init__(self, hass: HomeAssistant, address: str) -> None:
+        """Initialise the importer for the chlorinator at address."""
+        self.hass = hass
+        self._object_prefix = slugify(address)
+        # Last value seen for the "today" counters, keyed by statistic key.
+        self._running: dict[str, tuple[datetime, float]] = {}
+        # Rows waiting to be imported, keyed by statistic id then day start.
+        self._pending: dict[str, dict[datetime, float]] = {}
+        # Start of the newest row known to be stored, keyed by statistic id.
+        self._last_stored: dict[str, datetime | None] = {}
+        self._store: Store[dict[str, Any]] = Store(
+            hass, STORAGE_VERSION, f"{DOMAIN}.{self._object_prefix}_statistics"
+        )
+        self._loaded = False
+
+    def statistic_id(self, statistic: DailyStatistic) -> str:
+        """Return the external statistic id for a counter."""
+        return f"{DOMAIN}:{self._object_prefix}_{slugify(statistic.key)}"
+
+    async def async_load(self) -> None:
+        """Restore the running totals saved before a restart, once."""
+        if self._loaded:
+            return
+        self._loaded = True
+        stored = await self._store.async_load() or {}
+        for key, (start, value) in stored.get("running", {}).items():
+            if (day := dt_util.parse_datetime(start)) is not None:
+                self._running.setdefault(key, (day, value))
+
+    def _data_to_save(self) -> dict[str, Any]:
+        """Return the running totals to save."""
+        return {
+            "running": {
+                key: (start.isoformat(), value)
+                for key, (start, value) in self._running.items()
+            }
+        }
+
+    async def async_save(self) -> None:
+        """Save the running totals now, rather than after the delay."""
+        if self._running:
+            await self._store.async_save(self._data_to_save())
+
+    def collect(self, data: dict[str, Any], now: datetime | None = None) -> None:
+        """Queue the daily rows that can be derived from a gather."""
+        now = now or dt_util.now()
+        today = dt_util.start_of_local_day(now)
+        yesterday = dt_util.start_of_local_day(today - timedelta(hours=12))
+
+        running = False
+        for statistic in DAILY_STATISTICS:
+            value = data.get(statistic.key)
+            if not isinstance(value, (int, float)):
+                continue
+            statistic_id = self.statistic_id(statistic)
+            if statistic.previous_day:
+                self._queue(statistic_id, yesterday, value)
+                continue
+
+            # The running total for a day is final once a later day is seen.
+            previous = self._running.get(statistic.key)
+            if previous is not None and previous[0] < today:
+                self._queue(statistic_id, previous[0], previous[1])
+            self._running[statistic.key] = (today, value)
+            running = True
+        if running:
+            self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+
+    def _queue(self, statistic_id: str, start: datetime, value: float) -> None:
+        """Queue a row unless a row for that day is already stored."""
+        last_stored = self._last_stored.get(statistic_id)
+        if last_stored is not None and start <= last_stored:
+            return
+        self._pending.setdefault(statistic_id, {})[start] = float(value)
+
+    async def async_flush(self) -> None:
+        """Import all queued rows, one batch per statistic."""
+        if not self._pending or "recorder" not in self.hass.config.components:
+            return
+
+        from homeassistant.components.recorder.models import StatisticData
+        from homeassistant.components.recorder.models import StatisticMetaData
+        from homeassistant.components.recorder.statistics import (
+            async_add_external_statistics,
+        )
+
+        for statistic in DAILY_STATISTICS:
+            statistic_id = self.statistic_id(statistic)
+            rows = self._pending.pop(statistic_id, None)
+            if not rows:
+                continue
+
+            if statistic_id not in self._last_stored:
+                self._last_stored[statistic_id] = await self._async_last_stored(
+                    statistic_id
+                )
+            last_stored = self._last_stored[statistic_id]
+            starts = sorted(
+                start for start in rows if last_stored is None or start > last_stored
+            )
+            if not starts:
+                continue
+
+            metadata = StatisticMetaData(
+                has_mean=True,
+                has_sum=False,
+                name=statistic.name,
+                source=DOMAIN,
+                statistic_id=statistic_id,
+                unit_of_measurement=statistic.unit,
+            )
+            statistics = [
+                StatisticData(
+                    start=start,
+                    mean=rows[start],
+                    min=rows[start],
+                    max=rows[start],
+                    state=rows[start],
+                )
+                for start in starts
+            ]
+            _LOGGER.debug("Importing %d rows for %s", len(statistics), statistic_id)
+            async_add_external_statistics(self.hass, metadata, statistics)
+            self._last_stored[statistic_id] = starts[-1]
+
+    async def _async_last_stored(self, statistic_id: str) -> datetime | None:
+        """Return the start of the newest stored row for a statistic."""
+        from homeassistant.components.recorder import get_instance
+        from homeassistant.components.recorder.statistics import get_last_statistics
+
+        last = await get_instance(self.hass).async_add_executor_job(
+            get_last_statistics, self.hass, 1, statistic_id, False, {"mean"}
+        )
+        if not last.get(statistic_id):
+            return None
+        start = last[statistic_id][0]["start"]
+        if isinstance(start, datetime):
+            return start
+        return dt_util.utc_from_timestamp(start)
@@ -0,0 +1,101 @@
+"""Bounded trace of recent protocol frames.
+
+Every frame written to or received from the chlorinator over a session is
+kept, decrypted, in a ring buffer. Recording only appends a tuple, so it is
+cheap enough to leave on; frames are decoded when the trace is dumped for
+diagnostics. Received frames of characteristics that carry the serial number
+or the settings of the device are dumped without their payload.
+"""
+
+from __future__ import annotations
+
+import time
+from collections import deque
+from typing import Any
+
+from .codec import COMMAND
+from .codec import decode_action
+from .codec import decode_characteristic
+from .codec import decode_header
+from .codec import READ_REQUEST
+
+# Frames kept in the trace
+TRACE_SIZE = 200
+
+# Values shown in the summary of a received characteristic
+SUMMARY_VALUES = 6
+
+TX = "tx"
+RX = "rx"
+
+# Characteristics whose payload is left out of a dump: the device profile
+# carries the serial number, and the settings the configuration of the pool
+PRIVATE_CHARACTERISTICS = frozenset({1, 100})
+
+# Shown instead of the payload of a private characteristic, like
+# homeassistant.components.diagnostics does for redacted values
+REDACTED = "**REDACTED**"
+
+
+def _summarize(direction: str, frame: bytes) -> str:
+    """Return a short description of a frame."""
+    frame_type, _ = decode_header(frame)
+    if direction == TX and frame_type == READ_REQUEST:
+        return "read request"
+    if direction == TX and frame_type == COMMAND:
+        _, action, argument = decode_action(frame)
+        return f"action {action} argument {argument}"
+    _, values = decode_characteristic(frame)
+    summary = ", ".join(
+        f"{key}={getattr(value, 'name', value)}"
+        for key, value in list(values.items())[:SUMMARY_VALUES]
+    )
+    if len(values) > SUMMARY_VALUES:
+        summary += f", ... ({len(values)} values)"
+    return summary
+
+
+class ProtocolTrace:
+    """Ring buffer of the most recent frames exchanged with the chlorinator."""
+
+    def __init__(self, size: int = TRACE_SIZE) -> None:
+        """Initialise the trace."""
+        self._frames: deque[tuple[float, str, bytes, float | None]] = deque(maxlen=size)
+
+    def __len__(self) -> int:
+        """Return the number of frames in the trace."""
+        return len(self._frames)
+
+    def record(self, direction: str, frame: bytes, latency: float | None = None):
+        """Record a decrypted frame, with the time it took to be answered."""
+        self._frames.append((time.time(), direction, frame, latency))
+
+    def clear(self) -> None:
+        """Remove every frame from the trace."""
+        self._frames.clear()
+
+    def dump(self) -> list[dict[str, Any]]:
+        """Return the frames in the trace, oldest first, decoded."""
+        records = []
+        for timestamp, direction, frame, latency in self._frames:
+            _, characteristic = decode_header(frame)
+            if direction == RX and characteristic in PRIVATE_CHARACTERISTICS:
+                summary = hexed = REDACTED
+            else:
+                try:
+                    summary = _summarize(direction, frame)
+                except Exception as e:
+                    summary = f"undecodable: {e!r}"
+                hexed = frame.hex()
+            records.append(
+                {
+                    "timestamp": timestamp,
+                    "direction": direction,
+                    "characteristic": characteristic,
+                    "length": len(frame),
+                    "latency": latency,
+                    "summary": summary,
+                    "frame": hexed,
+                }
+            )
+        return records
@@ -0,0 +1,104 @@
+"""Deadlines for each phase of talking to a chlorinator.
+
+A BLE operation that hangs would otherwise hold the connection until Home
+Assistant gives up on the whole update, with writes queued behind it. Every
+phase of a session runs under its own deadline instead: waiting for the
+connection to be free, connecting, reading the session key, authenticating,
+each characteristic read, each command write, waiting for the device to
+drop the link and disconnecting. A phase that runs over is cancelled, raises
+PhaseTimeout and is recorded, so the connection is released and the breaches
+show up in diagnostics and metrics.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import deque
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from typing import Any
+
+_LOGGER = logging.getLogger(__name__)
+
+WAIT = "wait"
+CONNECT = "connect"
+SESSION_KEY = "session_key"
+AUTH = "auth"
+READ = "read"
+WRITE = "write"
+DROP = "drop"
+DISCONNECT = "disconnect"
+
+# Seconds each phase may take. A connect covers the retries on one adapter or
+# proxy. The device is given as long to drop the link as pychlorinator gives
+# it.
+PHASE_TIMEOUTS: dict[str, float] = {
+    WAIT: 90,
+    CONNECT: 40,
+    SESSION_KEY: 5,
+    AUTH: 5,
+    READ: 5,
+    WRITE: 5,
+    DROP: 15,
+    DISCONNECT: 5,
+}
+
+# Breaches kept for diagnostics
+RECENT_BREACHES = 20
+
+
+class PhaseTimeout(asyncio.TimeoutError):
+    """A phase of talking to the chlorinator ran over its deadline."""
+
+    def __init__(self, phase: str, seconds: float) -> None:
+        """Initialise the error."""
+        super().__init__(f"{phase} took longer than {seconds}s")
+        self.phase = phase
+        self.seconds = seconds
+
+
+class Watchdog:
+    """Run phases under their deadline and record the ones that ran over."""
+
+    def __init__(self, timeouts: dict[str, float] | None = None) -> None:
+        """Initialise the watchdog, overriding some of the default deadlines."""
+        self.timeouts = {**PHASE_TIMEOUTS, **(timeouts or {})}
+        self.breaches: dict[str, int] = dict.fromkeys(self.timeouts, 0)
+        self._recent: deque[tuple[float, str]] = deque(maxlen=RECENT_BREACHES)
+
+    def record(self, phase: str) -> None:
+        """Record a phase that ran over its deadline."""
+        _LOGGER.debug("%s ran over its deadline of %ss", phase, self.timeouts[phase])
+        self.breaches[phase] += 1
+        self._recent.append((time.time(), phase))
+
+    @asynccontextmanager
+    async def phase(self, phase: str) -> AsyncIterator[None]:
+        """Run the body as a phase, cancelling it when the deadline passes.
+
+        Raises PhaseTimeout if it ran over. Timeouts raised by the body
+        itself are passed on as they are.
+        """
+        seconds = self.timeouts[phase]
+        timeout = asyncio.timeout(seconds)
+        try:
+            async with timeout:
+                yield
+        except TimeoutError as e:
+            if not timeout.expired():
+                raise
+            self.record(phase)
+            raise PhaseTimeout(phase, seconds) from e
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the deadlines and breaches for diagnostics."""
+        return {
+            "timeouts": self.timeouts,
+            "breaches": self.breaches,
+            "recent": [
+                {"timestamp": timestamp, "phase": phase}
+                for timestamp, phase in self._recent
+            ],
+        }
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Round-trip tests and throughput benchmarks for the protocol codec.
+
+Every precomputed command frame is checked against the frame pychlorinator
+builds for the same action, and decoded back. Characteristics are decoded
+from both bytes and memoryviews.
+"""
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from pychlorinator import halo_parsers  # noqa: E402
+
+from custom_components.astralpool_halo_chlorinator.codec import (  # noqa: E402
+    CHARACTERISTIC_PARSERS,
+    CHLORINATOR_COMMAND,
+    CHLORINATOR_FRAMES,
+    COMMAND,
+    decode_action,
+    decode_characteristic,
+    decode_header,
+    encode_action,
+    FRAME_LENGTH,
+    GPO_COMMAND,
+    GPO_FRAMES,
+    GPOAppActions,
+    HEATER_COMMAND,
+    HEATER_FRAMES,
+    LIGHT_COMMAND,
+    LIGHT_FRAMES,
+    READ_REQUEST,
+    READ_REQUESTS,
+    SOLAR_COMMAND,
+    SOLAR_FRAMES,
+)
+from custom_components.astralpool_halo_chlorinator.gpo_helper import (  # noqa: E402
+    GPOAction,
+)
+
+# Minimum throughput, in frames per second, on a slow host
+MIN_DECODE_RATE = 2_000
+
+
+def test_chlorinator_frames():
+    """Test chlorinator frames match pychlorinator and round-trip."""
+    assert len(CHLORINATOR_FRAMES) == len(halo_parsers.ChlorinatorActions)
+    for action, frame in CHLORINATOR_FRAMES.items():
+        assert frame == bytes(halo_parsers.ChlorinatorAction(action))
+        assert decode_action(frame) == (CHLORINATOR_COMMAND, action, 0)
+
+    action = halo_parsers.ChlorinatorActions.DisableAcidDosingForPeriod
+    frame = encode_action(CHLORINATOR_COMMAND, action, 90)
+    assert frame == bytes(halo_parsers.ChlorinatorAction(action, 90))
+    assert decode_action(memoryview(frame)) == (CHLORINATOR_COMMAND, action, 90)
+
+
+def test_heater_and_solar_frames():
+    """Test heater and solar frames match pychlorinator and round-trip."""
+    for action, frame in HEATER_FRAMES.items():
+        assert frame == bytes(halo_parsers.HeaterAction(action))
+        assert decode_action(frame) == (HEATER_COMMAND, action, 0)
+    for action, frame in SOLAR_FRAMES.items():
+        assert frame == bytes(halo_parsers.SolarAction(action))
+        assert decode_action(frame) == (SOLAR_COMMAND, action, 0)
+
+
+def test_light_frames():
+    """Test light frames for every zone match pychlorinator and round-trip."""
+    assert len(LIGHT_FRAMES) == len(halo_parsers.LightAppActions) * 4
+    for (action, zone), frame in LIGHT_FRAMES.items():
+        assert frame == bytes(halo_parsers.LightAction(action, zone - 1))
+        assert decode_action(frame) == (LIGHT_COMMAND, action, zone - 1)
+
+
+def test_gpo_frames():
+    """Test all 4x4 GPO frames round-trip and match GPOAction."""
+    assert len(GPO_FRAMES) == 16
+    for (action, gpo_number), frame in GPO_FRAMES.items():
+        assert len(frame) == FRAME_LENGTH
+        assert frame[:3] == b"\x03\xf8\x01"
+        assert bytes(GPOAction(action, gpo_number)) == frame
+        assert decode_action(frame) == (GPO_COMMAND, action, gpo_number - 1)
+
+    # Frames with a custom header are still encoded
+    frame = bytes(GPOAction(GPOAppActions.On, 2, b"\x03\xf9\x01"))
+    assert frame == b"\x03\xf9\x01\x03\x01" + bytes(15)
+
+
+def test_read_requests():
+    """Test read requests for every parsed characteristic round-trip."""
+    for characteristic, frame in READ_REQUESTS.items():
+        assert len(frame) == FRAME_LENGTH
+        assert decode_header(frame) == (READ_REQUEST, characteristic)
+
+
+def test_decode_characteristics():
+    """Test characteristics decode the same from bytes and memoryviews."""
+    for characteristic, parser in CHARACTERISTIC_PARSERS.items():
+        payload = bytes(FRAME_LENGTH - 3)
+        frame = bytes([COMMAND]) + characteristic.to_bytes(2, "little") + payload
+        expected = vars(parser(payload))
+        assert decode_characteristic(frame) == (characteristic, expected)
+        assert decode_characteristic(memoryview(frame)) == (characteristic, expected)
+
+
+def benchmark(statement, number: int = 10_000) -> float:
+    """Return the number of statement runs per second."""
+    best = min(timeit.repeat(statement, number=number, repeat=3))
+    return number / best
+
+
+def test_encode_throughput():
+    """Benchmark precomputed frames against building pychlorinator actions."""
+    action = GPOAppActions.On
+    lookup = benchmark(lambda: GPO_FRAMES[action, 3])
+    library = benchmark(
+        lambda: bytes(halo_parsers.LightAction(halo_parsers.LightAppActions.TurnOnZone))
+    )
+    print(f"Encode: {lookup:,.0f} frames/s precomputed, {library:,.0f} built")
+    assert lookup > library
+
+
+def test_decode_throughput():
+    """Benchmark decoding an equipment mode characteristic from a memoryview."""
+    frame = memoryview(b"\x03\xc9\x00" + bytes(FRAME_LENGTH - 3))
+    rate = benchmark(lambda: decode_characteristic(frame))
+    print(f"Decode: {rate:,.0f} frames/s (minimum {MIN_DECODE_RATE:,})")
+    assert rate > MIN_DECODE_RATE
+
+
+if __name__ == "__main__":
+    test_chlorinator_frames()
+    test_heater_and_solar_frames()
+    test_light_frames()
+    test_gpo_frames()
+    test_read_requests()
+    test_decode_characteristics()
+    test_encode_throughput()
+    test_decode_throughput()
+    print("✓ Codec checks passed!")
@@ -0,0 +1,353 @@
+#!/usr/bin/env python3
+"""
+Test script for pairing several chlorinators and keeping them apart.
+
+Runs the bulk pairing flow in a real Home Assistant core, with stand-ins for
+the Bluetooth manager, the adverts and the HTTP server, and connections to
+simulated chlorinators. Checks every paired
+chlorinator gets an entry with its own device and entities, and that entries
+of the previous version keep their entities, without requiring a real device.
+"""
+
+import asyncio
+import logging
+import os
+import struct
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bleak.backends.device import BLEDevice  # noqa: E402
+from bluetooth_data_tools import human_readable_name  # noqa: E402
+
+# The core has to be imported before the loader
+from homeassistant.core import HomeAssistant  # noqa: E402
+
+from homeassistant import bootstrap  # noqa: E402
+from homeassistant import loader  # noqa: E402
+from homeassistant.components.bluetooth import BluetoothServiceInfoBleak  # noqa: E402
+from homeassistant.components.bluetooth.const import DATA_MANAGER  # noqa: E402
+from homeassistant.config_entries import ConfigEntries  # noqa: E402
+from homeassistant.config_entries import ConfigEntry  # noqa: E402
+from homeassistant.config_entries import ConfigEntryState  # noqa: E402
+from homeassistant.const import CONF_ACCESS_TOKEN  # noqa: E402
+from homeassistant.const import CONF_ADDRESS  # noqa: E402
+from homeassistant.data_entry_flow import FlowResultType  # noqa: E402
+from homeassistant.helpers import device_registry as dr  # noqa: E402
+from homeassistant.helpers import entity_registry as er  # noqa: E402
+from pychlorinator.halo_parsers import DeviceType  # noqa: E402
+
+from custom_components.astralpool_halo_chlorinator import config_flow  # noqa: E402
+from custom_components.astralpool_halo_chlorinator import connector  # noqa: E402
+from custom_components.astralpool_halo_chlorinator import device_trigger  # noqa: E402
+from custom_components.astralpool_halo_chlorinator.const import DOMAIN  # noqa: E402
+from custom_components.astralpool_halo_chlorinator.const import (  # noqa: E402
+    MANUFACTURER_ID,
+)
+from custom_components.astralpool_halo_chlorinator.events import (  # noqa: E402
+    EVENT_TYPE,
+)
+from custom_components.astralpool_halo_chlorinator.simulator import (  # noqa: E402
+    SimulatedChlorinator,
+)
+
+ADDRESSES = ("AA:BB:CC:DD:EE:01", "AA:BB:CC:DD:EE:02", "AA:BB:CC:DD:EE:03")
+
+
+class Chlorinators:
+    """Simulated chlorinators, connected to through the shared connector."""
+
+    def __init__(self, access_codes):
+        self.simulated = {
+            address: SimulatedChlorinator(answer_delay=0, access_code=access_code)
+            for address, access_code in access_codes.items()
+        }
+
+    async def establish_connection(self, client_class, device, name, max_attempts):
+        return self.simulated[device.address].client()
+
+
+class BluetoothManager:
+    """Stand-in for the Bluetooth manager, seeing every chlorinator."""
+
+    def async_ble_device_from_address(self, address, connectable):
+        return BLEDevice(address, "HCHLOR", {})
+
+    def async_scanner_devices_by_address(self, address, connectable):
+        return []
+
+
+class HTTP:
+    """Stand-in for the HTTP server."""
+
+    def register_view(self, view):
+        pass
+
+
+class Adverts:
+    """Stand-in for the adverts seen by Home Assistant."""
+
+    def __init__(self, addresses):
+        self.addresses = addresses
+        self.callbacks = []
+
+    def async_discovered_service_info(self, hass, connectable=True):
+        return [service_info(address) for address in self.addresses]
+
+    def async_register_callback(self, hass, callback, matcher, mode):
+        self.callbacks.append(callback)
+        return lambda: self.callbacks.remove(callback)
+
+    def pair(self, address, access_code):
+        """Send an advert of a chlorinator in pairing mode to the callbacks."""
+        for callback in list(self.callbacks):
+            callback(service_info(address, access_code), None)
+
+
+def service_info(address, access_code=b"\x00\x00\x00\x00"):
+    """Return the service info of a Halo chlorinator advert."""
+    payload = struct.pack(
+        "<BBBBBBI4sBBBBBBB",
+        DeviceType.Chlorinator.value,
+        1,
+        2,
+        0,
+        0,
+        0,
+        1234,
+        access_code,
+        2,
+        1,
+        1,
+        0,
+        0,
+        0,
+        0,
+    )
+    return BluetoothServiceInfoBleak(
+        name="HCHLOR",
+        address=address,
+        rssi=-60,
+        manufacturer_data={MANUFACTURER_ID: payload},
+        service_data={},
+        service_uuids=[],
+        source="local",
+        device=BLEDevice(address, "HCHLOR", {}),
+        advertisement=None,
+        connectable=True,
+        time=0,
+        tx_power=None,
+    )
+
+
+async def _async_start(config_dir):
+    """Return Home Assistant, ready to set up the integration."""
+    hass = HomeAssistant(config_dir)
+    hass.config.skip_pip = True
+    loader.async_setup(hass)
+    hass.config_entries = ConfigEntries(hass, {})
+    await bootstrap.async_load_base_functionality(hass)
+    # Provided by the stand-ins instead
+    hass.config.components.update({"http", "bluetooth", "bluetooth_adapters"})
+    hass.http = HTTP()
+    hass.data[DATA_MANAGER] = BluetoothManager()
+    return hass
+
+
+def _entry(address, version=2):
+    """Return a config entry of the chlorinator at address."""
+    return ConfigEntry(
+        version=version,
+        minor_version=1,
+        domain=DOMAIN,
+        title="HCHLOR",
+        data={CONF_ADDRESS: address, CONF_ACCESS_TOKEN: "1234"},
+        source="user",
+        options={},
+        unique_id=address,
+    )
+
+
+async def _async_gather(hass):
+    """Gather everything from every chlorinator, adding the entities it has.
+
+    The platforms are set up after the first gather, and add the entities of
+    the capabilities they find on the next.
+    """
+    for _ in range(2):
+        for data in hass.data[DOMAIN].values():
+            data.coordinator.engine.invalidate()
+            data.coordinator.reset_data_age()
+            await data.coordinator.async_refresh()
+        await hass.async_block_till_done()
+
+
+def _run(coroutine, adverts, chlorinators):
+    """Run a coroutine with the simulated chlorinators and stand-in adverts."""
+    originals = (
+        connector.establish_connection,
+        config_flow.async_discovered_service_info,
+        config_flow.async_register_callback,
+    )
+    connector.establish_connection = chlorinators.establish_connection
+    config_flow.async_discovered_service_info = adverts.async_discovered_service_info
+    config_flow.async_register_callback = adverts.async_register_callback
+    try:
+        return asyncio.run(coroutine)
+    finally:
+        (
+            connector.establish_connection,
+            config_flow.async_discovered_service_info,
+            config_flow.async_register_callback,
+        ) = originals
+
+
+def test_bulk_pairing():
+    """Test bulk pairing adds every chlorinator, with its own device."""
+    adverts = Adverts(ADDRESSES)
+    access_codes = {address: f"{index}000" for index, address in enumerate(ADDRESSES)}
+
+    async def _async_bulk_pairing():
+        with tempfile.TemporaryDirectory() as config_dir:
+            hass = await _async_start(config_dir)
+            flow = hass.config_entries.flow
+            result = await flow.async_init(DOMAIN, context={"source": "user"})
+            assert result["type"] is FlowResultType.MENU
+            assert "bulk_pairing" in result["menu_options"]
+
+            result = await flow.async_configure(
+                result["flow_id"], {"next_step_id": "bulk_pairing"}
+            )
+            assert result["type"] is FlowResultType.SHOW_PROGRESS
+            await asyncio.sleep(0)
+            for address, access_code in access_codes.items():
+                adverts.pair(address, access_code.encode())
+            await hass.async_block_till_done()
+
+            result = await flow.async_configure(result["flow_id"])
+            assert result["type"] is FlowResultType.CREATE_ENTRY
+            # The other entries are added before the flow reports them
+            assert result["description"] == "bulk_paired"
+            added = result["description_placeholders"]["added"].split(", ")
+            assert len(added) == len(ADDRESSES)
+            await hass.async_block_till_done()
+            assert not adverts.callbacks
+            await _async_gather(hass)
+
+            entries = hass.config_entries.async_entries(DOMAIN)
+            assert sorted(entry.unique_id for entry in entries) == list(ADDRESSES)
+            assert {
+                entry.unique_id: entry.data[CONF_ACCESS_TOKEN] for entry in entries
+            } == access_codes
+            assert all(entry.state is ConfigEntryState.LOADED for entry in entries)
+            # Titled apart, by the end of their address
+            assert (
+                sorted(entry.title for entry in entries)
+                == sorted(added)
+                == [
+                    human_readable_name(None, "HCHLOR", address)
+                    for address in ADDRESSES
+                ]
+            )
+            assert {entry.source for entry in entries} == {"user", "bulk_paired"}
+
+            devices = dr.async_get(hass)
+            entities = er.async_get(hass)
+            for entry in entries:
+                device = devices.async_get_device(
+                    identifiers={(DOMAIN, entry.unique_id)}
+                )
+                assert device.config_entries == {entry.entry_id}
+                registered = er.async_entries_for_config_entry(entities, entry.entry_id)
+                assert len(registered) > 10
+                for entity in registered:
+                    assert entity.device_id == device.id
+                    assert entity.unique_id.startswith(entry.unique_id.lower())
+
+                # Transitions fire for the device of their own entry
+                events = []
+                hass.bus.async_listen(EVENT_TYPE, events.append)
+                hass.data[DOMAIN][entry.entry_id].coordinator._async_fire_transitions(
+                    {"pump_is_operating": False}, {"pump_is_operating": True}
+                )
+                await hass.async_block_till_done()
+                assert [event.data["device_id"] for event in events] == [device.id]
+                triggers = await device_trigger.async_get_triggers(hass, device.id)
+                assert {"pump_started", "gpo_mode_changed"} <= {
+                    trigger["type"] for trigger in triggers
+                }
+            assert hass.states.get("select.heater_mode_3").state == "Off"
+            await hass.async_stop(force=True)
+
+    _run(_async_bulk_pairing(), adverts, Chlorinators(access_codes))
+
+
+def test_migrate():
+    """Test version 1 entries move their entities to ids keyed by address."""
+    adverts = Adverts(())
+
+    async def _async_migrate():
+        with tempfile.TemporaryDirectory() as config_dir:
+            hass = await _async_start(config_dir)
+            first, second = _entry(ADDRESSES[0], 1), _entry(ADDRESSES[1], 1)
+            # Added as loaded from storage, before they are set up
+            for entry in (first, second):
+                hass.config_entries._entries[entry.entry_id] = entry
+
+            # Bulk paired before, on the device the first entry claimed
+            devices = dr.async_get(hass)
+            entities = er.async_get(hass)
+            legacy = devices.async_get_or_create(
+                config_entry_id=first.entry_id, identifiers={(DOMAIN, "HCHLOR")}
+            )
+            devices.async_get_or_create(
+                config_entry_id=second.entry_id, identifiers={(DOMAIN, "HCHLOR")}
+            )
+            mode = entities.async_get_or_create(
+                "select",
+                DOMAIN,
+                "HCHLOR_mode_select",
+                config_entry=first,
+                device_id=legacy.id,
+                suggested_object_id="pool_mode",
+            )
+            ph = entities.async_get_or_create(
+                "sensor",
+                DOMAIN,
+                "hchlor_ph_measurement",
+                config_entry=first,
+                device_id=legacy.id,
+            )
+
+            # Sets up every entry of the integration
+            assert await hass.config_entries.async_setup(first.entry_id)
+            await hass.async_block_till_done()
+            assert second.state is ConfigEntryState.LOADED
+            await _async_gather(hass)
+            assert first.version == second.version == 2
+
+            mode = entities.async_get(mode.entity_id)
+            assert mode.entity_id == "select.pool_mode"
+            assert mode.unique_id == "aa:bb:cc:dd:ee:01_mode_select"
+            assert entities.async_get(ph.entity_id).unique_id == (
+                "aa:bb:cc:dd:ee:01_ph_measurement"
+            )
+            assert hass.states.get("select.pool_mode").state == "Auto"
+
+            legacy = devices.async_get(legacy.id)
+            assert legacy.identifiers == {(DOMAIN, ADDRESSES[0])}
+            assert legacy.config_entries == {first.entry_id}
+            device = devices.async_get_device(identifiers={(DOMAIN, ADDRESSES[1])})
+            assert device.config_entries == {second.entry_id}
+            assert er.async_entries_for_device(entities, device.id)
+            await hass.async_stop(force=True)
+
+    _run(_async_migrate(), adverts, Chlorinators(dict.fromkeys(ADDRESSES, "1234")))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.ERROR)
+    test_bulk_pairing()
+    test_migrate()
+    print("✓ Config flow checks passed!")
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Test script for the shared connector.
+
+Checks that service cache hits and misses are taken from whether each connect
+used cached services, and that the connect time saved is recorded, without
+requiring Home Assistant or a real device.
+"""
+
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bleak.backends.device import BLEDevice  # noqa: E402
+from bleak_retry_connector import establish_connection  # noqa: E402
+
+from custom_components.astralpool_halo_chlorinator import connector  # noqa: E402
+from custom_components.astralpool_halo_chlorinator.routing import (  # noqa: E402
+    ConnectionRouter,
+    ConnectionSource,
+)
+
+ADDRESS = "AA:BB:CC:DD:EE:FF"
+
+
+class Chlorinator:
+    """Stand-in for the pychlorinator API object."""
+
+    def __init__(self, ble_device):
+        self._ble_device = ble_device
+
+
+class Client:
+    """Stand-in for a connected client."""
+
+    def __init__(self, device, used_cached_services):
+        self.device = device
+        self.used_cached_services = used_cached_services
+
+
+class Backend:
+    """Stand-in for the Bleak backend of a client, connecting at once."""
+
+    def __init__(self, address_or_ble_device, **kwargs):
+        pass
+
+    async def connect(self, pair, **kwargs):
+        pass
+
+
+def test_stats_saved_seconds():
+    """Test the saved time compares average hit and miss connect times."""
+    stats = connector.ConnectionStats()
+    stats.record(False, 4.0)
+    assert stats.saved_seconds is None
+    stats.record(True, 1.0)
+    stats.record(True, 2.0)
+    assert stats.saved_seconds == 5.0
+    assert stats.as_dict()["hits"] == 2
+
+
+def test_cache_hits():
+    """Test hits and misses follow the services each connect used."""
+    hci0 = BLEDevice(ADDRESS, "HCHLOR", {"source": "hci0"})
+    proxy = BLEDevice(ADDRESS, "HCHLOR", {"source": "proxy"})
+    visible = [ConnectionSource("hci0", hci0, -80)]
+    chlorinator = Chlorinator(hci0)
+    chlorinator_connector = connector.ChlorinatorConnector(
+        chlorinator, ConnectionRouter(lambda: visible, hci0)
+    )
+
+    # Whether the stack had valid services cached for each connect
+    cached = [False, True, False]
+    connected = []
+
+    async def establish_connection(client_class, device, name, max_attempts):
+        assert client_class is connector.CacheTrackingClient
+        assert max_attempts == connector.CONNECT_ATTEMPTS
+        connected.append(device)
+        return Client(device, cached.pop(0))
+
+    original = connector.establish_connection
+    connector.establish_connection = establish_connection
+    try:
+        asyncio.run(chlorinator_connector.async_connect())
+        asyncio.run(chlorinator_connector.async_connect())
+        visible.append(ConnectionSource("proxy", proxy, -60))
+        asyncio.run(chlorinator_connector.async_connect())
+    finally:
+        connector.establish_connection = original
+
+    assert connected == [hci0, hci0, proxy]
+    assert chlorinator._ble_device is proxy
+    assert chlorinator_connector.stats.hits == 1
+    assert chlorinator_connector.stats.misses == 2
+
+
+def test_client_records_cached_services():
+    """Test the client records if the retry connector used cached services."""
+    # Services cached for a proxy are always taken as valid
+    proxy = BLEDevice(ADDRESS, "HCHLOR", {"source": "proxy"})
+
+    async def _async_connect(use_services_cache):
+        client = await establish_connection(
+            connector.CacheTrackingClient,
+            proxy,
+            "HCHLOR",
+            use_services_cache=use_services_cache,
+            backend=Backend,
+        )
+        return client.used_cached_services
+
+    assert asyncio.run(_async_connect(True)) is True
+    assert asyncio.run(_async_connect(False)) is False
+
+
+if __name__ == "__main__":
+    test_stats_saved_seconds()
+    test_cache_hits()
+    test_client_records_cached_services()
+    print("✓ Connector checks passed!")
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Test script for parsing chlorinator adverts during discovery.
+
+Feeds adverts of chlorinators and other devices to the advertisement cache,
+checking payloads are parsed once, changes and pairing mode are picked up,
+malformed payloads are ignored and only chlorinators become candidates,
+without requiring a real device.
+"""
+
+import os
+import struct
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bleak.backends.device import BLEDevice  # noqa: E402
+from homeassistant.components.bluetooth import BluetoothServiceInfoBleak  # noqa: E402
+from pychlorinator.halo_parsers import DeviceType  # noqa: E402
+
+from custom_components.astralpool_halo_chlorinator import discovery  # noqa: E402
+from custom_components.astralpool_halo_chlorinator.const import (  # noqa: E402
+    MANUFACTURER_ID,
+)
+
+ADDRESS = "AA:BB:CC:DD:EE:01"
+
+
+def scan_payload(access_code=b"\x00\x00\x00\x00", time_alive=0):
+    """Return the manufacturer data of a chlorinator advert."""
+    return struct.pack(
+        "<BBBBBBI4sBBBBBBB",
+        DeviceType.Chlorinator.value,
+        1,
+        2,
+        0,
+        0,
+        0,
+        1234,
+        access_code,
+        2,
+        1,
+        1,
+        0,
+        0,
+        0,
+        time_alive,
+    )
+
+
+def service_info(address=ADDRESS, name="HCHLOR", payload=None):
+    """Return the service info of an advert."""
+    manufacturer_data = {} if payload is None else {MANUFACTURER_ID: payload}
+    return BluetoothServiceInfoBleak(
+        name=name,
+        address=address,
+        rssi=-60,
+        manufacturer_data=manufacturer_data,
+        service_data={},
+        service_uuids=[],
+        source="local",
+        device=BLEDevice(address, name, {}),
+        advertisement=None,
+        connectable=True,
+        time=0,
+        tx_power=None,
+    )
+
+
+class CountingScanResponse(discovery.ScanResponse):
+    """The scan response parser, counting how often it runs."""
+
+    parsed = 0
+
+    def __init__(self, data):
+        CountingScanResponse.parsed += 1
+        super().__init__(data)
+
+
+def _with_counting_parser(test):
+    """Run a test with the scan response parser counted."""
+    original = discovery.ScanResponse
+    discovery.ScanResponse = CountingScanResponse
+    CountingScanResponse.parsed = 0
+    try:
+        test()
+    finally:
+        discovery.ScanResponse = original
+
+
+def test_parse():
+    """Test a repeated advert is parsed once, and a changed one again."""
+
+    def _test():
+        cache = discovery.AdvertisementCache()
+        first = cache.async_parse(service_info(payload=scan_payload()))
+        assert first.DeviceType is DeviceType.Chlorinator
+        assert not first.isPairable
+        for _ in range(100):
+            assert cache.async_parse(service_info(payload=scan_payload())) is first
+        assert CountingScanResponse.parsed == 1
+
+        pairing = cache.async_parse(service_info(payload=scan_payload(b"1234")))
+        assert pairing.isPairable
+        assert pairing.get_access_code() == "1234"
+        assert CountingScanResponse.parsed == 2
+
+        # Adverts without manufacturer data keep the last response
+        assert cache.async_parse(service_info()) is pairing
+        assert cache.async_parse(service_info(address="AA:BB:CC:DD:EE:02")) is None
+
+    _with_counting_parser(_test)
+
+
+def test_parse_malformed():
+    """Test a malformed payload is ignored, and not parsed again."""
+
+    def _test():
+        cache = discovery.AdvertisementCache()
+        assert cache.async_parse(service_info(payload=b"\x01\x02")) is None
+        assert cache.async_parse(service_info(payload=b"\x01\x02")) is None
+        assert CountingScanResponse.parsed == 1
+        assert cache.async_parse(service_info(payload=scan_payload())) is not None
+
+    _with_counting_parser(_test)
+
+
+def test_parse_changed():
+    """Test only adverts whose payload changed are returned."""
+    cache = discovery.AdvertisementCache()
+    assert cache.async_parse_changed(service_info(payload=scan_payload())) is not None
+    assert cache.async_parse_changed(service_info(payload=scan_payload())) is None
+    assert cache.async_parse_changed(service_info()) is None
+
+    changed = cache.async_parse_changed(service_info(payload=scan_payload(b"1234")))
+    assert changed.isPairable
+    # Every chlorinator is tracked on its own
+    other = service_info(address="AA:BB:CC:DD:EE:02", payload=scan_payload())
+    assert cache.async_parse_changed(other) is not None
+    # The full parse still answers from the cache
+    assert cache.async_parse(service_info(payload=scan_payload(b"1234"))) is changed
+
+
+def test_add_candidates():
+    """Test only chlorinators that are not excluded become candidates."""
+    cache = discovery.AdvertisementCache()
+    first = service_info("AA:BB:CC:DD:EE:01")
+    cache.async_add_candidates(
+        [
+            first,
+            service_info("AA:BB:CC:DD:EE:02", name="Speaker"),
+            service_info("AA:BB:CC:DD:EE:03", name=None),
+            service_info("AA:BB:CC:DD:EE:04"),
+        ],
+        exclude=["AA:BB:CC:DD:EE:04"],
+    )
+    assert list(cache.candidates) == ["AA:BB:CC:DD:EE:01"]
+
+    # Candidates already found keep their service info
+    cache.async_add_candidates(
+        [service_info("AA:BB:CC:DD:EE:01"), service_info("AA:BB:CC:DD:EE:05")]
+    )
+    assert cache.candidates["AA:BB:CC:DD:EE:01"] is first
+    assert list(cache.candidates) == ["AA:BB:CC:DD:EE:01", "AA:BB:CC:DD:EE:05"]
+
+
+if __name__ == "__main__":
+    test_parse()
+    test_parse_malformed()
+    test_parse_changed()
+    test_add_candidates()
+    print("✓ Discovery checks passed!")
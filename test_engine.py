@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Test script for the headless engine and command line.
+
+Polls and controls the simulated chlorinator through the engine and the
+command line, and checks a simulated run starts without loading the BLE
+stack or Home Assistant, without requiring a real device.
+"""
+
+import asyncio
+import contextlib
+import io
+import json
+import os
+import sys
+from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from pychlorinator import halo_parsers  # noqa: E402
+
+from custom_components.astralpool_halo_chlorinator import simulator  # noqa: E402
+from custom_components.astralpool_halo_chlorinator.cli import main  # noqa: E402
+from custom_components.astralpool_halo_chlorinator.codec import (  # noqa: E402
+    CHARACTERISTIC_PARSERS,
+    GPO_FRAMES,
+    GPOAppActions,
+    LIGHT_FRAMES,
+)
+from custom_components.astralpool_halo_chlorinator.engine import (  # noqa: E402
+    ChlorinatorEngine,
+)
+from custom_components.astralpool_halo_chlorinator.polling import (  # noqa: E402
+    GATHER_TIER,
+)
+from custom_components.astralpool_halo_chlorinator.simulator import (  # noqa: E402
+    SimulatedChlorinator,
+)
+from test_import_time import measure_import  # noqa: E402
+from test_import_time import PACKAGE  # noqa: E402
+
+# Cumulative import time budget for a simulated command line run, in us
+MAX_STARTUP_US = 500_000
+
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def test_tiered_polls():
+    """Test the first poll gathers everything and later ones only the tiers."""
+    chlorinator = SimulatedChlorinator(answer_delay=0)
+    engine = ChlorinatorEngine(chlorinator)
+
+    data = asyncio.run(engine.async_poll(START))
+    assert data["mode"] is halo_parsers.Mode.Auto
+    assert data["ph_measurement"] == 7.4
+    assert sorted(engine.last_gather.latency) == sorted(CHARACTERISTIC_PARSERS)
+
+    chlorinator.set(104, 9, "B", 80)
+    data = asyncio.run(engine.async_poll(START + timedelta(seconds=60)))
+    assert data["ph_measurement"] == 8.0
+    assert sorted(engine.last_gather.latency) == sorted(GATHER_TIER.characteristics)
+    assert chlorinator.connections == 2
+
+    engine.invalidate()
+    assert engine.data == {}
+
+
+def test_missed_setup_frames():
+    """Test a full gather keeps the setup of outputs whose frame was missed."""
+    chlorinator = SimulatedChlorinator(answer_delay=0)
+    engine = ChlorinatorEngine(chlorinator)
+
+    data = asyncio.run(engine.async_poll(START))
+    names = [data[f"GPO{gpo}_Name"] for gpo in range(1, 5)]
+
+    # Only the frame of the first outlet arrives
+    chlorinator.more_frames[1300].clear()
+    data = asyncio.run(engine.async_poll(START + timedelta(days=2)))
+    assert sorted(engine.last_gather.latency) == sorted(CHARACTERISTIC_PARSERS)
+    assert [data[f"GPO{gpo}_Name"] for gpo in range(1, 5)] == names
+    assert data["GPO4_OutletEnabled"]
+
+
+def test_batched_write():
+    """Test several frames are written in one session and read back."""
+    chlorinator = SimulatedChlorinator(answer_delay=0)
+    engine = ChlorinatorEngine(chlorinator)
+    on = halo_parsers.LightAppActions.TurnOnZone
+    frames = [LIGHT_FRAMES[on, 1], LIGHT_FRAMES[on, 2]]
+
+    data = asyncio.run(engine.async_write(frames, groups=["lighting"]))
+    assert chlorinator.connections == 1
+    assert chlorinator.written == frames
+    assert data["LightingMode_1"] is halo_parsers.Mode.On
+    assert data["LightingMode_2"] is halo_parsers.Mode.On
+    assert data["NumZonesInUse"] == 2
+
+    data = asyncio.run(engine.async_write([GPO_FRAMES[GPOAppActions.On, 3]]))
+    assert data["GPO3_Mode"] is halo_parsers.GPOMode.On
+    assert "LightingMode_1" not in data
+
+
+class LostReadSession(simulator.SimulatedSession):
+    """A simulated session whose link drops once the frames are written."""
+
+    acknowledged = []
+
+    async def async_write_frames(self, frames, acknowledged=True):
+        LostReadSession.acknowledged.append(acknowledged)
+        await super().async_write_frames(frames, acknowledged)
+
+    async def async_request(self, characteristic):
+        raise ConnectionError("Link dropped")
+
+
+def test_write_read_back_lost():
+    """Test a write is acknowledged, so a failed read back returns nothing."""
+    chlorinator = SimulatedChlorinator(answer_delay=0)
+    engine = ChlorinatorEngine(chlorinator)
+    original = simulator.SimulatedSession
+    simulator.SimulatedSession = LostReadSession
+    try:
+        data = asyncio.run(engine.async_write([GPO_FRAMES[GPOAppActions.On, 3]]))
+        asyncio.run(engine.async_write([GPO_FRAMES[GPOAppActions.Off, 3]], False))
+    finally:
+        simulator.SimulatedSession = original
+    assert data == {}
+    assert LostReadSession.acknowledged == [True, True]
+    assert chlorinator.written == [
+        GPO_FRAMES[GPOAppActions.On, 3],
+        GPO_FRAMES[GPOAppActions.Off, 3],
+    ]
+
+
+def run_cli(*args):
+    """Run the command line and return the JSON lines it printed."""
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        main(list(args))
+    return [json.loads(line) for line in output.getvalue().splitlines()]
+
+
+def test_live_mode():
+    """Test live mode reads the chemistry over sessions it gives up in turn."""
+    chlorinator = SimulatedChlorinator(answer_delay=0.001)
+    engine = ChlorinatorEngine(chlorinator)
+    asyncio.run(engine.async_poll(START))
+    chlorinator.set(104, 9, "B", 69)
+    chlorinator.set(9, 4, "H", 300)
+    updates = []
+
+    reads = asyncio.run(
+        engine.async_live(
+            0.02, 0.3, updates.append, session_seconds=0.1, pause_seconds=0.02
+        )
+    )
+    assert reads == len(updates)
+    # Bounded by the duration, with reads dropped while the session is closed
+    assert 8 <= reads <= 15
+    assert 3 <= chlorinator.connections - 1 <= 4
+    assert updates[-1]["ph_measurement"] == 6.9
+    # Only the live tier is read, the rest of the state is kept
+    assert updates[-1]["WaterTemp"] == 26.5
+
+
+def test_cli():
+    """Test the command line polls and sends actions to the simulator."""
+    (record,) = run_cli("poll", "--simulate")
+    assert record["data"]["mode"] == "Auto"
+    assert record["data"]["NumZonesInUse"] == 2
+
+    records = run_cli("poll", "--simulate", "--interval", "0", "--count", "2")
+    assert [record["poll"] for record in records] == [1, 2]
+
+    (record,) = run_cli(
+        "action", "--simulate", "--zones", "3", "--lighting", "On", "--lighting-zone",
+        "all", "--gpo1", "Off",
+    )  # fmt: skip
+    assert len(record["frames"]) == 4
+    assert record["data"]["LightingMode_3"] == "On"
+    assert record["data"]["GPO1_Mode"] == "Off"
+
+
+def test_startup():
+    """Test a simulated run starts quickly, without the BLE stack."""
+    modules = ("cli", "engine", "simulator")
+    times = measure_import(", ".join(f"{PACKAGE}.{module}" for module in modules))
+    for module in ("bleak", "homeassistant"):
+        assert module not in times, f"{module} is imported by a simulated run"
+    startup = sum(times[f"{PACKAGE}.{module}"] for module in modules)
+    print(f"Simulated run modules imported in {startup} us")
+    assert startup < MAX_STARTUP_US
+
+
+if __name__ == "__main__":
+    test_tiered_polls()
+    test_missed_setup_frames()
+    test_batched_write()
+    test_write_read_back_lost()
+    test_live_mode()
+    test_cli()
+    test_startup()
+    print("✓ Engine and command line checks passed!")
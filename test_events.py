@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Test script for transition events.
+
+Checks which transitions are found between two updates of the chlorinator
+state, without requiring Home Assistant or a real device.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from pychlorinator.halo_parsers import GPOMode  # noqa: E402
+
+from custom_components.astralpool_halo_chlorinator.events import (  # noqa: E402
+    TransitionDetector,
+)
+
+
+def test_switch_and_gpo_transitions():
+    """Test pump, heater, solar and GPO changes are reported once."""
+    detector = TransitionDetector()
+    old = {
+        "pump_is_operating": False,
+        "HeaterOn": True,
+        "SolarPumpState": False,
+        "GPO1_Mode": GPOMode.Off,
+        "GPO2_Mode": GPOMode.Auto,
+    }
+    new = {
+        "pump_is_operating": True,
+        "HeaterOn": False,
+        "SolarPumpState": False,
+        "GPO1_Mode": GPOMode.On,
+        "GPO2_Mode": GPOMode.Auto,
+    }
+    assert detector.detect(old, new) == [
+        {"type": "pump_started"},
+        {"type": "heater_off"},
+        {"type": "gpo_mode_changed", "subtype": "gpo1", "from": "Off", "to": "On"},
+    ]
+    assert detector.detect(new, dict(new)) == []
+
+
+def test_nothing_reported_for_new_values():
+    """Test values seen for the first time do not fire transitions."""
+    detector = TransitionDetector()
+    assert detector.detect({}, {"pump_is_operating": True, "ph_measurement": 8.2}) == []
+
+
+def test_ph_bands_with_hysteresis():
+    """Test pH crossing its range fires once, not on every small wobble."""
+    detector = TransitionDetector()
+    types = []
+    for ph in (7.5, 7.9, 7.78, 7.81, 7.7, 7.1, 0.0, 7.22, 7.3):
+        transitions = detector.detect({}, {"ph_measurement": ph})
+        types.extend(transition["type"] for transition in transitions)
+    assert types == ["ph_high", "ph_normal", "ph_low", "ph_normal"]
+
+
+if __name__ == "__main__":
+    test_switch_and_gpo_transitions()
+    test_nothing_reported_for_new_values()
+    test_ph_bands_with_hysteresis()
+    print("✓ Transition event checks passed!")
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Test script and benchmark for the pipelined gather engine.
+
+Reads characteristics from a simulated session that takes a fixed time to
+answer each request, and compares pipelined reads with reading them one at
+a time like the library does, without requiring a real device.
+"""
+
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from custom_components.astralpool_halo_chlorinator.gather import (  # noqa: E402
+    GATHER_GROUPS,
+    GatherEngine,
+)
+from custom_components.astralpool_halo_chlorinator.polling import (  # noqa: E402
+    GATHER_TIER,
+)
+
+# Seconds the simulated device takes to answer a read request
+ANSWER_DELAY = 0.02
+
+
+class SimulatedSession:
+    """Stand-in for a session that answers each read request after a delay."""
+
+    def __init__(self, unanswered=(), lost_at=None):
+        self.unanswered = set(unanswered)
+        self.lost_at = lost_at
+        self.requested = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def async_request(self, characteristic):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.requested.append(characteristic)
+        if characteristic == self.lost_at:
+            raise ConnectionError("disconnected")
+        if characteristic in self.unanswered:
+            return future
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+        def _answer():
+            self.in_flight -= 1
+            future.set_result({f"value_{characteristic}": characteristic})
+
+        loop.call_later(ANSWER_DELAY, _answer)
+        return future
+
+
+def test_groups_and_latency():
+    """Test group selection reads each characteristic once and times it."""
+    session = SimulatedSession()
+    result = asyncio.run(
+        GatherEngine(session).async_gather([300], groups=["lighting", "solar"])
+    )
+    expected = [300, 301, 302, 1200, 1201, 1202]
+    assert session.requested == expected
+    assert result.data == {f"value_{c}": c for c in expected}
+    assert sorted(result.latency) == expected
+    assert all(latency >= ANSWER_DELAY * 0.9 for latency in result.latency.values())
+    assert result.missing == []
+
+
+def test_missing_characteristics():
+    """Test unanswered characteristics are reported and do not block others."""
+    session = SimulatedSession(unanswered=[104])
+    result = asyncio.run(GatherEngine(session, timeout=0.1).async_gather([9, 104, 201]))
+    assert result.missing == [104]
+    assert result.data == {"value_9": 9, "value_201": 201}
+
+
+def test_connection_lost():
+    """Test a request that cannot be written fails the gather, not one read."""
+    session = SimulatedSession(unanswered=[9], lost_at=201)
+
+    async def _async_gather():
+        engine = GatherEngine(session, timeout=0.1)
+        try:
+            await engine.async_gather([9, 104, 201])
+        except ConnectionError:
+            # The read still waiting for its answer is cancelled
+            await asyncio.sleep(0)
+            assert asyncio.all_tasks() == {asyncio.current_task()}
+        else:
+            raise AssertionError("Lost connection reported as missing")
+
+    asyncio.run(_async_gather())
+
+
+def test_bounded_concurrency():
+    """Test no more requests than allowed are in flight at once."""
+    session = SimulatedSession()
+    characteristics = [c for group in GATHER_GROUPS.values() for c in group]
+    result = asyncio.run(GatherEngine(session, 3).async_gather(characteristics))
+    assert session.max_in_flight == 3
+    assert len(result.latency) == len(characteristics)
+
+
+def test_pipelined_gather_throughput():
+    """Benchmark pipelined reads against reading one at a time."""
+    characteristics = list(GATHER_TIER.characteristics)
+    sequential = asyncio.run(
+        GatherEngine(SimulatedSession(), 1).async_gather(characteristics)
+    )
+    pipelined = asyncio.run(
+        GatherEngine(SimulatedSession()).async_gather(characteristics)
+    )
+    print(
+        f"Gathered {len(characteristics)} characteristics in "
+        f"{pipelined.seconds:.3f}s pipelined, {sequential.seconds:.3f}s sequential"
+    )
+    assert pipelined.data == sequential.data
+    assert pipelined.seconds < sequential.seconds / 2
+
+
+if __name__ == "__main__":
+    test_groups_and_latency()
+    test_missing_characteristics()
+    test_connection_lost()
+    test_bounded_concurrency()
+    test_pipelined_gather_throughput()
+    print("✓ Gather engine checks passed!")
@@ -6,11 +6,15 @@ This script demonstrates how the GPO implementation works without requiring
 a full Home Assistant installation or real device.
 """
 
+import os
 import sys
 
-sys.path.insert(0, "custom_components/astralpool_halo_chlorinator")
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from gpo_helper import GPOAction, GPOAppActions
+from custom_components.astralpool_halo_chlorinator.gpo_helper import (  # noqa: E402
+    GPOAction,
+    GPOAppActions,
+)
 
 
 def test_gpo_actions():
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Test script for the telemetry history files.
+
+Records gathers of the simulated chlorinator into compressed CSV files and
+exports time ranges from them, checking values keep their precision, files
+rotate per day and when columns change, and exports stream instead of
+loading the history, without requiring a real device.
+"""
+
+import asyncio
+import csv
+import gzip
+import os
+import sys
+import tempfile
+import tracemalloc
+from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from custom_components.astralpool_halo_chlorinator.engine import (  # noqa: E402
+    ChlorinatorEngine,
+)
+from custom_components.astralpool_halo_chlorinator.history import (  # noqa: E402
+    HistoryWriter,
+)
+from custom_components.astralpool_halo_chlorinator.simulator import (  # noqa: E402
+    SimulatedChlorinator,
+)
+
+START = datetime(2024, 1, 1, 23, 0, tzinfo=timezone.utc)
+
+# Bytes of memory an export may peak at, mostly zlib buffers. Two weeks of
+# gathers are about 5 MB uncompressed.
+MAX_EXPORT_BYTES = 1024 * 1024
+
+# Gathers in two weeks, one every three minutes
+EXPORT_ROWS = 14 * 24 * 20
+
+
+def simulated_data():
+    """Return the state of a freshly polled simulated chlorinator."""
+    engine = ChlorinatorEngine(SimulatedChlorinator(answer_delay=0))
+    return asyncio.run(engine.async_poll())
+
+
+def read_rows(path):
+    """Return the rows of a compressed CSV file."""
+    with gzip.open(path, "rt", newline="") as file:
+        return list(csv.DictReader(file))
+
+
+def test_record():
+    """Test gathers are buffered, then appended per day and per columns."""
+    data = simulated_data()
+    with tempfile.TemporaryDirectory() as directory:
+        history = HistoryWriter(Path(directory), flush_rows=3)
+        due = [
+            history.append(START + timedelta(minutes=20 * i), data) for i in range(3)
+        ]
+        assert due == [False, False, True]
+        assert history.flush() == 3
+        history.append(START + timedelta(hours=1, minutes=30), data)
+        history.append(START + timedelta(hours=1, minutes=40), {**data, "New": 0.125})
+        history.flush()
+
+        names = [path.name for _, path in history.files()]
+        assert names == [
+            "2024-01-01.csv.gz",
+            "2024-01-02.csv.gz",
+            "2024-01-02.1.csv.gz",
+        ]
+        # Appended as two gzip members, read back as one file
+        assert len(read_rows(history.directory / names[0])) == 3
+        row = read_rows(history.directory / names[0])[0]
+        assert row["timestamp"] == "2024-01-01T23:00:00+00:00"
+        assert row["ph_measurement"] == "7.4"
+        assert row["WaterTemp"] == "26.5"
+        assert row["mode"] == "1"
+        assert "New" not in row
+        assert read_rows(history.directory / names[2])[0]["New"] == "0.125"
+
+        # A restarted writer appends to the last part of the day
+        history = HistoryWriter(Path(directory))
+        history.append(START + timedelta(hours=2), data)
+        history.flush()
+        assert len(read_rows(history.directory / names[2])) == 2
+
+
+def test_retention():
+    """Test files older than the retention are deleted when a day starts."""
+    data = simulated_data()
+    with tempfile.TemporaryDirectory() as directory:
+        history = HistoryWriter(Path(directory), retention_days=2)
+        for day in range(4):
+            history.append(START + timedelta(days=day), data)
+            history.flush()
+        names = [path.name for _, path in history.files()]
+        assert names == ["2024-01-02.csv.gz", "2024-01-03.csv.gz", "2024-01-04.csv.gz"]
+
+
+def test_export():
+    """Test an export of a range streams the rows with every column."""
+    data = simulated_data()
+    with tempfile.TemporaryDirectory() as directory:
+        history = HistoryWriter(Path(directory))
+        for i in range(6):
+            extra = {"New": i} if i >= 4 else {}
+            history.append(START + timedelta(minutes=30 * i), {**data, **extra})
+        history.flush()
+
+        target = Path(directory, "exports", "range.csv.gz")
+        rows = history.export(
+            START + timedelta(minutes=30), START + timedelta(minutes=150), target
+        )
+        assert rows == 4
+        exported = read_rows(target)
+        assert [row["timestamp"][11:16] for row in exported] == [
+            "23:30",
+            "00:00",
+            "00:30",
+            "01:00",
+        ]
+        assert [row["New"] for row in exported] == ["", "", "", "4"]
+        assert exported[0]["ph_measurement"] == "7.4"
+
+
+def test_export_truncated():
+    """Test a file cut short during a flush exports the rows before the cut."""
+    data = simulated_data()
+    with tempfile.TemporaryDirectory() as directory:
+        history = HistoryWriter(Path(directory))
+        for i in range(2):
+            history.append(START + timedelta(minutes=10 * i), data)
+            history.flush()
+        path = history.directory / "2024-01-01.csv.gz"
+        complete = path.stat().st_size
+        history.append(START + timedelta(minutes=20), data)
+        history.flush()
+        # Cut in the middle of the last gzip member
+        with open(path, "r+b") as file:
+            file.truncate((complete + path.stat().st_size) // 2)
+
+        target = Path(directory, "exports", "range.csv.gz")
+        rows = history.export(START, START + timedelta(hours=1), target)
+        assert rows == 2
+        assert len(read_rows(target)) == 2
+
+
+def test_export_memory():
+    """Benchmark the memory an export of two weeks of gathers peaks at."""
+    data = simulated_data()
+    with tempfile.TemporaryDirectory() as directory:
+        history = HistoryWriter(Path(directory), flush_rows=1000)
+        for i in range(EXPORT_ROWS):
+            if history.append(START + timedelta(minutes=3 * i), data):
+                history.flush()
+        history.flush()
+
+        target = Path(directory, "export.csv.gz")
+        tracemalloc.start()
+        rows = history.export(START, START + timedelta(days=31), target)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        size = sum(path.stat().st_size for _, path in history.files())
+    print(f"Exported {rows} rows from {size} bytes, peaking at {peak} bytes")
+    assert rows == EXPORT_ROWS
+    assert peak < MAX_EXPORT_BYTES
+
+
+if __name__ == "__main__":
+    test_record()
+    test_retention()
+    test_export()
+    test_export_truncated()
+    test_export_memory()
+    print("✓ Telemetry history checks passed!")
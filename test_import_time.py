@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Import-time benchmark for the integration package.
+
+Home Assistant imports the integration package before any entry is set up, so
+this guards that importing it stays cheap and does not pull in the BLE stack,
+pychlorinator or Home Assistant itself. It runs the import in a fresh
+interpreter with ``-X importtime`` and parses the per-module report.
+"""
+
+import os
+import subprocess
+import sys
+
+PACKAGE = "custom_components.astralpool_halo_chlorinator"
+
+# Cumulative import time budget for the package, in microseconds
+MAX_IMPORT_TIME_US = 50_000
+
+# Modules that must only be imported once an entry is set up
+DEFERRED_MODULES = (
+    "bleak",
+    "bleak_retry_connector",
+    "pychlorinator",
+    "homeassistant",
+    f"{PACKAGE}.gpo_helper",
+    f"{PACKAGE}.coordinator",
+)
+
+
+def measure_import(module: str = PACKAGE) -> dict[str, int]:
+    """Import module in a fresh interpreter and return cumulative times in us."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.removeprefix("import time:").split("|")
+        if cumulative.strip().isdigit():
+            times[name.strip()] = int(cumulative)
+    return times
+
+
+def test_import_defers_heavy_dependencies():
+    """Test the package import does not load the BLE stack or Home Assistant."""
+    times = measure_import()
+    assert PACKAGE in times
+    for module in DEFERRED_MODULES:
+        assert module not in times, f"{module} is imported with the package"
+
+
+def test_import_time_budget():
+    """Test the package import stays within its time budget."""
+    # Take the best of a few runs to keep the benchmark stable on busy hosts
+    best = min(measure_import()[PACKAGE] for _ in range(3))
+    print(f"{PACKAGE} imported in {best} us (budget {MAX_IMPORT_TIME_US} us)")
+    assert best < MAX_IMPORT_TIME_US
+
+
+if __name__ == "__main__":
+    test_import_defers_heavy_dependencies()
+    test_import_time_budget()
+    print("✓ Import-time checks passed!")
@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+"""
+Memory regression test for unloading and reloading a config entry.
+
+Loads the integration into a real Home Assistant core, with stand-ins for
+the Bluetooth manager and the HTTP server, and connections to a simulated
+chlorinator. Checks an unloaded entry leaves
+nothing behind, whether or not the chlorinator had advertised yet, that the
+last gathered values are shown again after a restart, and that memory stays
+flat over 50 reloads, without requiring a real device.
+"""
+
+import asyncio
+import gc
+import logging
+import os
+import sys
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bleak.backends.device import BLEDevice  # noqa: E402
+
+# The core has to be imported before the loader
+from homeassistant.core import HomeAssistant  # noqa: E402
+
+from homeassistant import bootstrap  # noqa: E402
+from homeassistant import loader  # noqa: E402
+from homeassistant.components.bluetooth.const import DATA_MANAGER  # noqa: E402
+from homeassistant.config_entries import ConfigEntries  # noqa: E402
+from homeassistant.config_entries import ConfigEntry  # noqa: E402
+from homeassistant.config_entries import ConfigEntryState  # noqa: E402
+from homeassistant.const import CONF_ACCESS_TOKEN  # noqa: E402
+from homeassistant.const import CONF_ADDRESS  # noqa: E402
+from homeassistant.helpers.entity_platform import DATA_ENTITY_PLATFORM  # noqa: E402
+from pychlorinator.chlorinator import ChlorinatorAPI  # noqa: E402
+from pychlorinator.halo_parsers import Mode  # noqa: E402
+from pychlorinator.halochlorinator import HaloChlorinatorAPI  # noqa: E402
+
+from custom_components.astralpool_halo_chlorinator import connector  # noqa: E402
+from custom_components.astralpool_halo_chlorinator import PLATFORMS  # noqa: E402
+from custom_components.astralpool_halo_chlorinator import session  # noqa: E402
+from custom_components.astralpool_halo_chlorinator.const import DOMAIN  # noqa: E402
+from custom_components.astralpool_halo_chlorinator.coordinator import (  # noqa: E402
+    ChlorinatorDataUpdateCoordinator,
+)
+from custom_components.astralpool_halo_chlorinator.simulator import (  # noqa: E402
+    SimulatedChlorinator,
+)
+
+RELOADS = 50
+
+# Reloads before memory is measured. Home Assistant fills most of its caches
+# over these, by a few tens of KB, and the rest over the next hundred.
+WARMUP_RELOADS = 50
+
+# Bytes memory may grow by over all the reloads, leaving room for the caches
+MAX_GROWTH = 32 * 1024
+
+# Seconds the simulated chlorinator keeps an idle link, and waited between
+# checks whether it dropped it and for more frames of an indexed
+# characteristic, cut down so the reloads do not wait on them
+DROP_SECONDS = 0.01
+WAIT_SECONDS = 0.005
+
+DEVICE = BLEDevice("AA:BB:CC:DD:EE:FF", "HCHLOR", {})
+
+
+async def establish_connection(client_class, device, name, max_attempts):
+    """Connect to a simulated chlorinator."""
+    return SimulatedChlorinator(answer_delay=0, drop_delay=DROP_SECONDS).client()
+
+
+class ServiceInfo:
+    """Stand-in for the service info of an advert."""
+
+    device = DEVICE
+
+
+class BluetoothManager:
+    """Stand-in for the Bluetooth manager, seeing the chlorinator or not."""
+
+    def __init__(self):
+        self.advertised = True
+        self.callbacks = []
+
+    def async_ble_device_from_address(self, address, connectable):
+        return DEVICE if self.advertised else None
+
+    def async_scanner_devices_by_address(self, address, connectable):
+        return []
+
+    def async_register_callback(self, callback, matcher):
+        self.callbacks.append(callback)
+        return lambda: self.callbacks.remove(callback)
+
+    def advertise(self):
+        """Send an advert of the chlorinator to the callbacks."""
+        self.advertised = True
+        for callback in list(self.callbacks):
+            callback(ServiceInfo(), None)
+
+
+class HTTP:
+    """Stand-in for the HTTP server."""
+
+    def register_view(self, view):
+        pass
+
+
+async def _async_start(config_dir):
+    """Return Home Assistant with a config entry of the integration added."""
+    hass = HomeAssistant(config_dir)
+    hass.config.skip_pip = True
+    loader.async_setup(hass)
+    hass.config_entries = ConfigEntries(hass, {})
+    await bootstrap.async_load_base_functionality(hass)
+    # Provided by the stand-ins instead
+    hass.config.components.update({"http", "bluetooth", "bluetooth_adapters"})
+    hass.http = HTTP()
+    hass.data[DATA_MANAGER] = BluetoothManager()
+
+    entry = ConfigEntry(
+        version=1,
+        minor_version=1,
+        domain=DOMAIN,
+        title="Pool",
+        data={CONF_ADDRESS: DEVICE.address, CONF_ACCESS_TOKEN: "1234"},
+        source="user",
+        options={},
+        unique_id=DEVICE.address,
+    )
+    await hass.config_entries.async_add(entry)
+    await hass.async_block_till_done()
+    return hass, entry
+
+
+async def _async_gather(hass, entry):
+    """Gather everything from the chlorinator, adding the entities it has.
+
+    The platforms are set up after the first gather, and add the entities of
+    the capabilities they find on the next.
+    """
+    coordinator = hass.data[DOMAIN][entry.entry_id].coordinator
+    for _ in range(2):
+        coordinator.engine.invalidate()
+        coordinator.reset_data_age()
+        await coordinator.async_refresh()
+        await hass.async_block_till_done()
+
+
+async def _async_reload(hass, entry):
+    """Reload the entry and gather once."""
+    assert await hass.config_entries.async_reload(entry.entry_id)
+    await hass.async_block_till_done()
+    await _async_gather(hass, entry)
+    # This Home Assistant version keeps the entity platforms of an unloaded
+    # entry around, empty. Drop them so only the integration is measured.
+    for platform in list(hass.data[DATA_ENTITY_PLATFORM].get(DOMAIN, [])):
+        if not platform.entities:
+            await platform.async_destroy()
+
+
+def _coordinators():
+    """Return the number of coordinators that are still alive."""
+    gc.collect()
+    return sum(
+        isinstance(o, ChlorinatorDataUpdateCoordinator) for o in gc.get_objects()
+    )
+
+
+def _run(coroutine):
+    """Run a coroutine connecting to a simulated chlorinator."""
+    original = connector.establish_connection
+    intervals = session.DROP_INTERVAL, session.INDEXED_QUIET_SECONDS
+    connector.establish_connection = establish_connection
+    session.DROP_INTERVAL = session.INDEXED_QUIET_SECONDS = WAIT_SECONDS
+    try:
+        return asyncio.run(coroutine)
+    finally:
+        connector.establish_connection = original
+        session.DROP_INTERVAL, session.INDEXED_QUIET_SECONDS = intervals
+
+
+def test_unload():
+    """Test an unloaded entry leaves no data, services or entities."""
+
+    async def _async_unload():
+        with tempfile.TemporaryDirectory() as config_dir:
+            hass, entry = await _async_start(config_dir)
+            await _async_gather(hass, entry)
+            coordinator = hass.data[DOMAIN][entry.entry_id].coordinator
+            assert hass.states.get("select.heater_mode").state == "Off"
+            assert "heater_mode_select" in coordinator.added_entities
+
+            assert await hass.config_entries.async_unload(entry.entry_id)
+            await hass.async_block_till_done()
+            assert entry.state is ConfigEntryState.NOT_LOADED
+            assert DOMAIN not in hass.data
+            assert not hass.services.async_services().get(DOMAIN)
+            assert coordinator.add_dynamic_select_entities is None
+            assert not coordinator.added_entities
+            assert hass.states.get("select.heater_mode").state == "unavailable"
+            await hass.async_stop(force=True)
+        del coordinator
+        assert _coordinators() == 0
+
+    _run(_async_unload())
+
+
+def test_unload_deferred():
+    """Test unloading before and after the first advert of the chlorinator."""
+
+    async def _async_unload_deferred():
+        with tempfile.TemporaryDirectory() as config_dir:
+            hass, entry = await _async_start(config_dir)
+            manager = hass.data[DATA_MANAGER]
+            assert await hass.config_entries.async_unload(entry.entry_id)
+
+            # Unloaded while waiting for the first advert, set up already
+            manager.advertised = False
+            assert await hass.config_entries.async_setup(entry.entry_id)
+            assert entry.state is ConfigEntryState.LOADED
+            assert hass.data[DOMAIN][entry.entry_id].platforms == {"sensor"}
+            assert len(manager.callbacks) == 1
+            assert await hass.config_entries.async_unload(entry.entry_id)
+            assert DOMAIN not in hass.data
+            assert not manager.callbacks
+
+            # Unloaded after the first advert, which is of a Halo rather than
+            # the eQuilibrium its title was taken for
+            assert await hass.config_entries.async_setup(entry.entry_id)
+            assert isinstance(hass.data[DOMAIN][entry.entry_id].device, ChlorinatorAPI)
+            manager.advertise()
+            await hass.async_block_till_done()
+            assert isinstance(
+                hass.data[DOMAIN][entry.entry_id].device, HaloChlorinatorAPI
+            )
+            await _async_gather(hass, entry)
+            assert hass.states.get("select.heater_mode").state == "Off"
+            assert await hass.config_entries.async_unload(entry.entry_id)
+            await hass.async_block_till_done()
+            assert DOMAIN not in hass.data
+            assert not manager.callbacks
+            await hass.async_stop(force=True)
+        assert _coordinators() == 0
+
+    _run(_async_unload_deferred())
+
+
+def test_restore():
+    """Test the last gathered values are shown before the chlorinator is seen."""
+
+    async def _async_restore():
+        with tempfile.TemporaryDirectory() as config_dir:
+            hass, entry = await _async_start(config_dir)
+            await _async_gather(hass, entry)
+            gathered = hass.data[DOMAIN][entry.entry_id].coordinator.data
+            # Saved on unload
+            assert await hass.config_entries.async_unload(entry.entry_id)
+            await hass.async_block_till_done()
+            await hass.async_stop(force=True)
+
+            hass, entry = await _async_start(config_dir)
+            assert await hass.config_entries.async_unload(entry.entry_id)
+            manager = hass.data[DATA_MANAGER]
+            manager.advertised = False
+            assert await hass.config_entries.async_setup(entry.entry_id)
+            await hass.async_block_till_done()
+            coordinator = hass.data[DOMAIN][entry.entry_id].coordinator
+            assert coordinator.data == gathered
+            assert type(coordinator.data["mode"]) is Mode
+            assert isinstance(coordinator.data["ZoneNames"], bytes)
+            # Every platform is set up, with the entities of the capabilities
+            assert hass.data[DOMAIN][entry.entry_id].platforms == set(PLATFORMS)
+            assert hass.states.get("select.heater_mode").state == "Off"
+            assert hass.states.get("select.mode").state == "Auto"
+
+            manager.advertise()
+            await hass.async_block_till_done()
+            assert coordinator.last_update_timestamp is not None
+            await hass.async_stop(force=True)
+
+    _run(_async_restore())
+
+
+def test_reload_memory():
+    """Benchmark the memory of reloading an entry 50 times."""
+
+    async def _async_reload_memory():
+        with tempfile.TemporaryDirectory() as config_dir:
+            hass, entry = await _async_start(config_dir)
+            # Traced from the start, so both ends count one loaded entry
+            tracemalloc.start()
+            for _ in range(WARMUP_RELOADS):
+                await _async_reload(hass, entry)
+            gc.collect()
+            start, _ = tracemalloc.get_traced_memory()
+            for _ in range(RELOADS):
+                await _async_reload(hass, entry)
+            gc.collect()
+            end, _ = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            coordinators = _coordinators()
+            await hass.async_stop(force=True)
+        return end - start, coordinators
+
+    growth, coordinators = _run(_async_reload_memory())
+    print(f"Memory grew by {growth} bytes over {RELOADS} reloads")
+    assert coordinators == 1
+    assert growth < MAX_GROWTH
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.ERROR)
+    test_unload()
+    test_unload_deferred()
+    test_restore()
+    test_reload_memory()
+    print("✓ Reload lifecycle checks passed!")
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Test script for setting several lighting zones at once.
+
+Checks the apply service encodes one frame per lighting zone, including
+every zone in use for "all", without requiring a real device.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from pychlorinator import halo_parsers  # noqa: E402
+
+from custom_components.astralpool_halo_chlorinator.codec import (  # noqa: E402
+    LIGHT_FRAMES,
+)
+from custom_components.astralpool_halo_chlorinator.actions import (  # noqa: E402
+    encode_scene,
+)
+from custom_components.astralpool_halo_chlorinator.services import (  # noqa: E402
+    APPLY_SCHEMA,
+)
+
+TURN_ON = halo_parsers.LightAppActions.TurnOnZone
+
+
+def test_default_zone():
+    """Test lighting without zones sets zone 1 as before."""
+    targets = APPLY_SCHEMA({"lighting": "On"})
+    assert targets["lighting_zone"] == [1]
+    assert encode_scene(targets) == [LIGHT_FRAMES[TURN_ON, 1]]
+    assert encode_scene({"lighting": "On", "lighting_zone": 3}) == [
+        LIGHT_FRAMES[TURN_ON, 3]
+    ]
+
+
+def test_several_zones():
+    """Test listed zones each get one frame, once."""
+    targets = APPLY_SCHEMA({"lighting": "On", "lighting_zone": ["2", 4, 2]})
+    assert encode_scene(targets) == [
+        LIGHT_FRAMES[TURN_ON, 2],
+        LIGHT_FRAMES[TURN_ON, 4],
+    ]
+
+
+def test_all_zones():
+    """Test "all" sets every zone in use."""
+    targets = APPLY_SCHEMA({"lighting": "On", "lighting_zone": "all"})
+    assert encode_scene(targets, range(1, 4)) == [
+        LIGHT_FRAMES[TURN_ON, zone] for zone in range(1, 4)
+    ]
+
+
+if __name__ == "__main__":
+    test_default_zone()
+    test_several_zones()
+    test_all_zones()
+    print("✓ Lighting zone checks passed!")
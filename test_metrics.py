@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Test script for the OpenMetrics exporter.
+
+Renders the samples of simulated chlorinators and checks the document is
+grouped by metric family, labelled per chlorinator and ends with # EOF,
+without requiring a real device.
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from custom_components.astralpool_halo_chlorinator.connector import (  # noqa: E402
+    ConnectionStats,
+)
+from custom_components.astralpool_halo_chlorinator.engine import (  # noqa: E402
+    ChlorinatorEngine,
+)
+from custom_components.astralpool_halo_chlorinator.gather import (  # noqa: E402
+    GatherResult,
+)
+from custom_components.astralpool_halo_chlorinator.metrics import (  # noqa: E402
+    collect,
+    MetricsExporter,
+)
+from custom_components.astralpool_halo_chlorinator.simulator import (  # noqa: E402
+    SimulatedChlorinator,
+)
+
+# How many times cheaper a scrape must be than rendering the document
+MIN_SPEEDUP = 2
+
+
+def simulated_samples(failures=0):
+    """Return the samples of a freshly polled simulated chlorinator."""
+    engine = ChlorinatorEngine(SimulatedChlorinator(answer_delay=0))
+    data = asyncio.run(engine.async_poll())
+    stats = ConnectionStats()
+    stats.record(False, 2.0)
+    stats.record(True, 0.5)
+    stats.failures = failures
+    gather = GatherResult(latency={104: 0.25, 9: 0.125}, missing=[206], seconds=0.5)
+    return collect(
+        data,
+        timestamp=1700000000.0,
+        connection=stats.as_dict(),
+        gather=gather,
+        gather_failures=failures,
+        queue_depth=1,
+        breaches={"connect": 2, "read": 0},
+    )
+
+
+def test_render():
+    """Test the rendered document for one chlorinator."""
+    exporter = MetricsExporter()
+    exporter.update(
+        "entry1", {"entry_id": "entry1", "name": "Pool"}, simulated_samples()
+    )
+    lines = exporter.body.decode().splitlines()
+
+    assert lines[-1] == "# EOF"
+    labels = 'entry_id="entry1",name="Pool"'
+    assert f"halo_up{{{labels}}} 1" in lines
+    assert f"halo_ph{{{labels}}} 7.4" in lines
+    assert f"halo_water_temperature_celsius{{{labels}}} 26.5" in lines
+    assert f'halo_output_mode{{{labels},output="pump",mode="Auto"}} 1' in lines
+    assert f'halo_connections_total{{{labels},service_cache="hit"}} 1' in lines
+    assert f"halo_gather_missing_characteristics{{{labels}}} 1" in lines
+    assert f"halo_queue_depth{{{labels}}} 1" in lines
+    assert f'halo_deadline_breaches_total{{{labels},phase="connect"}} 2' in lines
+    latencies = [line for line in lines if line.startswith("halo_characteristic")]
+    assert latencies == [
+        f'halo_characteristic_latency_seconds{{{labels},characteristic="9"}} 0.125',
+        f'halo_characteristic_latency_seconds{{{labels},characteristic="104"}} 0.25',
+    ]
+    assert "# TYPE halo_connection_failures counter" in lines
+    assert "# UNIT halo_orp_millivolts millivolts" in lines
+    assert "# UNIT halo_dosing_pump_millilitres millilitres" in lines
+
+
+def test_families_grouped():
+    """Test samples of several chlorinators are grouped by family."""
+    exporter = MetricsExporter()
+    exporter.update("entry1", {"name": "Pool"}, simulated_samples())
+    exporter.update("entry2", {"name": 'Spa "2"'}, simulated_samples(failures=3))
+    lines = exporter.body.decode().splitlines()
+
+    families = [line.split()[2] for line in lines if line.startswith("# TYPE")]
+    assert len(families) == len(set(families))
+    failures = [line for line in lines if line.startswith("halo_gather_failures")]
+    assert failures == [
+        'halo_gather_failures_total{name="Pool"} 0',
+        'halo_gather_failures_total{name="Spa \\"2\\""} 3',
+    ]
+
+    exporter.remove("entry2")
+    assert b"Spa" not in exporter.body
+
+
+def test_scrape_cost():
+    """Benchmark serving a scrape against rendering the document."""
+    from custom_components.astralpool_halo_chlorinator.metrics_view import (
+        ChlorinatorMetricsView,
+    )
+
+    exporter = MetricsExporter()
+    exporter.update("entry1", {"name": "Pool"}, simulated_samples())
+    view = ChlorinatorMetricsView(exporter)
+    rounds = 1000
+
+    async def _serve():
+        start = time.perf_counter()
+        for _ in range(rounds):
+            response = await view.get(None)
+        return response, time.perf_counter() - start
+
+    response, serve = asyncio.run(_serve())
+    start = time.perf_counter()
+    for _ in range(rounds):
+        exporter._render()
+    render = time.perf_counter() - start
+    print(
+        f"Served {len(response.body)} bytes in {serve / rounds * 1e6:.1f}us, "
+        f"rendering takes {render / rounds * 1e6:.1f}us"
+    )
+    assert response.body is exporter.body
+    assert response.headers["Content-Type"].startswith("application/openmetrics")
+    assert serve * MIN_SPEEDUP < render
+
+
+if __name__ == "__main__":
+    test_render()
+    test_families_grouped()
+    test_scrape_cost()
+    print("✓ Metrics exporter checks passed!")
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Test script for tiered polling.
+
+Checks which polling tiers a gather reads as their cached values expire,
+without requiring Home Assistant or a real device.
+"""
+
+import os
+import sys
+from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from custom_components.astralpool_halo_chlorinator.codec import (  # noqa: E402
+    CHARACTERISTIC_PARSERS,
+)
+from custom_components.astralpool_halo_chlorinator.polling import (  # noqa: E402
+    GATHER_TIER,
+    HOURLY_TIER,
+    POLLING_TIERS,
+    STATIC_TIER,
+    TierCache,
+)
+
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def test_tiers_cover_parsed_characteristics():
+    """Test every parsed characteristic is in exactly one tier."""
+    characteristics = TierCache().characteristics(POLLING_TIERS)
+    assert sorted(characteristics) == sorted(CHARACTERISTIC_PARSERS)
+
+
+def test_running_times_read_every_gather():
+    """Test the dosing and filter pump run times of today are never cached."""
+    assert 601 in GATHER_TIER.characteristics
+    assert GATHER_TIER.ttl == timedelta(0)
+
+
+def test_expired_tiers():
+    """Test only tiers past their TTL are read again."""
+    cache = TierCache()
+    assert cache.expired(START) == list(POLLING_TIERS)
+
+    cache.mark_read(POLLING_TIERS, START)
+    assert cache.expired(START + timedelta(seconds=60)) == [GATHER_TIER]
+    assert cache.expired(START + timedelta(hours=1)) == [HOURLY_TIER, GATHER_TIER]
+    assert STATIC_TIER not in cache.expired(START + timedelta(hours=23))
+    assert STATIC_TIER in cache.expired(START + timedelta(days=1))
+
+    cache.invalidate()
+    assert cache.expired(START) == list(POLLING_TIERS)
+
+
+if __name__ == "__main__":
+    test_tiers_cover_parsed_characteristics()
+    test_running_times_read_every_gather()
+    test_expired_tiers()
+    print("✓ Polling tier checks passed!")
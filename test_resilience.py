@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+"""
+Fault-injection benchmark for the coordinator.
+
+Drives the real ChlorinatorDataUpdateCoordinator and pychlorinator API object
+against a simulated chlorinator, whose connections through the shared
+connector fail in the ways seen in the field: connect timeouts, links dropped
+mid-read, stale session keys, corrupt frames, slow authentication and a
+rejected access code. Every phase deadline of the watchdog and every delay of
+the simulated device runs scaled down, and the time the coordinator waits is
+scaled back up onto a virtual clock advanced by the polling interval. So the
+recovery time, wasted connection attempts and availability flapping of each
+scenario follow from the deadlines the integration actually waits on, and
+are checked against regression thresholds.
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bleak.backends.device import BLEDevice  # noqa: E402
+from homeassistant.core import HomeAssistant  # noqa: E402
+from homeassistant.exceptions import ConfigEntryAuthFailed  # noqa: E402
+from homeassistant.helpers import device_registry as dr  # noqa: E402
+from pychlorinator.halochlorinator import HaloChlorinatorAPI  # noqa: E402
+from pychlorinator.halochlorinator import UUID_MASTER_AUTHENTICATION_2  # noqa: E402
+from pychlorinator.halochlorinator import UUID_RX_CHARACTERISTIC  # noqa: E402
+
+from custom_components.astralpool_halo_chlorinator import connector  # noqa: E402
+from custom_components.astralpool_halo_chlorinator import session  # noqa: E402
+from custom_components.astralpool_halo_chlorinator import simulated_client  # noqa: E402
+from custom_components.astralpool_halo_chlorinator.codec import (  # noqa: E402
+    PAYLOAD,
+)
+from custom_components.astralpool_halo_chlorinator.coordinator import (  # noqa: E402
+    ChlorinatorDataUpdateCoordinator,
+)
+from custom_components.astralpool_halo_chlorinator.engine import (  # noqa: E402
+    AUTH_REJECTED_POLLS,
+)
+from custom_components.astralpool_halo_chlorinator.gpo_helper import (  # noqa: E402
+    add_gpo_support,
+)
+from custom_components.astralpool_halo_chlorinator.select import (  # noqa: E402
+    GPOModeSelect,
+)
+from custom_components.astralpool_halo_chlorinator.simulator import (  # noqa: E402
+    ACCESS_CODE,
+    SimulatedChlorinator,
+)
+from custom_components.astralpool_halo_chlorinator.watchdog import (  # noqa: E402
+    PHASE_TIMEOUTS,
+)
+
+# Real seconds per virtual second
+TIME_SCALE = 0.005
+
+# Seconds between coordinator updates
+POLL_SECONDS = 20
+
+# Seconds the simulated chlorinator takes to accept a connection, to answer
+# a read request, to check the access code when authentication is slow, and
+# to drop an idle link
+CONNECT_SECONDS = 2
+ANSWER_SECONDS = 0.2
+SLOW_AUTH_SECONDS = 4
+DROP_SECONDS = 1
+
+# Scenario: faults of the consecutive connections, and the thresholds of the
+# recovery time in seconds, wasted connection attempts and availability flaps.
+# The recovery times leave room for the scheduling jitter scaled up with them.
+SCENARIOS = {
+    "connect_timeout": (["connect_timeout"] * 3, 210, 3, 0),
+    "dropped_link": (["dropped_link"] * 2, 115, 2, 0),
+    "stale_session_key": (["stale_session_key"] * 2, 115, 2, 0),
+    "corrupt_frame": (["corrupt_frame"] * 2, 80, 2, 0),
+    "slow_auth": (["slow_auth"] * 3, 165, 0, 0),
+    "mixed": (
+        ["connect_timeout", "dropped_link", "stale_session_key", "corrupt_frame"],
+        185,
+        4,
+        0,
+    ),
+    "outage": (["connect_timeout"] * 16, 1100, 16, 2),
+}
+
+# Cycles after which a scenario counts as never recovering
+MAX_CYCLES = 40
+
+
+class FaultyClient(simulated_client.SimulatedClient):
+    """A client of the simulated chlorinator, failing in the way of a fault."""
+
+    def __init__(self, chlorinator, fault):
+        super().__init__(chlorinator)
+        self.fault = fault
+
+    async def write_gatt_char(self, uuid, data, response=None):
+        if uuid == UUID_MASTER_AUTHENTICATION_2:
+            if self.fault in ("stale_session_key", "auth_rejected"):
+                # Not authenticated, so the device sends nothing
+                return
+            if self.fault == "slow_auth":
+                await asyncio.sleep(SLOW_AUTH_SECONDS * TIME_SCALE)
+        if uuid == UUID_RX_CHARACTERISTIC and self.fault == "dropped_link":
+            # Lost with the first request, so nothing is answered
+            self.is_connected = False
+        await super().write_gatt_char(uuid, data, response)
+
+    def send(self, frame):
+        if self.fault == "corrupt_frame":
+            frame = frame[: PAYLOAD.start] + b"\xff" * (len(frame) - PAYLOAD.start)
+        super().send(frame)
+
+
+class FaultyChlorinator(HaloChlorinatorAPI):
+    """The pychlorinator API object, connecting with injected faults.
+
+    Each connection takes the next fault off the queue, and connects to a
+    simulated chlorinator without fault once the queue is empty.
+    """
+
+    def __init__(self):
+        super().__init__(BLEDevice("AA:BB:CC:DD:EE:FF", "HCHLOR", {}), ACCESS_CODE)
+        self.simulator = SimulatedChlorinator(
+            answer_delay=ANSWER_SECONDS * TIME_SCALE,
+            drop_delay=DROP_SECONDS * TIME_SCALE,
+        )
+        self.faults = []
+        self.clock = 0.0
+        self.attempts = 0
+        self.failed = 0
+        watchdog = connector.get_connector(self).watchdog
+        for phase, seconds in PHASE_TIMEOUTS.items():
+            watchdog.timeouts[phase] = seconds * TIME_SCALE
+        add_gpo_support(self)
+
+    async def establish_connection(self, client_class, device, name, max_attempts):
+        """Connect, failing the connection if a fault is queued."""
+        self.attempts += 1
+        fault = self.faults.pop(0) if self.faults else None
+        if fault is not None and fault != "slow_auth":
+            self.failed += 1
+        if fault == "connect_timeout":
+            # Runs into the deadline of the connect phase
+            await asyncio.Event().wait()
+        await asyncio.sleep(CONNECT_SECONDS * TIME_SCALE)
+        self.simulator.connections += 1
+        return FaultyClient(self.simulator, fault)
+
+
+def _run(coroutine, chlorinator):
+    """Run a coroutine connecting to the chlorinator through its faults.
+
+    The checks whether the connection is free, and whether the device dropped
+    the link, run scaled down as well.
+    """
+    original = connector.establish_connection
+    intervals = session.WAIT_INTERVAL, session.DROP_INTERVAL
+    connector.establish_connection = chlorinator.establish_connection
+    session.WAIT_INTERVAL, session.DROP_INTERVAL = (
+        interval * TIME_SCALE for interval in intervals
+    )
+    try:
+        return asyncio.run(coroutine)
+    finally:
+        connector.establish_connection = original
+        session.WAIT_INTERVAL, session.DROP_INTERVAL = intervals
+
+
+async def _async_refresh(coordinator, chlorinator):
+    """Refresh the coordinator, adding the time it took to the clock.
+
+    Only the time spent waiting is scaled up, the processor time is not
+    scaled down in the first place.
+    """
+    start = time.monotonic()
+    start_cpu = time.process_time()
+    await coordinator.async_refresh()
+    cpu = time.process_time() - start_cpu
+    chlorinator.clock += (time.monotonic() - start - cpu) / TIME_SCALE + cpu
+
+
+async def _async_run_scenario(chlorinator, faults):
+    """Return the recovery time, wasted attempts and flaps of a scenario."""
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = HomeAssistant(config_dir)
+        await dr.async_load(hass)
+        coordinator = ChlorinatorDataUpdateCoordinator(hass, chlorinator)
+
+        # Warm up until the first gather has succeeded
+        while not coordinator.data:
+            await _async_refresh(coordinator, chlorinator)
+            chlorinator.clock += POLL_SECONDS
+
+        chlorinator.faults = list(faults)
+        attempts = chlorinator.attempts
+        start = None
+        available = coordinator.last_update_success
+        flaps = 0
+        for _ in range(MAX_CYCLES):
+            gathered = coordinator.last_update_timestamp
+            started = chlorinator.clock
+            await _async_refresh(coordinator, chlorinator)
+            if chlorinator.attempts > attempts and start is None:
+                # The first faulty connection started with this cycle
+                start = started
+            if coordinator.last_update_success != available:
+                available = coordinator.last_update_success
+                flaps += 1
+            if (
+                not chlorinator.faults
+                and coordinator.data
+                and coordinator.last_update_timestamp != gathered
+            ):
+                break
+            chlorinator.clock += POLL_SECONDS
+        else:
+            raise AssertionError(f"No recovery from {faults}")
+
+        await hass.async_stop(force=True)
+        return chlorinator.clock - start, chlorinator.failed, flaps
+
+
+def test_fault_recovery():
+    """Test every scenario recovers within its thresholds."""
+    for name, (faults, max_seconds, max_wasted, max_flaps) in SCENARIOS.items():
+        chlorinator = FaultyChlorinator()
+        seconds, wasted, flaps = _run(
+            _async_run_scenario(chlorinator, faults), chlorinator
+        )
+        print(
+            f"{name:18} recovered in {seconds:5.0f}s, "
+            f"{wasted:2d} wasted attempts, {flaps} flaps"
+        )
+        assert seconds <= max_seconds, name
+        assert wasted <= max_wasted, name
+        assert flaps <= max_flaps, name
+
+
+def test_auth_rejected():
+    """Test a rejected access code stops polling instead of retrying."""
+
+    async def _async_poll_rejected():
+        with tempfile.TemporaryDirectory() as config_dir:
+            hass = HomeAssistant(config_dir)
+            await dr.async_load(hass)
+            coordinator = ChlorinatorDataUpdateCoordinator(hass, chlorinator)
+            await coordinator.async_refresh()
+            chlorinator.faults = ["auth_rejected"] * MAX_CYCLES
+            attempts = chlorinator.attempts
+
+            for _ in range(MAX_CYCLES):
+                chlorinator.clock += POLL_SECONDS
+                await coordinator.async_refresh()
+                if isinstance(coordinator.last_exception, ConfigEntryAuthFailed):
+                    break
+            await hass.async_stop(force=True)
+            return chlorinator.attempts - attempts, coordinator
+
+    chlorinator = FaultyChlorinator()
+    wasted, coordinator = _run(_async_poll_rejected(), chlorinator)
+    print(f"{'auth_rejected':18} gave up after {wasted} attempts")
+    assert isinstance(coordinator.last_exception, ConfigEntryAuthFailed)
+    assert wasted == AUTH_REJECTED_POLLS
+    assert not coordinator.last_update_success
+    assert coordinator.data == {}
+
+
+def test_dropped_links_not_rejected():
+    """Test polls whose link dropped are not taken for a rejected access code."""
+
+    async def _async_poll_dropped():
+        with tempfile.TemporaryDirectory() as config_dir:
+            hass = HomeAssistant(config_dir)
+            await dr.async_load(hass)
+            coordinator = ChlorinatorDataUpdateCoordinator(hass, chlorinator)
+            chlorinator.faults = ["dropped_link"] * (AUTH_REJECTED_POLLS + 1)
+            while chlorinator.faults:
+                coordinator.reset_data_age()
+                await coordinator.async_refresh()
+            await hass.async_stop(force=True)
+            return coordinator
+
+    chlorinator = FaultyChlorinator()
+    coordinator = _run(_async_poll_dropped(), chlorinator)
+    assert not isinstance(coordinator.last_exception, ConfigEntryAuthFailed)
+    assert coordinator.engine.silent_polls == 0
+
+
+def test_write_retries():
+    """Test a GPO mode selected again through faults ends up confirmed."""
+
+    async def _async_write():
+        with tempfile.TemporaryDirectory() as config_dir:
+            hass = HomeAssistant(config_dir)
+            await dr.async_load(hass)
+            coordinator = ChlorinatorDataUpdateCoordinator(hass, chlorinator)
+            while not coordinator.data:
+                await coordinator.async_refresh()
+            select = GPOModeSelect(coordinator, 2)
+            assert select.current_option == "Off"
+            chlorinator.faults = ["connect_timeout", "corrupt_frame", "slow_auth"]
+            attempts = chlorinator.attempts
+
+            for _ in range(MAX_CYCLES):
+                await select.async_select_option("On")
+                if select.current_option == "On":
+                    break
+            await hass.async_stop(force=True)
+            return chlorinator.attempts - attempts, select
+
+    chlorinator = FaultyChlorinator()
+    attempts, select = _run(_async_write(), chlorinator)
+    assert select.current_option == "On"
+    assert attempts == 3
+    assert chlorinator.failed == 2
+
+
+if __name__ == "__main__":
+    test_fault_recovery()
+    test_auth_rejected()
+    test_dropped_links_not_rejected()
+    test_write_retries()
+    print("✓ Fault-injection checks passed!")
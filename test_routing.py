@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Test script for connection routing.
+
+Routes connections across a simulated set of adapters and proxies, some of
+which fail to connect, without requiring Home Assistant or a real device.
+"""
+
+import asyncio
+import os
+import sys
+
+from bleak.exc import BleakError
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from custom_components.astralpool_halo_chlorinator.routing import (  # noqa: E402
+    ConnectionRouter,
+    ConnectionSource,
+    FALLBACK_SOURCE,
+)
+
+
+class SimulatedAdapters:
+    """Stand-in for the adapters and proxies that see the chlorinator."""
+
+    def __init__(self):
+        self.sources = {}
+        self.failing = set()
+        self.errors = {}
+        self.attempts = []
+
+    def add(self, source, rssi, slots_in_use=0, slots_free=None):
+        self.sources[source] = ConnectionSource(
+            source, f"device-via-{source}", rssi, slots_in_use, slots_free
+        )
+
+    def visible(self):
+        return list(self.sources.values())
+
+    async def connect(self, device):
+        source = device.removeprefix("device-via-")
+        self.attempts.append(source)
+        if source in self.failing:
+            raise TimeoutError(f"Timed out connecting through {source}")
+        if source in self.errors:
+            raise self.errors[source]
+        return source
+
+
+def test_prefers_strongest_signal():
+    """Test the source with the best RSSI is picked."""
+    adapters = SimulatedAdapters()
+    adapters.add("hci0", -90)
+    adapters.add("kitchen-proxy", -60)
+    adapters.add("shed-proxy", -75)
+    router = ConnectionRouter(adapters.visible, "fallback-device")
+
+    assert router.best().source == "kitchen-proxy"
+    assert asyncio.run(router.async_connect(adapters.connect)) == "kitchen-proxy"
+
+
+def test_prefers_free_slots():
+    """Test ties go to fewer slots in use and full sources are tried last."""
+    adapters = SimulatedAdapters()
+    adapters.add("busy-proxy", -60, slots_in_use=2, slots_free=1)
+    adapters.add("idle-proxy", -60, slots_in_use=0, slots_free=3)
+    adapters.add("full-proxy", -40, slots_in_use=3, slots_free=0)
+    router = ConnectionRouter(adapters.visible, "fallback-device")
+
+    ranked = [source.source for source in router.ranked()]
+    assert ranked == ["idle-proxy", "busy-proxy", "full-proxy"]
+
+
+def test_fails_over_and_demotes_failed_source():
+    """Test a connect error fails over and the source is then tried last."""
+    adapters = SimulatedAdapters()
+    adapters.add("kitchen-proxy", -60)
+    adapters.add("hci0", -80)
+    adapters.failing.add("kitchen-proxy")
+    router = ConnectionRouter(adapters.visible, "fallback-device")
+
+    assert asyncio.run(router.async_connect(adapters.connect)) == "hci0"
+    assert adapters.attempts == ["kitchen-proxy", "hci0"]
+
+    adapters.failing.clear()
+    assert router.best().source == "hci0"
+
+
+def test_raises_when_every_source_fails():
+    """Test the last error is raised when no source connects."""
+    adapters = SimulatedAdapters()
+    adapters.add("hci0", -80)
+    adapters.add("hci1", -85)
+    adapters.failing.update(("hci0", "hci1"))
+    router = ConnectionRouter(adapters.visible, "fallback-device")
+
+    try:
+        asyncio.run(router.async_connect(adapters.connect))
+    except TimeoutError as e:
+        assert "hci1" in str(e)
+    else:
+        raise AssertionError("Expected the connection to fail")
+
+
+def test_fails_over_on_bleak_errors():
+    """Test a source that is out of connection slots fails over as well."""
+    adapters = SimulatedAdapters()
+    adapters.add("kitchen-proxy", -60)
+    adapters.add("hci0", -80)
+    adapters.errors["kitchen-proxy"] = BleakError("No free connection slots")
+    router = ConnectionRouter(adapters.visible, "fallback-device")
+
+    assert asyncio.run(router.async_connect(adapters.connect)) == "hci0"
+    assert adapters.attempts == ["kitchen-proxy", "hci0"]
+
+
+def test_other_errors_do_not_fail_over():
+    """Test an error that is not a connect error is raised straight away."""
+    adapters = SimulatedAdapters()
+    adapters.add("kitchen-proxy", -60)
+    adapters.add("hci0", -80)
+    adapters.errors["kitchen-proxy"] = ValueError("Failed to decode")
+    router = ConnectionRouter(adapters.visible, "fallback-device")
+
+    try:
+        asyncio.run(router.async_connect(adapters.connect))
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("Expected the error to be raised")
+    assert adapters.attempts == ["kitchen-proxy"]
+    # Not held against the source
+    assert router.best().source == "kitchen-proxy"
+
+
+def test_falls_back_when_nothing_sees_the_device():
+    """Test the device resolved at setup is used when no source sees it."""
+    router = ConnectionRouter(lambda: [], "device-via-hci0")
+    source = router.best()
+    assert source.source == FALLBACK_SOURCE
+    assert source.device == "device-via-hci0"
+
+
+if __name__ == "__main__":
+    test_prefers_strongest_signal()
+    test_prefers_free_slots()
+    test_fails_over_and_demotes_failed_source()
+    test_raises_when_every_source_fails()
+    test_fails_over_on_bleak_errors()
+    test_other_errors_do_not_fail_over()
+    test_falls_back_when_nothing_sees_the_device()
+    print("✓ Routing checks passed!")
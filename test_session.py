@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+Test script for the command write path of a session.
+
+Runs sessions over a stand-in for a connected Bleak client that times writes
+by BLE connection events: a write with response waits for the next event to
+be answered, writes without response are queued and several are sent per
+event. Checks which writes are acknowledged and that sessions take turns on
+the connection, and benchmarks a command with its state read back against
+writing every frame with response, without requiring a real device.
+"""
+
+import asyncio
+import math
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bleak.backends.device import BLEDevice  # noqa: E402
+from pychlorinator.halo_parsers import GPOSetupCharacteristic  # noqa: E402
+from pychlorinator.halochlorinator import decrypt_characteristic  # noqa: E402
+from pychlorinator.halochlorinator import encrypt_characteristic  # noqa: E402
+
+from custom_components.astralpool_halo_chlorinator import connector  # noqa: E402
+from custom_components.astralpool_halo_chlorinator.codec import (  # noqa: E402
+    confirm_characteristics,
+    decode_header,
+    GPO_FRAMES,
+    GPOAppActions,
+    INDEXED_CHARACTERISTICS,
+    READ_REQUEST,
+)
+from custom_components.astralpool_halo_chlorinator.session import (  # noqa: E402
+    async_authenticated_session,
+    ChlorinatorSession,
+    WRITE_WITHOUT_RESPONSE,
+)
+from custom_components.astralpool_halo_chlorinator.simulator import (  # noqa: E402
+    SimulatedChlorinator,
+)
+
+# Seconds between connection events, scaled down from a typical 30 ms
+CONNECTION_INTERVAL = 0.01
+
+# Writes without response sent in one connection event
+PACKETS_PER_EVENT = 4
+
+# How many times faster a command with read back must be without response
+MIN_SPEEDUP = 1.5
+
+SESSION_KEY = bytes(range(16))
+
+GPONameValues = GPOSetupCharacteristic.GPONameValues
+
+
+class Characteristic:
+    """Stand-in for the RX characteristic."""
+
+    def __init__(self, properties):
+        self.properties = properties
+
+
+class Services:
+    """Stand-in for the discovered services."""
+
+    def __init__(self, properties):
+        self._characteristic = Characteristic(properties)
+
+    def get_characteristic(self, uuid):
+        return self._characteristic
+
+
+class SimulatedLink:
+    """Stand-in for a Bleak client connected to a simulated chlorinator."""
+
+    def __init__(self, without_response=True, mtu_size=23):
+        properties = ["write", "notify"]
+        if without_response:
+            properties.append(WRITE_WITHOUT_RESPONSE)
+        self.services = Services(properties)
+        self.mtu_size = mtu_size
+        self.chlorinator = SimulatedChlorinator(answer_delay=0)
+        self.responses = []
+        self._handler = None
+        self._queued = 0
+
+    async def start_notify(self, uuid, handler):
+        self._handler = handler
+
+    def _queue_seconds(self):
+        """Return the seconds until the queued writes have been sent."""
+        return math.ceil(self._queued / PACKETS_PER_EVENT) * CONNECTION_INTERVAL
+
+    async def write_gatt_char(self, uuid, data, response=None):
+        self.responses.append(response)
+        loop = asyncio.get_running_loop()
+        if response is False:
+            self._queued += 1
+            loop.call_later(self._queue_seconds(), self._receive, bytes(data), True)
+            return
+        # Sent after the queued writes, and answered in the next event
+        await asyncio.sleep(self._queue_seconds() + 2 * CONNECTION_INTERVAL)
+        self._receive(bytes(data), False)
+
+    def _receive(self, data, queued):
+        """Apply a written frame, answering read requests in the next event."""
+        if queued:
+            self._queued -= 1
+        frame = decrypt_characteristic(data, SESSION_KEY)
+        frame_type, characteristic = decode_header(frame)
+        if frame_type != READ_REQUEST:
+            self.chlorinator.apply(frame)
+            return
+        # Indexed characteristics are answered a frame per output, one per event
+        for event, frame in enumerate(self.chlorinator.answers(characteristic), 1):
+            answer = encrypt_characteristic(frame, SESSION_KEY)
+            asyncio.get_running_loop().call_later(
+                event * CONNECTION_INTERVAL, self._handler, None, bytearray(answer)
+            )
+
+
+class Client:
+    """Stand-in for a connected Bleak client that accepts the access code.
+
+    The device drops the link a connection interval after the last write.
+    """
+
+    used_cached_services = False
+
+    def __init__(self):
+        self.services = Services(["write"])
+        self.mtu_size = 23
+        self.is_connected = True
+        self.disconnected = False
+        self._drop = None
+
+    async def read_gatt_char(self, uuid):
+        return SESSION_KEY
+
+    async def write_gatt_char(self, uuid, data, response=None):
+        if self._drop is not None:
+            self._drop.cancel()
+        self._drop = asyncio.get_running_loop().call_later(
+            CONNECTION_INTERVAL, setattr, self, "is_connected", False
+        )
+
+    async def disconnect(self):
+        self.disconnected = True
+        self.is_connected = False
+
+
+class Chlorinator:
+    """Stand-in for the pychlorinator API object."""
+
+    def __init__(self):
+        self._ble_device = BLEDevice("AA:BB:CC:DD:EE:FF", "HCHLOR", {})
+        self._access_code = "1234"
+        self._connected = False
+
+
+async def _async_command(link, frames):
+    """Write frames and read back the state they changed, like a select."""
+    session = ChlorinatorSession(link, SESSION_KEY)
+    await session.async_write_frames(frames)
+    return await session.async_read(confirm_characteristics(frames))
+
+
+def test_write_properties():
+    """Test writes go without response only where the device allows it."""
+    frames = [GPO_FRAMES[GPOAppActions.On, gpo] for gpo in (1, 2, 3)]
+
+    link = SimulatedLink()
+    asyncio.run(ChlorinatorSession(link, SESSION_KEY).async_write_frames(frames))
+    # The last write is acknowledged, so the others are sent before closing
+    assert link.responses == [False, False, None]
+    assert link.chlorinator.written == frames
+
+    link = SimulatedLink(without_response=False)
+    asyncio.run(ChlorinatorSession(link, SESSION_KEY).async_write_frames(frames))
+    assert link.responses == [None, None, None]
+
+    # Frames that do not fit the MTU cannot be written without response
+    link = SimulatedLink(mtu_size=20)
+    assert not ChlorinatorSession(link, SESSION_KEY).without_response
+
+
+def test_command_latency():
+    """Benchmark a command with read back against writes with response."""
+    frames = [GPO_FRAMES[GPOAppActions.On, gpo] for gpo in (1, 2, 3, 4)]
+    results = {}
+    for without_response in (False, True):
+        link = SimulatedLink(without_response)
+        start = time.perf_counter()
+        data = asyncio.run(_async_command(link, frames))
+        results[without_response] = time.perf_counter() - start
+        assert data["GPO4_Mode"].name == "On"
+        assert link.chlorinator.written == frames
+
+    print(
+        f"Command with read back took {results[False] * 1000:.0f} ms with "
+        f"response, {results[True] * 1000:.0f} ms without"
+    )
+    assert results[True] * MIN_SPEEDUP < results[False]
+
+
+def test_indexed_characteristics():
+    """Test every frame of an indexed characteristic is read and merged."""
+    link = SimulatedLink()
+    data = asyncio.run(
+        ChlorinatorSession(link, SESSION_KEY).async_read(
+            [201, *INDEXED_CHARACTERISTICS]
+        )
+    )
+    for gpo in range(1, 5):
+        assert data[f"GPO{gpo}_OutletEnabled"] == 1
+        assert f"GPO{gpo}_Function" in data
+        assert f"GPO{gpo}_Mode" in data
+    assert [data[f"GPO{gpo}_Name"] for gpo in range(1, 5)] == [
+        GPONameValues.CleaningPump,
+        GPONameValues.HeaterPump,
+        GPONameValues.BoosterPump,
+        GPONameValues.WaterfallPump,
+    ]
+    assert "GPO0_OutletEnabled" not in data
+    assert data["Relay2_Name"].name == "Relay2"
+    assert "Valve2_Enabled" in data
+
+
+def test_exclusive_sessions():
+    """Test a session holds the connection, so the others wait for it.
+
+    Each session is left for the device to drop, rather than disconnected.
+    """
+    chlorinator = Chlorinator()
+    events = []
+    clients = []
+
+    async def establish_connection(client_class, device, name, max_attempts):
+        clients.append(Client())
+        return clients[-1]
+
+    async def _async_session(name):
+        async with async_authenticated_session(chlorinator):
+            # Library actions wait while the flag is set
+            assert chlorinator._connected
+            events.append(f"{name} opened")
+            await asyncio.sleep(CONNECTION_INTERVAL)
+            events.append(f"{name} closed")
+
+    async def _async_sessions():
+        await asyncio.gather(_async_session("first"), _async_session("second"))
+
+    original = connector.establish_connection
+    connector.establish_connection = establish_connection
+    try:
+        asyncio.run(_async_sessions())
+    finally:
+        connector.establish_connection = original
+    assert events == ["first opened", "first closed", "second opened", "second closed"]
+    assert not chlorinator._connected
+    assert not any(client.disconnected for client in clients)
+
+
+if __name__ == "__main__":
+    test_write_properties()
+    test_command_latency()
+    test_indexed_characteristics()
+    test_exclusive_sessions()
+    print("✓ Session write path checks passed!")
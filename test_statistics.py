@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Test script for the daily statistics backfill.
+
+Collects the daily counters from gathers around midnight and imports them
+into a stand-in for the recorder, checking each day is imported once with
+its final value, days already stored are skipped, a restart during the day
+does not lose that day, and the statistics are keyed by the address of the
+entry, without requiring a real device.
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bleak.backends.device import BLEDevice  # noqa: E402
+
+# The core has to be imported before the recorder
+from homeassistant.const import EVENT_HOMEASSISTANT_FINAL_WRITE  # noqa: E402
+from homeassistant.core import HomeAssistant  # noqa: E402
+
+from homeassistant.components import recorder  # noqa: E402
+from homeassistant.components.recorder import statistics  # noqa: E402
+from homeassistant.config_entries import ConfigEntry  # noqa: E402
+from homeassistant.const import CONF_ACCESS_TOKEN  # noqa: E402
+from homeassistant.const import CONF_ADDRESS  # noqa: E402
+
+from custom_components.astralpool_halo_chlorinator.const import DOMAIN  # noqa: E402
+from custom_components.astralpool_halo_chlorinator.coordinator import (  # noqa: E402
+    ChlorinatorDataUpdateCoordinator,
+)
+from custom_components.astralpool_halo_chlorinator.statistics import (  # noqa: E402
+    DAILY_STATISTICS,
+    DailyStatisticsImporter,
+)
+
+ADDRESS = "AA:BB:CC:DD:EE:FF"
+
+DAY = datetime(2024, 1, 2, tzinfo=timezone.utc)
+
+DOSING = "astralpool_halo_chlorinator:aa_bb_cc_dd_ee_ff_dosingpumpsecs"
+CELL_LOAD = "astralpool_halo_chlorinator:aa_bb_cc_dd_ee_ff_previousdayscellload"
+
+
+class Recorder:
+    """Stand-in for the recorder, with the newest stored row of each id."""
+
+    def __init__(self, last_stored=None):
+        self.last_stored = last_stored or {}
+        self.imported = {}
+
+    async def async_add_executor_job(self, target, *args):
+        return target(*args)
+
+    def get_last_statistics(self, hass, number, statistic_id, convert, types):
+        if statistic_id not in self.last_stored:
+            return {}
+        return {statistic_id: [{"start": self.last_stored[statistic_id].timestamp()}]}
+
+    def async_add_external_statistics(self, hass, metadata, rows):
+        imported = self.imported.setdefault(metadata["statistic_id"], {})
+        for row in rows:
+            imported[row["start"]] = row["state"]
+
+
+def gather(dosing, cell_load=40):
+    """Return the daily counters of a gather."""
+    return {"DosingPumpSecs": dosing, "PreviousDaysCellLoad": cell_load}
+
+
+def _run(coroutine, stand_in):
+    """Run a coroutine with the recorder replaced by a stand-in."""
+    originals = (
+        recorder.get_instance,
+        statistics.get_last_statistics,
+        statistics.async_add_external_statistics,
+    )
+    recorder.get_instance = lambda hass: stand_in
+    statistics.get_last_statistics = stand_in.get_last_statistics
+    statistics.async_add_external_statistics = stand_in.async_add_external_statistics
+    try:
+        return asyncio.run(coroutine)
+    finally:
+        (
+            recorder.get_instance,
+            statistics.get_last_statistics,
+            statistics.async_add_external_statistics,
+        ) = originals
+
+
+async def _async_hass(config_dir):
+    """Return Home Assistant with the recorder marked as loaded."""
+    hass = HomeAssistant(config_dir)
+    hass.config.components.add("recorder")
+    return hass
+
+
+def test_rollover():
+    """Test a running total is imported for its day once the next one starts."""
+    stand_in = Recorder()
+
+    async def _async_rollover():
+        with tempfile.TemporaryDirectory() as config_dir:
+            hass = await _async_hass(config_dir)
+            importer = DailyStatisticsImporter(hass, ADDRESS)
+            await importer.async_load()
+            importer.collect(gather(10), DAY + timedelta(hours=9))
+            importer.collect(gather(25), DAY + timedelta(hours=23, minutes=59))
+            await importer.async_flush()
+            assert DOSING not in stand_in.imported
+
+            importer.collect(gather(1), DAY + timedelta(days=1, minutes=1))
+            await importer.async_flush()
+            await hass.async_stop(force=True)
+
+    _run(_async_rollover(), stand_in)
+    assert stand_in.imported[DOSING] == {DAY: 25.0}
+    assert stand_in.imported[CELL_LOAD] == {DAY - timedelta(days=1): 40.0, DAY: 40.0}
+
+
+def test_dedupe():
+    """Test days already stored are not imported again."""
+    stand_in = Recorder({CELL_LOAD: DAY})
+
+    async def _async_dedupe():
+        with tempfile.TemporaryDirectory() as config_dir:
+            hass = await _async_hass(config_dir)
+            importer = DailyStatisticsImporter(hass, ADDRESS)
+            importer.collect(gather(10), DAY + timedelta(hours=12))
+            importer.collect(gather(10), DAY + timedelta(days=1, hours=12))
+            await importer.async_flush()
+            assert CELL_LOAD not in stand_in.imported
+            # Known to be stored from now on, without asking the recorder again
+            stand_in.last_stored.clear()
+            importer.collect(gather(10), DAY + timedelta(days=1, hours=13))
+            importer.collect(gather(10), DAY + timedelta(days=2, hours=12))
+            await importer.async_flush()
+            await hass.async_stop(force=True)
+
+    _run(_async_dedupe(), stand_in)
+    assert stand_in.imported[CELL_LOAD] == {DAY + timedelta(days=1): 40.0}
+
+
+def test_restart():
+    """Test a restart during the day keeps the running totals of that day."""
+    stand_in = Recorder()
+
+    async def _async_restart():
+        with tempfile.TemporaryDirectory() as config_dir:
+            hass = await _async_hass(config_dir)
+            importer = DailyStatisticsImporter(hass, ADDRESS)
+            await importer.async_load()
+            importer.collect(gather(30), DAY + timedelta(hours=15))
+            # Pending saves are written when Home Assistant stops
+            hass.bus.async_fire(EVENT_HOMEASSISTANT_FINAL_WRITE)
+            await hass.async_block_till_done()
+            await hass.async_stop(force=True)
+
+            hass = await _async_hass(config_dir)
+            importer = DailyStatisticsImporter(hass, ADDRESS)
+            await importer.async_load()
+            importer.collect(gather(5), DAY + timedelta(days=1, hours=8))
+            await importer.async_flush()
+            await hass.async_stop(force=True)
+
+    _run(_async_restart(), stand_in)
+    assert stand_in.imported[DOSING] == {DAY: 30.0}
+
+
+class Chlorinator:
+    """Stand-in for the pychlorinator API object."""
+
+    _ble_device = BLEDevice("aa:bb:cc:dd:ee:ff", "HCHLOR", {})
+
+
+def test_keyed_by_address():
+    """Test statistics and history are keyed by the address of the entry."""
+
+    async def _async_keyed_by_address():
+        with tempfile.TemporaryDirectory() as config_dir:
+            hass = await _async_hass(config_dir)
+            entry = ConfigEntry(
+                version=2,
+                minor_version=1,
+                domain=DOMAIN,
+                title="HCHLOR",
+                data={CONF_ADDRESS: ADDRESS, CONF_ACCESS_TOKEN: "1234"},
+                source="user",
+                options={},
+                unique_id=ADDRESS,
+            )
+            coordinator = ChlorinatorDataUpdateCoordinator(
+                hass, Chlorinator(), config_entry=entry
+            )
+            statistic_ids = [
+                coordinator._statistics.statistic_id(statistic)
+                for statistic in DAILY_STATISTICS
+            ]
+            directory = coordinator.history.directory.name
+            await hass.async_stop(force=True)
+        return statistic_ids, directory
+
+    statistic_ids, directory = asyncio.run(_async_keyed_by_address())
+    assert DOSING in statistic_ids
+    assert CELL_LOAD in statistic_ids
+    assert directory == "aa_bb_cc_dd_ee_ff"
+
+
+if __name__ == "__main__":
+    test_rollover()
+    test_dedupe()
+    test_restart()
+    test_keyed_by_address()
+    print("✓ Daily statistics checks passed!")
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Test script for the protocol trace.
+
+Checks the trace keeps only the most recent frames and decodes them when it
+is dumped, without requiring Home Assistant or a real device.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from custom_components.astralpool_halo_chlorinator.codec import (  # noqa: E402
+    GPO_FRAMES,
+    GPOAppActions,
+    READ_REQUESTS,
+)
+from custom_components.astralpool_halo_chlorinator.simulator import (  # noqa: E402
+    SimulatedChlorinator,
+)
+from custom_components.astralpool_halo_chlorinator.trace import (  # noqa: E402
+    ProtocolTrace,
+    REDACTED,
+    RX,
+    TX,
+)
+
+
+def test_trace_is_bounded():
+    """Test the oldest frames are dropped once the trace is full."""
+    trace = ProtocolTrace(size=3)
+    for characteristic in (1, 9, 100, 101, 102):
+        trace.record(TX, READ_REQUESTS[characteristic])
+    assert len(trace) == 3
+    assert [r["characteristic"] for r in trace.dump()] == [100, 101, 102]
+
+    trace.clear()
+    assert trace.dump() == []
+
+
+def test_trace_decodes_frames():
+    """Test commands, read requests and answers are summarized."""
+    trace = ProtocolTrace()
+    trace.record(TX, GPO_FRAMES[GPOAppActions.On, 2])
+    trace.record(TX, READ_REQUESTS[201])
+    trace.record(RX, b"\x03\xc9\x00" + bytes(17), 0.25)
+    trace.record(RX, b"\x03\x39\x05" + bytes(17))
+
+    gpo, request, answer, unknown = trace.dump()
+    assert gpo["characteristic"] == 504
+    assert gpo["summary"] == "action 3 argument 1"
+    assert request["summary"] == "read request"
+    assert answer["direction"] == RX
+    assert answer["latency"] == 0.25
+    assert answer["length"] == 20
+    assert "values)" in answer["summary"]
+    assert unknown["summary"].startswith("undecodable")
+
+
+def test_trace_redacts_private_frames():
+    """Test the serial number and settings are left out of a dump."""
+    frames = SimulatedChlorinator().frames
+    trace = ProtocolTrace()
+    for characteristic in (1, 100, 104):
+        trace.record(TX, READ_REQUESTS[characteristic])
+        trace.record(RX, bytes(frames[characteristic]))
+
+    dumped = trace.dump()
+    profile, settings, state = dumped[1], dumped[3], dumped[5]
+    for private in (profile, settings):
+        assert private["frame"] == private["summary"] == REDACTED
+    assert profile["characteristic"] == 1
+    assert profile["length"] == 20
+    assert "SerialNumber" not in str(dumped)
+    # Read requests and other characteristics are dumped in full
+    assert dumped[0]["summary"] == "read request"
+    assert state["frame"] == bytes(frames[104]).hex()
+
+
+if __name__ == "__main__":
+    test_trace_is_bounded()
+    test_trace_decodes_frames()
+    test_trace_redacts_private_frames()
+    print("✓ Trace checks passed!")
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Test script for the per-phase deadlines.
+
+Runs sessions over a stand-in for a Bleak client that hangs in a chosen
+phase, and checks the phase is cancelled at its deadline, the connection is
+released and the breach recorded, and that a write queued behind a hung
+session is not held up for longer than the deadline, without requiring a
+real device.
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bleak.backends.device import BLEDevice  # noqa: E402
+from pychlorinator.halochlorinator import UUID_MASTER_AUTHENTICATION_2  # noqa: E402
+
+from custom_components.astralpool_halo_chlorinator import connector  # noqa: E402
+from custom_components.astralpool_halo_chlorinator.codec import (  # noqa: E402
+    GPO_FRAMES,
+    GPOAppActions,
+)
+from custom_components.astralpool_halo_chlorinator.session import (  # noqa: E402
+    async_write_frames,
+)
+from custom_components.astralpool_halo_chlorinator.watchdog import (  # noqa: E402
+    AUTH,
+    DISCONNECT,
+    DROP,
+    PHASE_TIMEOUTS,
+    PhaseTimeout,
+    READ,
+    SESSION_KEY,
+    WAIT,
+    Watchdog,
+    WRITE,
+)
+
+# Seconds every phase but waiting for the connection may take in these tests
+DEADLINE = 0.05
+
+# Seconds a write queued behind a hung session may take, at most
+MAX_QUEUED_SECONDS = 0.5
+
+FRAME = GPO_FRAMES[GPOAppActions.On, 1]
+
+
+class Services:
+    """Stand-in for the discovered services, without the RX characteristic."""
+
+    def get_characteristic(self, uuid):
+        return None
+
+
+class HungClient:
+    """Stand-in for a connected Bleak client that hangs in some phases."""
+
+    used_cached_services = False
+
+    # The link is never dropped by the device
+    is_connected = True
+
+    def __init__(self, hang):
+        self.hang = set(hang)
+        self.services = Services()
+        self.disconnected = 0
+        self.written = []
+
+    async def _async_phase(self, phase):
+        """Hang forever if the phase should."""
+        if phase in self.hang:
+            await asyncio.Event().wait()
+
+    async def read_gatt_char(self, uuid):
+        await self._async_phase(SESSION_KEY)
+        return bytes(16)
+
+    async def write_gatt_char(self, uuid, data, response=None):
+        await self._async_phase(AUTH if uuid == UUID_MASTER_AUTHENTICATION_2 else WRITE)
+        self.written.append(uuid)
+
+    async def disconnect(self):
+        self.disconnected += 1
+        await self._async_phase(DISCONNECT)
+
+
+class Chlorinator:
+    """Stand-in for the pychlorinator API object."""
+
+    def __init__(self):
+        self._ble_device = BLEDevice("AA:BB:CC:DD:EE:FF", "HCHLOR", {})
+        self._access_code = "1234"
+        self._connected = False
+        self.connector = connector.ChlorinatorConnector(self)
+        self.connector.watchdog = Watchdog(
+            {**dict.fromkeys(PHASE_TIMEOUTS, DEADLINE), WAIT: MAX_QUEUED_SECONDS}
+        )
+
+
+def _run_with_clients(chlorinator, clients, coroutine):
+    """Run a coroutine, connecting to the clients in turn."""
+
+    async def establish_connection(client_class, device, name, max_attempts):
+        return clients.pop(0)
+
+    original = connector.establish_connection
+    connector.establish_connection = establish_connection
+    try:
+        return asyncio.run(coroutine)
+    finally:
+        connector.establish_connection = original
+
+
+def test_phase():
+    """Test a phase is cancelled at its deadline, and only then recorded."""
+    watchdog = Watchdog({READ: DEADLINE})
+
+    async def _async_phases():
+        async with watchdog.phase(READ):
+            await asyncio.sleep(0)
+        try:
+            async with watchdog.phase(READ):
+                await asyncio.sleep(1)
+        except PhaseTimeout as e:
+            assert e.phase == READ
+        else:
+            raise AssertionError("Phase was not cancelled")
+        try:
+            async with watchdog.phase(READ):
+                raise asyncio.TimeoutError("raised by the body")
+        except PhaseTimeout:
+            raise AssertionError("Timeout of the body taken for a breach")
+        except asyncio.TimeoutError:
+            pass
+
+    asyncio.run(_async_phases())
+    assert watchdog.breaches[READ] == 1
+    assert watchdog.as_dict()["recent"][0]["phase"] == READ
+
+
+def test_hung_phases():
+    """Test every hung phase of a session releases the connection."""
+    for phase in (SESSION_KEY, AUTH, WRITE):
+        chlorinator = Chlorinator()
+        client = HungClient([phase])
+        try:
+            _run_with_clients(
+                chlorinator, [client], async_write_frames(chlorinator, [FRAME])
+            )
+        except PhaseTimeout as e:
+            assert e.phase == phase
+        else:
+            raise AssertionError(f"{phase} was not cancelled")
+        assert client.disconnected == 1, phase
+        assert not chlorinator._connected, phase
+        assert chlorinator.connector.watchdog.breaches[phase] == 1
+
+    # A link the device keeps is disconnected, and a hung disconnect is given
+    # up on, the frames were written
+    chlorinator = Chlorinator()
+    client = HungClient([DISCONNECT])
+    _run_with_clients(chlorinator, [client], async_write_frames(chlorinator, [FRAME]))
+    assert len(client.written) == 2
+    assert client.disconnected == 1
+    assert not chlorinator._connected
+    assert chlorinator.connector.watchdog.breaches[DROP] == 1
+    assert chlorinator.connector.watchdog.breaches[DISCONNECT] == 1
+
+
+def test_queued_write():
+    """Benchmark a write queued behind a session hung in authentication."""
+    chlorinator = Chlorinator()
+    clients = [HungClient([AUTH]), HungClient([])]
+
+    async def _async_queued():
+        hung = asyncio.create_task(async_write_frames(chlorinator, [FRAME]))
+        await asyncio.sleep(0)
+        start = time.perf_counter()
+        await async_write_frames(chlorinator, [FRAME])
+        seconds = time.perf_counter() - start
+        try:
+            await hung
+        except PhaseTimeout:
+            pass
+        return seconds
+
+    seconds = _run_with_clients(chlorinator, clients, _async_queued())
+    print(f"Write queued behind a hung session took {seconds * 1000:.0f} ms")
+    assert seconds < MAX_QUEUED_SECONDS
+    assert chlorinator.connector.watchdog.breaches[AUTH] == 1
+
+
+if __name__ == "__main__":
+    test_phase()
+    test_hung_phases()
+    test_queued_write()
+    print("✓ Watchdog checks passed!")